@@ -0,0 +1,176 @@
+"""Admission control: shed load early rather than let every request time out.
+
+When Postgres slows down, requests hold their worker's connections longer, the rest
+queue for the pool, and eventually everything in flight waits out `pool_timeout`.
+`AdmissionControlMiddleware` keeps a worker out of that state:
+
+- At most `API_MAX_CONCURRENCY` requests run at once per worker. Others wait in a
+  bounded queue, best priority first, for up to `API_QUEUE_TIMEOUT_SECONDS`.
+- Requests that can't be queued, or wait too long, get a `503` with `Retry-After`
+  straight away, which clients and load balancers can act on.
+- When recent database pool checkouts take longer than `API_SHED_POOL_WAIT_SECONDS`,
+  low-priority requests (exports, bulk writes) are rejected outright, and others are
+  only admitted while there's free concurrency.
+
+Health checks and metrics scrapes skip admission control entirely, so an overloaded
+worker still reports itself alive (rather than being restarted) and is still measured.
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import math
+from dataclasses import dataclass
+from enum import IntEnum
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+import blanket.io.env as env
+from blanket.db.pool import get_recent_checkout_wait
+
+API_MAX_CONCURRENCY = int(env.getenv("BLANKET_API_MAX_CONCURRENCY", "64"))
+API_MAX_QUEUE = int(env.getenv("BLANKET_API_MAX_QUEUE", "128"))
+API_QUEUE_TIMEOUT_SECONDS = float(env.getenv("BLANKET_API_QUEUE_TIMEOUT_SECONDS", "5"))
+API_SHED_POOL_WAIT_SECONDS = float(
+    env.getenv("BLANKET_API_SHED_POOL_WAIT_SECONDS", "1")
+)
+
+EXEMPT_PATH_PREFIXES = ("/health", "/metrics")
+LOW_PRIORITY_PATH_PREFIXES = ("/tasks/export", "/tasks/bulk")
+
+
+class Priority(IntEnum):
+    """Lower values are admitted first."""
+
+    NORMAL = 0
+    LOW = 1
+
+
+def request_priority(scope: Scope) -> Priority:
+    if scope["path"].startswith(LOW_PRIORITY_PATH_PREFIXES):
+        return Priority.LOW
+    return Priority.NORMAL
+
+
+@dataclass
+class AdmissionStats:
+    admitted: int = 0
+    queued: int = 0
+    rejected_queue_full: int = 0
+    rejected_queue_timeout: int = 0
+    rejected_pool_saturated: int = 0
+
+
+_stats = AdmissionStats()
+
+
+def get_admission_stats() -> AdmissionStats:
+    """Admission counters for this process."""
+    return _stats
+
+
+class AdmissionControlMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        max_concurrency: int = API_MAX_CONCURRENCY,
+        max_queue: int = API_MAX_QUEUE,
+        queue_timeout: float = API_QUEUE_TIMEOUT_SECONDS,
+        shed_pool_wait: float = API_SHED_POOL_WAIT_SECONDS,
+    ):
+        self.app = app
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.shed_pool_wait = shed_pool_wait
+        self._running = 0
+        self._waiting = 0
+        self._queue: list[tuple[Priority, int, asyncio.Future[None]]] = []
+        self._sequence = itertools.count()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] == "OPTIONS"
+            or scope["path"].startswith(EXEMPT_PATH_PREFIXES)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        priority = request_priority(scope)
+        pool_wait = get_recent_checkout_wait("api")
+        if pool_wait > self.shed_pool_wait and (
+            priority is Priority.LOW or self._running >= self.max_concurrency
+        ):
+            _stats.rejected_pool_saturated += 1
+            await _reject(send, retry_after=pool_wait)
+            return
+
+        if self._running < self.max_concurrency and not self._waiting:
+            self._running += 1
+        else:
+            # Low-priority requests may only fill half the queue, leaving room for
+            # the rest
+            limit = (
+                self.max_queue if priority is Priority.NORMAL else self.max_queue // 2
+            )
+            if self._waiting >= limit:
+                _stats.rejected_queue_full += 1
+                await _reject(send, retry_after=self.queue_timeout)
+                return
+            if not await self._wait_for_slot(priority):
+                _stats.rejected_queue_timeout += 1
+                await _reject(send, retry_after=self.queue_timeout)
+                return
+
+        _stats.admitted += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._release()
+
+    async def _wait_for_slot(self, priority: Priority) -> bool:
+        """Wait to be handed a slot by `_release`. False if none came in time."""
+        _stats.queued += 1
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._sequence), future))
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+            return True
+        except TimeoutError:
+            return False
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+        finally:
+            self._waiting -= 1
+
+    def _release(self) -> None:
+        # Hand the slot straight to the best waiter, if any, so it can't be taken by
+        # a request that just arrived
+        while self._queue:
+            _, _, future = heapq.heappop(self._queue)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._running -= 1
+
+
+async def _reject(send: Send, retry_after: float) -> None:
+    body = json.dumps({"detail": "Server is overloaded; retry later"}).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
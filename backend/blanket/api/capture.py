@@ -0,0 +1,153 @@
+"""Opt-in capture of anonymized request shapes, for replaying real traffic.
+
+With `BLANKET_CAPTURE_SAMPLE_RATE` above 0, `TrafficCaptureMiddleware` records that
+fraction of requests to JSON Lines files in `BLANKET_CAPTURE_DIR`, one per process.
+`blanket replay` (blanket.bench.replay) replays them against another instance.
+
+Each record keeps what shapes a request's cost, but nothing identifying:
+
+- the route template (e.g. `/tasks/{task_id}`), not the path; IDs aren't kept;
+- query parameters: values of `VERBATIM_PARAMS` (enums, numbers, flags) as sent, and
+  for any other parameter (e.g. `search`), only the word count and length;
+- request and response body sizes, but no bodies or headers;
+- when it arrived, how long it took and its status.
+
+Records are written by a background thread, so capturing doesn't block the event loop.
+"""
+
+import json
+import os
+import queue
+import random
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qsl
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+import blanket.io.env as env
+from blanket.io.log import LOGGER
+
+CAPTURE_SAMPLE_RATE = float(env.getenv("BLANKET_CAPTURE_SAMPLE_RATE", "0"))
+CAPTURE_DIR = env.getenv("BLANKET_CAPTURE_DIR", "captures")
+
+VERBATIM_PARAMS = frozenset(
+    {"completed", "priority", "page", "limit", "count", "format"}
+)
+"""Query parameters whose values can't identify anyone, and so are kept as sent."""
+EXCLUDED_PATH_PREFIXES = ("/health", "/metrics")
+
+
+def describe_value(value: str) -> dict[str, int]:
+    """The shape of a free-text value, without its content."""
+    return {"words": len(value.split()), "length": len(value)}
+
+
+def anonymize_query(query_string: bytes) -> dict[str, Any]:
+    params: dict[str, Any] = {}
+    for name, value in parse_qsl(
+        query_string.decode("latin-1"), keep_blank_values=True
+    ):
+        params[name] = value if name in VERBATIM_PARAMS else describe_value(value)
+    return params
+
+
+class _CaptureWriter:
+    """Appends records to this process' capture file from a background thread."""
+
+    def __init__(self, directory: Path):
+        self.path = directory / f"capture-{socket.gethostname()}-{os.getpid()}.jsonl"
+        self._queue: queue.SimpleQueue[dict[str, Any]] = queue.SimpleQueue()
+        self._thread = threading.Thread(
+            target=self._run, name="traffic-capture", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, record: dict[str, Any]) -> None:
+        self._queue.put(record)
+
+    def _run(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        while True:
+            records = [self._queue.get()]
+            # Write whatever else has queued up in one go
+            while not self._queue.empty():
+                records.append(self._queue.get())
+            try:
+                with self.path.open("a") as f:
+                    f.writelines(json.dumps(record) + "\n" for record in records)
+            except OSError:
+                LOGGER.warning("Failed to write captured requests", path=str(self.path))
+
+
+class TrafficCaptureMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        sample_rate: float = CAPTURE_SAMPLE_RATE,
+        directory: str | Path = CAPTURE_DIR,
+    ):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.directory = Path(directory)
+        self._writer: _CaptureWriter | None = None
+        self._writer_pid: int | None = None
+
+    def _get_writer(self) -> _CaptureWriter:
+        # Started lazily, so each forked worker gets its own thread and file
+        if self._writer is None or self._writer_pid != os.getpid():
+            self._writer = _CaptureWriter(self.directory)
+            self._writer_pid = os.getpid()
+        return self._writer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or self.sample_rate <= 0
+            or scope["path"].startswith(EXCLUDED_PATH_PREFIXES)
+            or random.random() >= self.sample_rate
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        arrived_at = time.time()
+        started = time.perf_counter()
+        request_bytes = 0
+        response_bytes = 0
+        status: int | None = None
+
+        async def receive_counted() -> Message:
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                request_bytes += len(message.get("body", b""))
+            return message
+
+        async def send_counted(message: Message) -> None:
+            nonlocal status, response_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_counted, send_counted)
+        finally:
+            route = scope.get("route")
+            self._get_writer().write(
+                {
+                    "ts": round(arrived_at, 6),
+                    "method": scope["method"],
+                    "route": getattr(route, "path", None),
+                    "query": anonymize_query(scope.get("query_string", b"")),
+                    "request_bytes": request_bytes,
+                    "response_bytes": response_bytes,
+                    "status": status,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                }
+            )
@@ -1,18 +1,26 @@
 from collections.abc import AsyncGenerator
 from typing import Annotated
 
-import httpx
 import sqlalchemy as sa
-from fastapi import Depends, HTTPException, Security, status
+from fastapi import Depends, HTTPException, Request, Response, Security, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from fastapi_auth0 import Auth0, Auth0User
 from redis.asyncio import Redis as AsyncRedis
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import blanket.io.env as env
+from blanket.api.identity import get_user_by_auth0_sub
+from blanket.api.replica import should_read_from_replica
+from blanket.api.tokens import TokenVerifier
+from blanket.api.userinfo import fetch_userinfo
 from blanket.db.models import Task, User
 from blanket.db.redis import get_redis_client
-from blanket.db.session import get_api_session
+from blanket.db.session import (
+    get_api_replica_session,
+    get_api_session,
+    set_session_user,
+)
+from blanket.io.timing import timing_phase
 
 auth = Auth0(
     domain=env.getenv("BLANKET_AUTH0_DOMAIN"),
@@ -20,6 +28,8 @@ auth = Auth0(
     lazy_init=True,
 )
 
+token_verifier = TokenVerifier(auth)
+
 security = HTTPBearer()
 
 
@@ -28,13 +38,29 @@ async def _get_db() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
-def get_user_email(token: str) -> str:
-    url = f"https://{auth.domain}/userinfo"
-    headers = {"Authorization": f"Bearer {token}"}
-    client = httpx.Client()
-    response = client.get(url, headers=headers, timeout=5)
-    response.raise_for_status()
-    return response.json()["email"]
+async def _get_read_db(
+    request: Request,
+    response: Response,
+    db: Annotated[AsyncSession, Depends(_get_db)],
+) -> AsyncGenerator[AsyncSession, None]:
+    """A session for read-only routes: on the replica when it's safe, else `db`.
+
+    See `blanket.api.replica` for when reads fall back to the primary.
+    """
+    if not await should_read_from_replica(request):
+        yield db
+        return
+
+    # The ETag names the latest version, which the replica may not have applied yet
+    if "etag" in response.headers:
+        del response.headers["etag"]
+    async with get_api_replica_session() as session:
+        yield session
+
+
+async def get_user_email(token: str, subject: str) -> str:
+    userinfo = await fetch_userinfo(f"https://{auth.domain}/userinfo", token, subject)
+    return userinfo["email"]
 
 
 async def get_or_create_user(
@@ -42,12 +68,11 @@ async def get_or_create_user(
     token: str,
     db: AsyncSession,
 ) -> User:
-    stmt = sa.select(User).where(User.auth0_sub == auth0_user.id)
-    user = await db.scalar(stmt)
+    user = await get_user_by_auth0_sub(db, auth0_user.id)
 
     if not user:
         # Check for existing user with matching email but null auth0_id
-        email = get_user_email(token)
+        email = await get_user_email(token, auth0_user.id)
         stmt = sa.select(User).where(User.email == email, User.auth0_sub.is_(None))
         user = await db.scalar(stmt)
         if user:
@@ -72,20 +97,22 @@ async def get_token(
 
 
 async def get_current_user(
-    auth0_user: Annotated[Auth0User, Security(auth.get_user)],
+    auth0_user: Annotated[Auth0User, Security(token_verifier.get_user)],
     token: Annotated[str, Depends(get_token)],
     db: Annotated[AsyncSession, Depends(_get_db)],
 ) -> User:
-    user = await get_or_create_user(auth0_user, token, db)
+    with timing_phase("auth"):
+        user = await get_or_create_user(auth0_user, token, db)
     return user
 
 
 async def set_user_context(db: AsyncSession, user: User) -> None:
-    """Set PostgreSQL session variables for RLS policies."""
-    await db.execute(sa.text("SELECT set_current_user(:uid)"), {"uid": user.id})
+    """Scope RLS policies to `user` for the rest of the session's transactions."""
+    with timing_phase("rls"):
+        await set_session_user(db, user.id)
 
 
-def get_unauthenticated_db(
+async def get_unauthenticated_db(
     db: Annotated[AsyncSession, Depends(_get_db)],
 ) -> AsyncSession:
     return db
@@ -99,12 +126,23 @@ async def get_user_db(
     return db
 
 
-def get_redis() -> AsyncRedis:
+async def get_redis() -> AsyncRedis:
     return get_redis_client()
 
 
-async def get_task(db: Annotated[AsyncSession, Depends(_get_db)], task_id: int) -> Task:
+async def _load_task(db: AsyncSession, task_id: int) -> Task:
     task = await db.get(Task, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     return task
+
+
+async def get_task(db: Annotated[AsyncSession, Depends(_get_db)], task_id: int) -> Task:
+    return await _load_task(db, task_id)
+
+
+async def get_task_to_read(
+    db: Annotated[AsyncSession, Depends(_get_read_db)], task_id: int
+) -> Task:
+    """Like `get_task`, but possibly from the replica; for read-only routes."""
+    return await _load_task(db, task_id)
@@ -0,0 +1,121 @@
+"""Conditional GETs (ETag / If-None-Match) backed by version counters in Redis.
+
+Each cacheable resource has a version counter in Redis that write routes bump. A
+resource's ETag is derived from its counter (and, for lists, the query string), so
+checking whether a client's copy is current costs one Redis round trip and no Postgres
+query or serialization. Unchanged resources get a `304 Not Modified`.
+
+Counters start at the current time in nanoseconds rather than 0, so after Redis loses
+them (eviction, flush, or expiry after `VERSION_TTL_SECONDS`), new versions can't
+collide with ETags clients already hold. The expiry bounds how many counters requests
+for arbitrary task IDs can leave behind.
+
+Without Redis (unconfigured or unavailable), responses simply carry no ETag.
+"""
+
+import hashlib
+import time
+from collections.abc import Iterable
+
+from fastapi import HTTPException, Request, Response
+from redis.exceptions import RedisError
+
+from blanket.db.redis import get_redis_client, redis_is_configured
+from blanket.io.log import LOGGER
+
+VERSION_KEY_PREFIX = "version"
+VERSION_TTL_SECONDS = 86400
+CACHE_CONTROL = "private, no-cache"
+"""Clients may store responses but must revalidate them before each use."""
+
+
+def task_version_key(task_id: int) -> str:
+    return f"{VERSION_KEY_PREFIX}:task:{task_id}"
+
+
+def task_list_version_key() -> str:
+    """The version of every task list; any task write changes it."""
+    return f"{VERSION_KEY_PREFIX}:tasks:all"
+
+
+async def get_version(key: str) -> int | None:
+    """Get a version counter, initializing it if needed. None if Redis is unavailable."""
+    if not redis_is_configured():
+        return None
+    try:
+        async with get_redis_client().pipeline(transaction=False) as pipe:
+            pipe.set(key, time.time_ns(), nx=True, ex=VERSION_TTL_SECONDS)
+            pipe.get(key)
+            _, version = await pipe.execute()
+    except RedisError:
+        LOGGER.warning("Version counter unavailable", key=key)
+        return None
+    return int(version)
+
+
+async def bump_versions(keys: Iterable[str]) -> None:
+    """Bump version counters, invalidating ETags derived from them."""
+    keys = set(keys)
+    if not keys or not redis_is_configured():
+        return
+    try:
+        async with get_redis_client().pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.set(key, time.time_ns(), nx=True, ex=VERSION_TTL_SECONDS)
+                pipe.incr(key)
+            await pipe.execute()
+    except RedisError:
+        # Clients may see stale data until the counters are next bumped
+        LOGGER.warning("Failed to bump version counters", keys=sorted(keys))
+
+
+async def bump_task_versions(task_ids: Iterable[int]) -> None:
+    """Invalidate ETags for the given tasks and every task list."""
+    await bump_versions(
+        [*(task_version_key(task_id) for task_id in task_ids), task_list_version_key()]
+    )
+
+
+def make_etag(key: str, version: int, variant: str = "") -> str:
+    """A weak ETag for version `version` of `key`.
+
+    `variant` distinguishes representations of the same version, e.g. list filters.
+    """
+    digest = hashlib.sha256(f"{key}:{version}:{variant}".encode()).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # If-None-Match uses weak comparison, so the W/ prefix is ignored
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+async def check_etag(
+    request: Request, response: Response, key: str, variant: str = ""
+) -> None:
+    """Set the ETag for `key`'s current version, or answer `304` if it's unchanged."""
+    version = await get_version(key)
+    if version is None:
+        return
+    etag = make_etag(key, version, variant)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+
+async def check_task_etag(task_id: int, request: Request, response: Response) -> None:
+    """Dependency: answer `304` for an unchanged task before it's loaded.
+
+    Declare it in the route's `dependencies`, which resolve before its parameters.
+    """
+    await check_etag(request, response, task_version_key(task_id))
+
+
+async def check_task_list_etag(request: Request, response: Response) -> None:
+    """Dependency: answer `304` for an unchanged task list before it's queried."""
+    variant = "&".join(sorted(request.url.query.split("&")))
+    await check_etag(request, response, task_list_version_key(), variant)
@@ -0,0 +1,70 @@
+"""Streaming exports of query results as NDJSON or CSV.
+
+Rows are read through a server-side cursor in batches of `EXPORT_BATCH_SIZE` and
+written to the client one batch at a time, so memory stays flat however many rows
+there are. The next batch isn't fetched until the client has accepted the previous
+one, and a client disconnect cancels the stream, closing the cursor.
+"""
+
+import csv
+import io
+from collections.abc import AsyncIterator
+from enum import StrEnum
+from typing import Any
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from blanket.api.interfaces import TaskListItem
+
+EXPORT_BATCH_SIZE = 1000
+
+
+class ExportFormat(StrEnum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+    @property
+    def media_type(self) -> str:
+        match self:
+            case ExportFormat.NDJSON:
+                return "application/x-ndjson"
+            case ExportFormat.CSV:
+                return "text/csv"
+
+
+def _encode_ndjson(items: list[TaskListItem]) -> bytes:
+    return b"".join(item.model_dump_json().encode() + b"\n" for item in items)
+
+
+def _encode_csv(items: list[TaskListItem]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(item.model_dump(mode="json").values() for item in items)
+    return buffer.getvalue().encode()
+
+
+async def stream_tasks(
+    db: AsyncSession,
+    query: sa.Select,
+    export_format: ExportFormat,
+    params: dict[str, Any] | None = None,
+) -> AsyncIterator[bytes]:
+    """Stream the rows of `query` (selecting `TaskListItem.columns()`) as `export_format`.
+
+    `db` must stay open until the stream is exhausted or closed.
+    """
+    result = await db.stream(
+        query, params, execution_options={"yield_per": EXPORT_BATCH_SIZE}
+    )
+    try:
+        if export_format is ExportFormat.CSV:
+            header = io.StringIO()
+            csv.writer(header).writerow(TaskListItem.model_fields)
+            yield header.getvalue().encode()
+
+        encode = _encode_csv if export_format is ExportFormat.CSV else _encode_ndjson
+        async for rows in result.partitions():
+            yield encode([TaskListItem.from_row(row) for row in rows])
+    finally:
+        await result.close()
@@ -0,0 +1,152 @@
+"""Two-tier cache mapping Auth0 subjects to app users.
+
+Nearly every authenticated request needs the `User` row for its token's subject. This
+caches a snapshot of the row in-process (short TTL, per worker) and in Redis (longer
+TTL, shared across workers), so the lookup usually costs no database round trip.
+
+Committing an update to or deletion of a `User` through the ORM invalidates this
+worker's entry and Redis; other workers' in-process entries expire within
+`IDENTITY_LOCAL_TTL_SECONDS`.
+"""
+
+import asyncio
+import datetime
+import json
+from typing import Any
+
+import sqlalchemy as sa
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+
+from blanket.db.models import User
+from blanket.db.redis import get_redis_client, redis_is_configured
+from blanket.io.cache import TTLCache
+from blanket.io.log import LOGGER
+
+IDENTITY_LOCAL_TTL_SECONDS = 30
+IDENTITY_LOCAL_MAX_SIZE = 10_000
+IDENTITY_REDIS_TTL_SECONDS = 600
+
+_CACHED_COLUMNS = ("id", "email", "auth0_sub", "display_name", "created_at")
+
+_local_cache: TTLCache[str, dict[str, Any]] = TTLCache(
+    maxsize=IDENTITY_LOCAL_MAX_SIZE, ttl=IDENTITY_LOCAL_TTL_SECONDS
+)
+_pending_invalidations: set[asyncio.Task] = set()
+_STALE_IDENTITIES_KEY = "stale_identities"
+
+
+def _redis_key(auth0_sub: str) -> str:
+    return f"identity:user:{auth0_sub}"
+
+
+def _to_fields(user: User) -> dict[str, Any]:
+    return {column: getattr(user, column) for column in _CACHED_COLUMNS}
+
+
+def _to_json(fields: dict[str, Any]) -> str:
+    return json.dumps({**fields, "created_at": fields["created_at"].isoformat()})
+
+
+def _from_json(raw: bytes | str) -> dict[str, Any]:
+    fields = json.loads(raw)
+    fields["created_at"] = datetime.datetime.fromisoformat(fields["created_at"])
+    return fields
+
+
+async def get_user_by_auth0_sub(db: AsyncSession, auth0_sub: str) -> User | None:
+    """Get the user for an Auth0 subject, from cache when possible.
+
+    Cached users are attached to `db` without a query, so they behave like any other
+    loaded row (relationships lazy-load as usual).
+    """
+    fields = _local_cache.get(auth0_sub)
+    if fields is None and redis_is_configured():
+        try:
+            raw = await get_redis_client().get(_redis_key(auth0_sub))
+        except RedisError:
+            LOGGER.warning("Identity cache unavailable", auth0_sub=auth0_sub)
+            raw = None
+        if raw is not None:
+            fields = _from_json(raw)
+            _local_cache.set(auth0_sub, fields)
+
+    if fields is not None:
+        user = User(**fields)
+        make_transient_to_detached(user)
+        return await db.merge(user, load=False)
+
+    user = await db.scalar(sa.select(User).where(User.auth0_sub == auth0_sub))
+    if user is not None:
+        await _cache_user(user)
+    return user
+
+
+async def _cache_user(user: User) -> None:
+    fields = _to_fields(user)
+    _local_cache.set(user.auth0_sub, fields)
+    if not redis_is_configured():
+        return
+    try:
+        await get_redis_client().set(
+            _redis_key(user.auth0_sub),
+            _to_json(fields),
+            ex=IDENTITY_REDIS_TTL_SECONDS,
+        )
+    except RedisError:
+        pass
+
+
+async def invalidate_user_identity(auth0_sub: str) -> None:
+    """Drop a subject's cached user from this worker and from Redis."""
+    _local_cache.pop(auth0_sub)
+    if not redis_is_configured():
+        return
+    try:
+        await get_redis_client().delete(_redis_key(auth0_sub))
+    except RedisError:
+        LOGGER.warning("Failed to invalidate cached identity", auth0_sub=auth0_sub)
+
+
+def clear_identity_cache() -> None:
+    """Drop every cached user from this worker (but not from Redis)."""
+    _local_cache.clear()
+
+
+@sa.event.listens_for(User, "after_update")
+@sa.event.listens_for(User, "after_delete")
+def _mark_stale_on_write(_mapper, _connection, user: User) -> None:
+    session = object_session(user)
+    if session is None:
+        return
+    # The subject itself may have changed (e.g. when linking an account), so
+    # invalidate both its old and new values
+    history = sa.inspect(user).attrs.auth0_sub.history
+    stale = session.info.setdefault(_STALE_IDENTITIES_KEY, set())
+    stale.update({user.auth0_sub, *history.deleted} - {None})
+
+
+@sa.event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    # Invalidating only once the write is visible prevents a concurrent request from
+    # re-caching the old row in between
+    stale = session.info.pop(_STALE_IDENTITIES_KEY, set())
+    if not stale:
+        return
+    for auth0_sub in stale:
+        _local_cache.pop(auth0_sub)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # Sync contexts (migrations, scripts) can only clear this process's cache
+        return
+    for auth0_sub in stale:
+        task = loop.create_task(invalidate_user_identity(auth0_sub))
+        _pending_invalidations.add(task)
+        task.add_done_callback(_pending_invalidations.discard)
+
+
+@sa.event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(_STALE_IDENTITIES_KEY, None)
@@ -1,10 +1,13 @@
 import math
 from datetime import datetime
-from typing import Generic, TypeVar
+from enum import StrEnum
+from typing import Annotated, Generic, TypeVar
 
-from pydantic import BaseModel, ConfigDict, computed_field
+import sqlalchemy as sa
+from pydantic import BaseModel, ConfigDict, Field, computed_field, field_validator
 
-from blanket.db.models import TaskPriority
+from blanket.api.pagination import CountStrategy
+from blanket.db.models import Task, TaskPriority
 
 
 class ApiModel(BaseModel):
@@ -16,19 +19,39 @@ DataT = TypeVar("DataT")
 
 class PaginatedBase(ApiModel, Generic[DataT]):
     items: list[DataT]
-    total: int
+    total: int | None
     page: int
     size: int
+    count_strategy: CountStrategy = CountStrategy.EXACT
+    """The strategy that produced `total` (and hence `num_pages`)."""
+    has_more: bool | None = None
+    """Whether another page exists, if known independently of `total`."""
 
     @computed_field
     def next_page(self) -> int | None:
+        if self.has_more is not None:
+            return self.page + 1 if self.has_more else None
+        if self.total is None:
+            return None
         return self.page + 1 if self.page * self.size < self.total else None
 
     @computed_field
-    def num_pages(self) -> int:
+    def num_pages(self) -> int | None:
+        if self.total is None:
+            return None
         return math.ceil(self.total / self.size) if self.size > 0 else 0
 
 
+class CursorPaginatedBase(ApiModel, Generic[DataT]):
+    items: list[DataT]
+    size: int
+    next_cursor: str | None
+
+    @computed_field
+    def has_more(self) -> bool:
+        return self.next_cursor is not None
+
+
 class TaskCreate(ApiModel):
     title: str
     description: str | None = None
@@ -50,7 +73,20 @@ class TaskRead(TaskBase):
 
 
 class TaskListItem(TaskBase):
-    pass
+    @classmethod
+    def columns(cls) -> list[sa.orm.InstrumentedAttribute]:
+        """The `Task` columns to select for `from_row`."""
+        return [getattr(Task, name) for name in cls.model_fields]
+
+    @classmethod
+    def from_row(cls, row: sa.Row) -> "TaskListItem":
+        """Build an item from a row of `columns()` without re-validating it.
+
+        Rows come straight from the database, so they already match the schema.
+        """
+        fields = row._asdict()
+        fields["priority"] = TaskPriority(fields["priority"])
+        return cls.model_construct(**fields)
 
 
 class TaskUpdate(ApiModel):
@@ -58,3 +94,51 @@ class TaskUpdate(ApiModel):
     description: str | None = None
     completed: bool | None = None
     priority: TaskPriority | None = None
+
+
+BULK_MAX_ITEMS = 5000
+"""The most tasks one bulk request may create, update or delete."""
+
+
+class TaskBulkCreate(ApiModel):
+    tasks: Annotated[list[TaskCreate], Field(min_length=1, max_length=BULK_MAX_ITEMS)]
+
+
+class TaskBulkUpdateItem(TaskUpdate):
+    id: int
+
+
+class TaskBulkUpdate(ApiModel):
+    tasks: Annotated[
+        list[TaskBulkUpdateItem], Field(min_length=1, max_length=BULK_MAX_ITEMS)
+    ]
+
+    @field_validator("tasks")
+    @classmethod
+    def check_unique_ids(cls, tasks: list[TaskBulkUpdateItem]):
+        if len({task.id for task in tasks}) != len(tasks):
+            raise ValueError("Each task may only be updated once per request")
+        return tasks
+
+
+class TaskBulkDelete(ApiModel):
+    ids: Annotated[list[int], Field(min_length=1, max_length=BULK_MAX_ITEMS)]
+
+
+class BulkResultStatus(StrEnum):
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+    NOT_FOUND = "not_found"
+
+
+class TaskBulkResult(ApiModel):
+    id: int
+    status: BulkResultStatus
+    task: TaskRead | None = None
+    """The task as written; omitted for deletions and missing tasks."""
+
+
+class TaskBulkResponse(ApiModel):
+    results: list[TaskBulkResult]
+    """One result per requested task, in request order."""
@@ -4,33 +4,104 @@ want to use FastAPI's router feature to split the routes into separate files. Th
 so it's perfectly alright to keep all routes in this file until it becomes unwieldy.
 """
 
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+from dataclasses import asdict
 from typing import Annotated
 
-import sqlalchemy as sa
-from fastapi import Depends, FastAPI, Query
+from fastapi import Depends, FastAPI, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from blanket.api.deps import _get_db, get_task
+from blanket.api.admission import AdmissionControlMiddleware, get_admission_stats
+from blanket.api.capture import CAPTURE_SAMPLE_RATE, TrafficCaptureMiddleware
+from blanket.api.deps import (
+    _get_db,
+    _get_read_db,
+    get_current_user,
+    get_task,
+    get_task_to_read,
+    get_user_db,
+    token_verifier,
+)
+from blanket.api.etags import (
+    bump_task_versions,
+    check_task_etag,
+    check_task_list_etag,
+)
+from blanket.api.export import ExportFormat, stream_tasks
 from blanket.api.interfaces import (
+    BulkResultStatus,
+    CursorPaginatedBase,
     PaginatedBase,
+    TaskBulkCreate,
+    TaskBulkDelete,
+    TaskBulkResponse,
+    TaskBulkResult,
+    TaskBulkUpdate,
     TaskCreate,
     TaskListItem,
     TaskRead,
     TaskUpdate,
 )
-from blanket.db.models import Task, TaskPriority
+from blanket.api.metrics import MetricsMiddleware, celery_queue_depth
+from blanket.api.pagination import (
+    CountStrategy,
+    KeysetCursor,
+    count_rows,
+    invalidate_cached_counts,
+)
+from blanket.api.replica import ReadYourWritesMiddleware
+from blanket.api.responses import model_response
+from blanket.api.task_queries import (
+    TaskFilters,
+    filtered_tasks,
+    task_export,
+    task_keyset_page,
+    task_page,
+)
+from blanket.api.timing import ServerTimingMiddleware
+from blanket.db.bulk import bulk_delete, bulk_insert, bulk_update
+from blanket.db.models import Task, TaskPriority, User
+from blanket.db.pool import get_pool_stats
 from blanket.io.env import BLANKET_ENV
+from blanket.io.http import close_http_client
 from blanket.io.log import safe_init_sentry
+from blanket.io.metrics import (
+    CONTENT_TYPE,
+    render_metrics,
+    start_metrics_writer,
+    stop_metrics_writer,
+)
 
 safe_init_sentry()
 
-APP_KWARGS = {}
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncGenerator[None, None]:
+    token_verifier.start_background_refresh()
+    start_metrics_writer()
+    yield
+    await token_verifier.stop_background_refresh()
+    await close_http_client()
+    stop_metrics_writer()
+
+
+APP_KWARGS = {"lifespan": lifespan}
 
 if BLANKET_ENV != "dev":
     APP_KWARGS["openapi_url"] = None
 
 app = FastAPI(**APP_KWARGS)
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(MetricsMiddleware)
+if CAPTURE_SAMPLE_RATE > 0:
+    app.add_middleware(TrafficCaptureMiddleware)
+# Added last, so it runs first and rejects excess load before any other work
+app.add_middleware(AdmissionControlMiddleware)
 
 if BLANKET_ENV == "dev":
     app.add_middleware(
@@ -43,55 +114,124 @@ if BLANKET_ENV == "dev":
 
 
 @app.get("/health")
-def health():
+async def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics for every process sharing `BLANKET_METRICS_DIR`."""
+    extra = [await celery_queue_depth()]
+    body = await run_in_threadpool(render_metrics, extra)
+    return Response(body, media_type=CONTENT_TYPE)
+
+
+@app.get("/metrics/pool", include_in_schema=False)
+async def pool_metrics():
+    """Database pool usage and checkout timings for the worker serving this request."""
+    return get_pool_stats()
+
+
+@app.get("/metrics/admission", include_in_schema=False)
+async def admission_metrics():
+    """Admission control counters for the worker serving this request."""
+    return asdict(get_admission_stats())
+
+
 @app.get(
     "/tasks",
-    response_model=PaginatedBase[TaskListItem],
+    response_model=PaginatedBase[TaskListItem] | CursorPaginatedBase[TaskListItem],
     operation_id="listTasks",
+    dependencies=[Depends(check_task_list_etag)],
 )
-def list_tasks(
-    db: Annotated[Session, Depends(_get_db)],
+async def list_tasks(
+    db: Annotated[AsyncSession, Depends(_get_read_db)],
+    response: Response,
     completed: bool | None = None,
     priority: TaskPriority | None = None,
     search: Annotated[str, Query()] | None = None,
     page: Annotated[int, Query(ge=1)] = 1,
     limit: Annotated[int, Query(ge=1, le=100)] = 50,
+    cursor: Annotated[str, Query()] | None = None,
+    count: CountStrategy = CountStrategy.EXACT,
 ):
-    query = sa.select(Task)
+    """List tasks, newest first.
 
-    if completed is not None:
-        query = query.where(Task.completed == completed)
+    By default, results are paginated by page number. Passing `cursor` switches to
+    keyset pagination: an empty cursor starts from the newest task, and each response's
+    `next_cursor` fetches the following page. Cursor pages cost the same at any depth.
 
-    if priority is not None:
-        query = query.where(Task.priority == priority)
+    Searches are ranked by relevance in page-number mode; cursor pages are always
+    ordered by recency.
 
-    if search is not None:
-        search_filter = f"%{search}%"
-        query = query.where(
-            sa.or_(
-                Task.title.ilike(search_filter),
-                Task.description.ilike(search_filter),
-            )
+    In page-number mode, `count` selects how `total` is computed; see `CountStrategy`.
+    `has_more` and `next_page` are exact regardless of the strategy.
+
+    Responses carry an ETag; a request whose `If-None-Match` is still current gets a
+    `304` without the list being queried. Lists may be read from the replica, in which
+    case they carry no ETag.
+    """
+    # Prebuilt per filter combination; selects only the listed columns, as plain rows
+    filters = TaskFilters(completed=completed, priority=priority, search=search)
+
+    if cursor is not None:
+        return model_response(
+            await _list_tasks_by_cursor(db, filters, cursor, limit), response
         )
 
-    # Get total count
-    count_query = sa.select(sa.func.count()).select_from(query.subquery())
-    total = db.execute(count_query).scalar() or 0
+    total = await count_rows(
+        db,
+        filtered_tasks(filters.shape),
+        count,
+        namespace=Task.__tablename__,
+        cache_key=f"{completed}:{priority}:{search}",
+        params=filters.params,
+    )
+
+    # Fetch one extra row to compute has_more
+    rows = (
+        await db.execute(
+            task_page(filters.shape),
+            {**filters.params, "offset": (page - 1) * limit, "limit": limit + 1},
+        )
+    ).all()
 
-    # Apply pagination and ordering
-    query = (
-        query.order_by(Task.created_at.desc()).offset((page - 1) * limit).limit(limit)
+    return model_response(
+        PaginatedBase[TaskListItem].model_construct(
+            items=[TaskListItem.from_row(row) for row in rows[:limit]],
+            total=total,
+            page=page,
+            size=limit,
+            count_strategy=count,
+            has_more=len(rows) > limit,
+        ),
+        response,
     )
-    tasks = db.execute(query).unique().scalars().all()
 
-    return PaginatedBase(
-        items=tasks,
-        total=total,
-        page=page,
+
+async def _list_tasks_by_cursor(
+    db: AsyncSession, filters: TaskFilters, cursor: str, limit: int
+) -> CursorPaginatedBase[TaskListItem]:
+    # Fetch one extra row to learn whether another page exists without counting
+    params = {**filters.params, "limit": limit + 1}
+    if cursor:
+        try:
+            position = KeysetCursor.decode(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        params.update(cursor_created_at=position.created_at, cursor_id=position.id)
+
+    query = task_keyset_page(filters.shape, after_cursor=bool(cursor))
+    rows = (await db.execute(query, params)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = KeysetCursor(created_at=rows[-1].created_at, id=rows[-1].id)
+
+    return CursorPaginatedBase[TaskListItem].model_construct(
+        items=[TaskListItem.from_row(row) for row in rows],
         size=limit,
+        next_cursor=next_cursor.encode() if next_cursor else None,
     )
 
 
@@ -100,22 +240,147 @@ def list_tasks(
     response_model=TaskRead,
     operation_id="createTask",
 )
-def create_task(task: TaskCreate, db: Annotated[Session, Depends(_get_db)]):
+async def create_task(task: TaskCreate, db: Annotated[AsyncSession, Depends(_get_db)]):
     db_task = Task(**task.model_dump())
     db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
+    await db.commit()
+    await db.refresh(db_task)
+    await invalidate_cached_counts(Task.__tablename__)
+    await bump_task_versions([db_task.id])
 
     return db_task
 
 
+# Declared before /tasks/{task_id} so that e.g. "bulk" isn't parsed as a task ID
+@app.get(
+    "/tasks/export",
+    response_class=StreamingResponse,
+    operation_id="exportTasks",
+)
+async def export_tasks(
+    db: Annotated[AsyncSession, Depends(_get_read_db)],
+    format: ExportFormat = ExportFormat.NDJSON,
+    completed: bool | None = None,
+    priority: TaskPriority | None = None,
+    search: Annotated[str, Query()] | None = None,
+):
+    """Stream every matching task, newest first, as NDJSON or CSV.
+
+    Takes the same filters as `GET /tasks`. The export is streamed from a server-side
+    cursor, so it's safe to request millions of rows.
+    """
+    filters = TaskFilters(completed=completed, priority=priority, search=search)
+    return StreamingResponse(
+        stream_tasks(db, task_export(filters.shape), format, filters.params),
+        media_type=format.media_type,
+        headers={"Content-Disposition": f'attachment; filename="tasks.{format}"'},
+    )
+
+
+@app.post(
+    "/tasks/bulk",
+    response_model=TaskBulkResponse,
+    operation_id="bulkCreateTasks",
+)
+async def bulk_create_tasks(
+    bulk: TaskBulkCreate,
+    db: Annotated[AsyncSession, Depends(get_user_db)],
+    user: Annotated[User, Depends(get_current_user)],
+):
+    """Create up to `BULK_MAX_ITEMS` tasks for the current user in one transaction.
+
+    Results are in request order.
+    """
+    rows = [{**task.model_dump(), "creator_id": user.id} for task in bulk.tasks]
+    tasks = await bulk_insert(db, Task, rows)
+    await db.commit()
+    await invalidate_cached_counts(Task.__tablename__)
+    await bump_task_versions([task.id for task in tasks])
+
+    return TaskBulkResponse(
+        results=[
+            TaskBulkResult(id=task.id, status=BulkResultStatus.CREATED, task=task)
+            for task in tasks
+        ]
+    )
+
+
+@app.patch(
+    "/tasks/bulk",
+    response_model=TaskBulkResponse,
+    operation_id="bulkUpdateTasks",
+)
+async def bulk_update_tasks(
+    bulk: TaskBulkUpdate, db: Annotated[AsyncSession, Depends(get_user_db)]
+):
+    """Apply a partial update to each of up to `BULK_MAX_ITEMS` of the current user's
+    tasks in one transaction.
+
+    Like `PATCH /tasks/{task_id}`, only the fields set on each item are changed. Items
+    whose task doesn't exist, or belongs to another user, are reported as `not_found`;
+    the rest are still applied.
+    """
+    changes = {
+        item.id: item.model_dump(exclude_unset=True, exclude={"id"})
+        for item in bulk.tasks
+    }
+    updated = await bulk_update(db, Task, changes)
+    await db.commit()
+    await invalidate_cached_counts(Task.__tablename__)
+    await bump_task_versions(updated)
+
+    return TaskBulkResponse(
+        results=[
+            TaskBulkResult(
+                id=item.id, status=BulkResultStatus.UPDATED, task=updated[item.id]
+            )
+            if item.id in updated
+            else TaskBulkResult(id=item.id, status=BulkResultStatus.NOT_FOUND)
+            for item in bulk.tasks
+        ]
+    )
+
+
+@app.delete(
+    "/tasks/bulk",
+    response_model=TaskBulkResponse,
+    operation_id="bulkDeleteTasks",
+)
+async def bulk_delete_tasks(
+    bulk: TaskBulkDelete, db: Annotated[AsyncSession, Depends(get_user_db)]
+):
+    """Delete up to `BULK_MAX_ITEMS` of the current user's tasks by ID in one transaction.
+
+    IDs that don't exist, or belong to another user, are reported as `not_found`.
+    """
+    deleted_tasks = await bulk_delete(db, Task, bulk.ids)
+    await db.commit()
+    await invalidate_cached_counts(Task.__tablename__)
+    deleted = {task.id for task in deleted_tasks}
+    await bump_task_versions(deleted)
+
+    return TaskBulkResponse(
+        results=[
+            TaskBulkResult(
+                id=task_id,
+                status=BulkResultStatus.DELETED
+                if task_id in deleted
+                else BulkResultStatus.NOT_FOUND,
+            )
+            for task_id in bulk.ids
+        ]
+    )
+
+
 @app.get(
     "/tasks/{task_id}",
     response_model=TaskRead,
     operation_id="readTask",
+    # Runs before get_task, so an unchanged task is never loaded
+    dependencies=[Depends(check_task_etag)],
 )
-def read_task(
-    task: Annotated[Task, Depends(get_task)],
+async def read_task(
+    task: Annotated[Task, Depends(get_task_to_read)],
 ):
     return task
 
@@ -125,18 +390,20 @@ def read_task(
     response_model=TaskRead,
     operation_id="updateTask",
 )
-def update_task(
+async def update_task(
     task_update: TaskUpdate,
     task: Annotated[Task, Depends(get_task)],
-    db: Annotated[Session, Depends(_get_db)],
+    db: Annotated[AsyncSession, Depends(_get_db)],
 ):
     update_fields = task_update.model_dump(exclude_unset=True)
 
     for field, value in update_fields.items():
         setattr(task, field, value)
 
-    db.commit()
-    db.refresh(task)
+    await db.commit()
+    await db.refresh(task)
+    await invalidate_cached_counts(Task.__tablename__)
+    await bump_task_versions([task.id])
 
     return task
 
@@ -146,9 +413,11 @@ def update_task(
     status_code=204,
     operation_id="deleteTask",
 )
-def delete_task(
+async def delete_task(
     task: Annotated[Task, Depends(get_task)],
-    db: Annotated[Session, Depends(_get_db)],
+    db: Annotated[AsyncSession, Depends(_get_db)],
 ):
-    db.delete(task)
-    db.commit()
+    await db.delete(task)
+    await db.commit()
+    await invalidate_cached_counts(Task.__tablename__)
+    await bump_task_versions([task.id])
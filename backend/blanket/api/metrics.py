@@ -0,0 +1,105 @@
+"""Metrics for the API: request latency, throughput and saturation.
+
+`MetricsMiddleware` records each request's latency by route template (e.g.
+`/tasks/{task_id}`, so task IDs don't each get a series) and the number in flight.
+Admission control's counters, database pool usage (blanket.db.pool) and Redis latency
+(blanket.db.redis) are reported alongside, and each scrape measures the Celery queue's
+depth. See blanket.io.metrics for how workers' metrics are combined.
+"""
+
+import time
+from dataclasses import asdict
+
+from redis.exceptions import RedisError
+from starlette.routing import BaseRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from blanket.api.admission import get_admission_stats
+from blanket.db.redis import get_redis_client, redis_is_configured
+from blanket.io.log import LOGGER
+from blanket.io.metrics import CallbackMetric, Counter, Gauge, Histogram, MetricFamily
+
+HTTP_REQUESTS = Counter(
+    "blanket_http_requests_total",
+    "Requests served, by route and status.",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "blanket_http_request_duration_seconds",
+    "Time from receiving a request to finishing its response.",
+    ["method", "route"],
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "blanket_http_requests_in_flight",
+    "Requests admitted and not yet responded to.",
+)
+
+CallbackMetric(
+    "blanket_admission_requests_total",
+    "Requests seen by admission control, by outcome (see AdmissionStats).",
+    "counter",
+    ["outcome"],
+    lambda: [
+        ((outcome,), count) for outcome, count in asdict(get_admission_stats()).items()
+    ],
+)
+
+# Celery's default queue, which blanket.jobs.celery sends every task to. (Importing
+# the Celery app here would require Redis to be configured.)
+CELERY_QUEUE = "celery"
+_UNMATCHED_ROUTE = "unmatched"
+
+
+def _route_template(scope: Scope) -> str:
+    route: BaseRoute | None = scope.get("route")
+    return getattr(route, "path", _UNMATCHED_ROUTE)
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels()
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_flight.dec()
+            # The router records the matched route in the scope
+            route = _route_template(scope)
+            method = scope["method"]
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
+            HTTP_REQUEST_SECONDS.labels(method, route).observe(
+                time.perf_counter() - started
+            )
+
+
+async def celery_queue_depth() -> MetricFamily:
+    """Tasks waiting in the Celery queue, read from the broker (if reachable)."""
+    family = MetricFamily(
+        name="blanket_celery_queue_depth",
+        type="gauge",
+        help="Tasks waiting in the Celery queue for a worker.",
+        label_names=("queue",),
+    )
+    if not redis_is_configured():
+        return family
+    try:
+        family.samples[(CELERY_QUEUE,)] = await get_redis_client().llen(CELERY_QUEUE)
+    except RedisError:
+        LOGGER.warning("Failed to read Celery queue depth", queue=CELERY_QUEUE)
+    return family
@@ -0,0 +1,186 @@
+"""Helpers for paginating list endpoints.
+
+Page-number pagination (`?page=N`) is simple but forces Postgres to scan and discard
+every row before the requested page. Keyset (cursor) pagination instead remembers the
+sort key of the last row returned and seeks past it through an index, so every page
+costs the same regardless of how deep into the result set it is.
+
+Page-number responses also carry a total, which on large tables can cost more than the
+page itself. `CountStrategy` lets each request or endpoint choose how that total is
+produced.
+"""
+
+import base64
+import binascii
+import datetime
+import functools
+import hashlib
+import json
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import Any
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from blanket.db.redis_cache import cached, invalidate_cache_tags
+from blanket.db.session import get_session_user
+
+CACHED_COUNT_TTL_SECONDS = 300
+
+
+@dataclass(frozen=True)
+class KeysetCursor:
+    """Position in a `(created_at DESC, id DESC)` ordering.
+
+    Cursors are serialized as URL-safe base64 so clients treat them as opaque tokens.
+    """
+
+    created_at: datetime.datetime
+    id: int
+
+    def encode(self) -> str:
+        payload = json.dumps([self.created_at.isoformat(), self.id]).encode()
+        return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, cursor: str) -> "KeysetCursor":
+        """Parse a cursor produced by `encode`. Raises ValueError if it is malformed."""
+        padded = cursor + "=" * (-len(cursor) % 4)
+        try:
+            created_at, id_ = json.loads(base64.urlsafe_b64decode(padded))
+            return cls(
+                created_at=datetime.datetime.fromisoformat(created_at),
+                id=int(id_),
+            )
+        except (binascii.Error, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+class CountStrategy(StrEnum):
+    """How a paginated response's `total` is computed."""
+
+    EXACT = "exact"
+    """Run `SELECT count(*)` over the filtered query."""
+    CACHED = "cached"
+    """Exact count, cached in Redis until the next write to the underlying table.
+
+    Cached per RLS user (see `blanket.db.session.set_session_user`), so users never see
+    each other's totals.
+    """
+    ESTIMATED = "estimated"
+    """Use the planner's row estimate; cheap, but may be off by a wide margin.
+
+    Unfiltered, it's the table's row count from its statistics: every user's rows,
+    regardless of RLS. Don't use it where the size of the whole table is sensitive.
+    """
+    NONE = "none"
+    """Skip counting entirely; clients should rely on `has_more`."""
+
+
+async def count_rows(
+    db: AsyncSession,
+    query: sa.Select,
+    strategy: CountStrategy,
+    *,
+    namespace: str,
+    cache_key: str,
+    params: dict[str, Any] | None = None,
+) -> int | None:
+    """Count the rows `query` would return using the given strategy.
+
+    Args:
+        db: The session to count with. Row-level security applies as usual.
+        query: The filtered (but not yet ordered or paginated) query.
+        strategy: The counting strategy to use.
+        namespace: The cache namespace for CACHED counts, typically the table name.
+            Call `invalidate_cached_counts` with the same namespace on writes.
+        cache_key: A string uniquely identifying the query's filters within the
+            namespace. CACHED counts are also keyed by the session's RLS user.
+        params: Values for the query's bind parameters.
+    """
+    params = params or {}
+    match strategy:
+        case CountStrategy.EXACT:
+            return await _exact_count(db, query, params)
+        case CountStrategy.CACHED:
+            return await _cached_count(
+                db, query, params, namespace=namespace, cache_key=cache_key
+            )
+        case CountStrategy.ESTIMATED:
+            return await _estimated_count(db, query.params(params))
+        case CountStrategy.NONE:
+            return None
+
+
+async def invalidate_cached_counts(namespace: str) -> None:
+    """Invalidate every cached count in the namespace."""
+    await invalidate_cache_tags(_count_tag(namespace))
+
+
+# Prebuilt queries (see blanket.api.task_queries) are reused across requests, so their
+# count statements can be too
+@functools.lru_cache(maxsize=128)
+def _count_statement(query: sa.Select) -> sa.Select:
+    return sa.select(sa.func.count()).select_from(query.subquery())
+
+
+async def _exact_count(
+    db: AsyncSession, query: sa.Select, params: dict[str, Any]
+) -> int:
+    return (await db.execute(_count_statement(query), params)).scalar() or 0
+
+
+def _count_tag(namespace: str) -> str:
+    return f"count:{namespace}"
+
+
+def _count_cache_key(db: AsyncSession, namespace: str, cache_key: str) -> str:
+    # Counts run under RLS, so each user's are their own
+    user_id = get_session_user(db)
+    principal = "anonymous" if user_id is None else f"user-{user_id}"
+    digest = hashlib.sha256(cache_key.encode()).hexdigest()
+    return f"{namespace}:{principal}:{digest}"
+
+
+@cached(
+    ttl=CACHED_COUNT_TTL_SECONDS,
+    key=lambda db, *_, namespace, cache_key: _count_cache_key(db, namespace, cache_key),
+    tags=lambda *_, namespace, cache_key: [_count_tag(namespace)],
+    namespace="count",
+)
+async def _cached_count(
+    db: AsyncSession,
+    query: sa.Select,
+    params: dict[str, Any],
+    *,
+    namespace: str,
+    cache_key: str,
+) -> int:
+    return await _exact_count(db, query, params)
+
+
+async def _estimated_count(db: AsyncSession, query: sa.Select) -> int:
+    froms = query.get_final_froms()
+    if query.whereclause is None and len(froms) == 1 and isinstance(froms[0], sa.Table):
+        # Unfiltered: read the table's statistics directly without planning anything
+        reltuples = await db.scalar(
+            sa.text(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:t AS regclass)"
+            ),
+            {"t": froms[0].fullname},
+        )
+        # reltuples is -1 until the table has been vacuumed or analyzed
+        if reltuples is not None and reltuples >= 0:
+            return reltuples
+
+    compiled = query.compile(
+        dialect=db.get_bind().dialect,
+        compile_kwargs={"literal_binds": True},
+    )
+    # Executed as raw SQL so that colons in literal search terms aren't read as binds
+    conn = await db.connection()
+    plan = (await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
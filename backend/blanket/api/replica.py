@@ -0,0 +1,71 @@
+"""Routing reads to the read replica, when one is configured.
+
+Read-only routes take their session from `deps._get_read_db`, which uses the replica
+unless:
+
+- the replica lags the primary by more than `PG_REPLICA_MAX_LAG_SECONDS`, or can't be
+  reached; or
+- the client wrote recently. `ReadYourWritesMiddleware` marks clients that made a
+  successful write with a cookie, which lasts as long as the replica may lag, so they
+  read from the primary until the replica has caught up with their write.
+
+Stickiness follows the client rather than the user, since the read routes that use the
+replica don't authenticate. So a user's other clients (say, a second browser) may not
+see their writes on the next read for up to `PG_REPLICA_MAX_LAG_SECONDS`, and neither
+may clients that don't keep cookies (e.g. scripts).
+"""
+
+import math
+
+from fastapi import Request
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from blanket.db.session import (
+    PG_REPLICA_LAG_CHECK_INTERVAL_SECONDS,
+    PG_REPLICA_MAX_LAG_SECONDS,
+    get_replica_lag,
+    replica_is_configured,
+)
+
+READ_PRIMARY_COOKIE = "blanket_read_primary"
+# Lag is measured periodically, so it may have grown by up to one interval since
+READ_PRIMARY_SECONDS = math.ceil(
+    PG_REPLICA_MAX_LAG_SECONDS + PG_REPLICA_LAG_CHECK_INTERVAL_SECONDS
+)
+_SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+async def should_read_from_replica(request: Request) -> bool:
+    if not replica_is_configured() or READ_PRIMARY_COOKIE in request.cookies:
+        return False
+    lag = await get_replica_lag()
+    return lag is not None and lag <= PG_REPLICA_MAX_LAG_SECONDS
+
+
+class ReadYourWritesMiddleware:
+    """Sends clients to the primary for a while after each successful write."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] in _SAFE_METHODS
+            or not replica_is_configured()
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "set-cookie",
+                    f"{READ_PRIMARY_COOKIE}=1; Max-Age={READ_PRIMARY_SECONDS}; "
+                    "Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
@@ -0,0 +1,116 @@
+"""Prebuilt statements for the task list, keyed by which filters a request uses.
+
+Building a `select` per request costs Python time twice: constructing the statement,
+then walking it to compute the cache key SQLAlchemy looks its compiled SQL up by.
+There are only a handful of filter combinations, so each statement here is built once
+per combination, with the filter values left as bind parameters. Reusing the same
+statement object also reuses its memoized cache key, and produces the same SQL string
+every time, so asyncpg's per-connection prepared statement cache gets hits too.
+
+Execute statements with the parameters from `TaskFilters.params` (plus the paging
+parameters each statement documents).
+"""
+
+import functools
+from dataclasses import dataclass
+from typing import Any
+
+import sqlalchemy as sa
+
+from blanket.api.interfaces import TaskListItem
+from blanket.db.models import Task, TaskPriority
+from blanket.db.search import task_search_filter, task_search_params, task_search_rank
+
+
+@dataclass(frozen=True)
+class TaskFilterShape:
+    """Which filters a task query applies, regardless of their values."""
+
+    completed: bool
+    priority: bool
+    search: bool
+
+
+@dataclass(frozen=True)
+class TaskFilters:
+    completed: bool | None = None
+    priority: TaskPriority | None = None
+    search: str | None = None
+
+    @property
+    def shape(self) -> TaskFilterShape:
+        return TaskFilterShape(
+            completed=self.completed is not None,
+            priority=self.priority is not None,
+            search=self.search is not None,
+        )
+
+    @property
+    def params(self) -> dict[str, Any]:
+        params: dict[str, Any] = {}
+        if self.completed is not None:
+            params["completed"] = self.completed
+        if self.priority is not None:
+            params["priority"] = self.priority
+        if self.search is not None:
+            params.update(task_search_params(self.search))
+        return params
+
+
+def _recency() -> tuple[sa.ColumnElement, ...]:
+    return Task.created_at.desc(), Task.id.desc()
+
+
+@functools.cache
+def filtered_tasks(shape: TaskFilterShape) -> sa.Select:
+    """`TaskListItem.columns()` of the matching tasks, unordered, e.g. for counting."""
+    query = sa.select(*TaskListItem.columns())
+    if shape.completed:
+        query = query.where(Task.completed == sa.bindparam("completed"))
+    if shape.priority:
+        query = query.where(Task.priority == sa.bindparam("priority"))
+    if shape.search:
+        query = query.where(task_search_filter())
+    return query
+
+
+@functools.cache
+def task_page(shape: TaskFilterShape) -> sa.Select:
+    """A page of matching tasks by page number.
+
+    Searches are ranked by relevance, then recency; other lists by recency alone.
+    Takes `offset` and `limit` parameters.
+    """
+    query = filtered_tasks(shape)
+    if shape.search:
+        query = query.order_by(task_search_rank().desc())
+    return (
+        query.order_by(*_recency())
+        .offset(sa.bindparam("offset", type_=sa.Integer))
+        .limit(sa.bindparam("limit", type_=sa.Integer))
+    )
+
+
+@functools.cache
+def task_keyset_page(shape: TaskFilterShape, after_cursor: bool) -> sa.Select:
+    """A page of matching tasks, newest first, for keyset pagination.
+
+    Takes a `limit` parameter and, if `after_cursor`, the cursor position as
+    `cursor_created_at` and `cursor_id`.
+    """
+    query = filtered_tasks(shape)
+    if after_cursor:
+        query = query.where(
+            sa.tuple_(Task.created_at, Task.id)
+            < sa.tuple_(
+                sa.bindparam("cursor_created_at", type_=Task.created_at.type),
+                sa.bindparam("cursor_id", type_=sa.Integer),
+            )
+        )
+    return query.order_by(*_recency()).limit(sa.bindparam("limit", type_=sa.Integer))
+
+
+@functools.cache
+def task_export(shape: TaskFilterShape) -> sa.Select:
+    """Every matching task, newest first."""
+    return filtered_tasks(shape).order_by(*_recency())
@@ -0,0 +1,93 @@
+"""Per-request performance breakdowns, as `Server-Timing` headers and log fields.
+
+Each response carries a `Server-Timing` header (shown in browsers' network panels)
+with the time spent on database queries, waiting for a pool connection, and each
+`timing_phase` (auth, RLS setup, serialization), plus the total up to the response
+headers. The same numbers are logged when the request completes, and every log line
+emitted during the request carries its method and path.
+
+In dev, statements that run many times in one request are logged as possible N+1
+queries.
+
+Streaming responses send their headers before the body is produced, so their
+`Server-Timing` covers only the work done before streaming started.
+"""
+
+import time
+
+import structlog
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from blanket.io.env import BLANKET_ENV
+from blanket.io.log import LOGGER
+from blanket.io.timing import RequestTimings, track_request_timings
+
+N_PLUS_ONE_THRESHOLD = 5
+"""Runs of one statement within a request that suggest an N+1 query pattern."""
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+
+def server_timing_header(timings: RequestTimings, total_s: float) -> str:
+    metrics = [
+        f'db;dur={_ms(timings.db_s)};desc="{timings.db_queries} queries"',
+        f"pool;dur={_ms(timings.pool_wait_s)}",
+        *(f"{name};dur={_ms(seconds)}" for name, seconds in timings.phases.items()),
+        f"app;dur={_ms(total_s)}",
+    ]
+    return ", ".join(metrics)
+
+
+class ServerTimingMiddleware:
+    def __init__(self, app: ASGIApp, *, detect_n_plus_one: bool = BLANKET_ENV == "dev"):
+        self.app = app
+        self.detect_n_plus_one = detect_n_plus_one
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status: int | None = None
+        with (
+            track_request_timings(track_statements=self.detect_n_plus_one) as timings,
+            structlog.contextvars.bound_contextvars(
+                method=scope["method"], path=scope["path"]
+            ),
+        ):
+
+            async def send_with_timing(message: Message) -> None:
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    elapsed = time.perf_counter() - started
+                    headers = MutableHeaders(scope=message)
+                    headers.append(
+                        "server-timing", server_timing_header(timings, elapsed)
+                    )
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                self._log(timings, status, time.perf_counter() - started)
+
+    def _log(self, timings: RequestTimings, status: int | None, total_s: float) -> None:
+        LOGGER.info(
+            "Request completed",
+            status=status,
+            duration_ms=_ms(total_s),
+            db_ms=_ms(timings.db_s),
+            db_queries=timings.db_queries,
+            pool_wait_ms=_ms(timings.pool_wait_s),
+            **{f"{name}_ms": _ms(seconds) for name, seconds in timings.phases.items()},
+        )
+        if timings.statements is None:
+            return
+        for statement, count in timings.statements.items():
+            if count >= N_PLUS_ONE_THRESHOLD:
+                LOGGER.warning("Possible N+1 query", statement=statement, count=count)
@@ -0,0 +1,169 @@
+"""Fast-path verification of Auth0 access tokens.
+
+`fastapi_auth0` verifies a bearer token's signature and claims on every request.
+Clients tend to send the same token thousands of times, so `TokenVerifier` caches the
+verified claims keyed by a hash of the token until the token's `exp`, and keeps Auth0's
+signing keys (JWKS) in memory, refreshed in the background.
+
+Anything the fast path can't positively accept (bad signature, expired token, unknown
+key, missing scope, ...) is handed to `fastapi_auth0`, so error responses are unchanged.
+The fast path follows the `Auth0` object's settings: its algorithms, user model, and
+scope and email checks.
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import time
+from typing import Annotated, Any
+
+import httpx
+from fastapi import Depends
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer, SecurityScopes
+from fastapi_auth0 import Auth0, Auth0User
+from jose import jwt
+from pydantic import ValidationError
+
+from blanket.io.cache import SingleFlight, TTLCache
+from blanket.io.http import get_http_client
+from blanket.io.log import LOGGER
+from blanket.io.timing import timing_phase
+
+CLAIMS_CACHE_MAX_SIZE = 10_000
+CLAIMS_CACHE_MAX_TTL_SECONDS = 3600
+JWKS_REFRESH_INTERVAL_SECONDS = 600
+JWKS_MIN_REFETCH_INTERVAL_SECONDS = 30
+"""Unknown key IDs trigger a refetch (keys may have rotated), at most this often."""
+
+
+class JwksCache:
+    """Auth0's JSON Web Key Set, indexed by key ID."""
+
+    def __init__(self, jwks_url: str):
+        self.jwks_url = jwks_url
+        self._keys: dict[str, dict[str, Any]] = {}
+        self._fetched_at = float("-inf")
+        self._flights: SingleFlight[str, None] = SingleFlight()
+
+    async def get_key(self, kid: str) -> dict[str, Any] | None:
+        if kid not in self._keys and (
+            time.monotonic() - self._fetched_at > JWKS_MIN_REFETCH_INTERVAL_SECONDS
+        ):
+            await self.refresh()
+        return self._keys.get(kid)
+
+    async def refresh(self) -> None:
+        await self._flights.do(self.jwks_url, self._fetch)
+
+    async def _fetch(self) -> None:
+        # Record the attempt up front so failures are also rate-limited
+        self._fetched_at = time.monotonic()
+        response = await get_http_client().get(self.jwks_url)
+        response.raise_for_status()
+        self._keys = {key["kid"]: key for key in response.json()["keys"]}
+
+    async def refresh_periodically(self, interval: float) -> None:
+        """Refresh the keys every `interval` seconds until cancelled."""
+        while True:
+            try:
+                await self.refresh()
+            except httpx.HTTPError:
+                LOGGER.warning("Failed to refresh JWKS", jwks_url=self.jwks_url)
+            await asyncio.sleep(interval)
+
+
+class TokenVerifier:
+    """A drop-in replacement for `Auth0.get_user` that caches verified claims."""
+
+    def __init__(self, auth: Auth0):
+        self.auth = auth
+        self.jwks = JwksCache(f"https://{auth.domain}/.well-known/jwks.json")
+        self._claims_cache: TTLCache[str, dict[str, Any]] = TTLCache(
+            maxsize=CLAIMS_CACHE_MAX_SIZE, ttl=CLAIMS_CACHE_MAX_TTL_SECONDS
+        )
+        self._refresh_task: asyncio.Task | None = None
+
+    async def get_user(
+        self,
+        security_scopes: SecurityScopes,
+        creds: Annotated[
+            HTTPAuthorizationCredentials | None, Depends(HTTPBearer(auto_error=False))
+        ],
+    ) -> Auth0User | None:
+        """Verify the bearer token and return its user.
+
+        Use within `Security()`, like `Auth0.get_user`.
+        """
+        with timing_phase("auth"):
+            if creds is not None:
+                claims = await self._get_verified_claims(creds.credentials)
+                if claims is not None:
+                    user = self._user_from_claims(claims, security_scopes)
+                    if user is not None:
+                        return user
+            return await self.auth.get_user(security_scopes, creds)
+
+    def _user_from_claims(
+        self, claims: dict[str, Any], security_scopes: SecurityScopes
+    ) -> Auth0User | None:
+        """The user for verified `claims`, if `auth` would accept them as they are."""
+        if self.auth.scope_auto_error and not self._has_scopes(claims, security_scopes):
+            return None
+        try:
+            user = self.auth.auth0_user_model(**claims)
+        except ValidationError:
+            return None
+        if self.auth.email_auto_error and not user.email:
+            return None
+        return user
+
+    async def _get_verified_claims(self, token: str) -> dict[str, Any] | None:
+        cache_key = hashlib.sha256(token.encode()).hexdigest()
+        if (claims := self._claims_cache.get(cache_key)) is not None:
+            return claims
+
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+            key = await self.jwks.get_key(kid) if kid else None
+            if key is None:
+                return None
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=self.auth.algorithms,
+                audience=self.auth.audience,
+                issuer=f"https://{self.auth.domain}/",
+            )
+        except (jwt.JWTError, httpx.HTTPError):
+            return None
+
+        # Tokens without an expiry are verified every time rather than cached
+        exp = claims.get("exp")
+        ttl = min(exp - time.time(), CLAIMS_CACHE_MAX_TTL_SECONDS) if exp else 0
+        if ttl > 0:
+            self._claims_cache.set(cache_key, claims, ttl=ttl)
+        return claims
+
+    @staticmethod
+    def _has_scopes(claims: dict[str, Any], security_scopes: SecurityScopes) -> bool:
+        token_scopes = claims.get("scope", "")
+        if not isinstance(token_scopes, str):
+            return False
+        return set(security_scopes.scopes) <= set(token_scopes.split())
+
+    def start_background_refresh(
+        self, interval: float = JWKS_REFRESH_INTERVAL_SECONDS
+    ) -> None:
+        """Keep the signing keys fresh so key fetches stay off the request path."""
+        if self._refresh_task is None and self.auth.domain:
+            self._refresh_task = asyncio.create_task(
+                self.jwks.refresh_periodically(interval)
+            )
+
+    async def stop_background_refresh(self) -> None:
+        if self._refresh_task is None:
+            return
+        self._refresh_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._refresh_task
+        self._refresh_task = None
@@ -0,0 +1,48 @@
+"""Cached lookups against Auth0's /userinfo endpoint.
+
+/userinfo is a network round trip to Auth0 (and is rate limited), so results are cached
+per token subject, and concurrent lookups for the same subject share one request.
+"""
+
+from typing import Any
+
+from blanket.io.cache import SingleFlight, TTLCache
+from blanket.io.http import get_http_client
+
+USERINFO_CACHE_TTL_SECONDS = 300
+USERINFO_CACHE_MAX_SIZE = 10_000
+
+_userinfo_cache: TTLCache[str, dict[str, Any]] = TTLCache(
+    maxsize=USERINFO_CACHE_MAX_SIZE, ttl=USERINFO_CACHE_TTL_SECONDS
+)
+_userinfo_flights: SingleFlight[str, dict[str, Any]] = SingleFlight()
+
+
+async def fetch_userinfo(userinfo_url: str, token: str, subject: str) -> dict[str, Any]:
+    """Get the userinfo for a token, cached by the token's subject.
+
+    Args:
+        userinfo_url: The identity provider's userinfo endpoint.
+        token: The bearer token to authenticate the lookup with.
+        subject: The token's `sub` claim, used as the cache key.
+
+    Raises:
+        httpx.HTTPError: If the lookup fails. Failures are not cached.
+    """
+    if (userinfo := _userinfo_cache.get(subject)) is not None:
+        return userinfo
+
+    async def lookup() -> dict[str, Any]:
+        response = await get_http_client().get(
+            userinfo_url, headers={"Authorization": f"Bearer {token}"}
+        )
+        response.raise_for_status()
+        userinfo = response.json()
+        _userinfo_cache.set(subject, userinfo)
+        return userinfo
+
+    return await _userinfo_flights.do(subject, lookup)
+
+
+def clear_userinfo_cache() -> None:
+    _userinfo_cache.clear()
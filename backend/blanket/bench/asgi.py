@@ -0,0 +1,215 @@
+"""An open-loop load generator that drives the ASGI app in-process.
+
+Requests go straight to the app through httpx's ASGI transport, on the same event loop,
+with no server, proxy or network in between. What's left is the app's own behavior
+under concurrency: event loop stalls from blocking calls, contention for the database
+pool, and serialization overhead.
+
+Arrivals are open-loop: requests start on a schedule (Poisson or evenly spaced at
+`rate` per second), whether or not earlier ones have finished, so a slow app builds up
+thousands of requests in flight as real traffic would. Latency is measured from each
+request's scheduled start, so time spent waiting for the loop to get around to sending
+it counts too; a closed-loop driver (like blanket.bench.http) would hide that
+("coordinated omission").
+
+A `LoopLagMonitor` runs alongside, reporting stalls with stack samples.
+"""
+
+import asyncio
+import collections
+import contextlib
+import importlib
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import httpx
+from starlette.types import ASGIApp
+
+from blanket.bench.histogram import LatencyHistogram
+from blanket.bench.loop_lag import LoopLagMonitor
+
+
+@dataclass(frozen=True)
+class RequestSpec:
+    method: str
+    path: str
+    weight: float = 1.0
+    body: Any = None
+    """Sent as JSON, if set."""
+    name: str | None = None
+
+    @property
+    def label(self) -> str:
+        return self.name or f"{self.method} {self.path}"
+
+    @classmethod
+    def parse(cls, text: str) -> "RequestSpec":
+        """Parse `[WEIGHT*]METHOD PATH`, e.g. `GET /tasks` or `3*GET /tasks?page=2`."""
+        weight = 1.0
+        if "*" in text.split(" ", 1)[0]:
+            raw_weight, text = text.split("*", 1)
+            weight = float(raw_weight)
+        method, _, path = text.strip().partition(" ")
+        if not path:
+            raise ValueError(f"Expected 'METHOD PATH', got {text!r}")
+        return cls(method=method.upper(), path=path.strip(), weight=weight)
+
+
+def load_request_mix(path: Path) -> list[RequestSpec]:
+    """Read a JSON list of `{"method", "path", "weight"?, "body"?, "name"?}` objects."""
+    return [
+        RequestSpec(
+            method=item["method"].upper(),
+            path=item["path"],
+            weight=item.get("weight", 1.0),
+            body=item.get("body"),
+            name=item.get("name"),
+        )
+        for item in json.loads(path.read_text())
+    ]
+
+
+def import_app(import_string: str) -> ASGIApp:
+    """Import an app from a `module:attribute` string, as uvicorn does."""
+    module_name, _, attribute = import_string.partition(":")
+    return getattr(importlib.import_module(module_name), attribute or "app")
+
+
+@dataclass
+class AsgiLoadReport:
+    rate: float
+    duration_s: float = 0.0
+    scheduled: int = 0
+    completed: int = 0
+    errors: int = 0
+    dropped: int = 0
+    """Arrivals not sent because `max_in_flight` requests were already in flight."""
+    peak_in_flight: int = 0
+    statuses: collections.Counter[str] = field(default_factory=collections.Counter)
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    latency_by_request: dict[str, LatencyHistogram] = field(default_factory=dict)
+    event_loop: dict[str, Any] = field(default_factory=dict)
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "target_rate": self.rate,
+            "achieved_rate": round(self.completed / self.duration_s, 1)
+            if self.duration_s
+            else 0.0,
+            "duration_s": round(self.duration_s, 3),
+            "scheduled": self.scheduled,
+            "completed": self.completed,
+            "errors": self.errors,
+            "dropped": self.dropped,
+            "peak_in_flight": self.peak_in_flight,
+            "statuses": dict(self.statuses),
+            "latency": {**self.latency.summary(), "buckets": self.latency.buckets()},
+            "latency_by_request": {
+                label: {**histogram.summary(), "buckets": histogram.buckets()}
+                for label, histogram in self.latency_by_request.items()
+            },
+            "event_loop": self.event_loop,
+        }
+
+
+def _lifespan(app: ASGIApp) -> contextlib.AbstractAsyncContextManager:
+    # The ASGI transport doesn't send lifespan events, so run the app's directly
+    router = getattr(app, "router", None)
+    if lifespan_context := getattr(router, "lifespan_context", None):
+        return lifespan_context(app)
+    return contextlib.nullcontext()
+
+
+async def run_asgi_load(
+    app: ASGIApp,
+    mix: list[RequestSpec],
+    *,
+    rate: float,
+    duration: float,
+    poisson: bool = True,
+    max_in_flight: int = 10_000,
+    headers: dict[str, str] | None = None,
+    timeout: float = 30.0,
+    stall_threshold_ms: float = 50.0,
+    seed: int | None = None,
+) -> AsgiLoadReport:
+    """Send requests from `mix` to `app` at `rate` per second for `duration` seconds.
+
+    Args:
+        app: The ASGI app; its lifespan runs around the load.
+        mix: Requests to pick from at random, in proportion to their weights.
+        rate: Mean arrivals per second.
+        duration: Seconds to schedule arrivals for; in-flight requests then finish.
+        poisson: Space arrivals randomly (as independent clients would) rather than
+            evenly.
+        max_in_flight: Arrivals beyond this many in-flight requests are dropped and
+            counted, rather than sent.
+        headers: Headers to send with every request (e.g. Authorization).
+        timeout: Per-request timeout in seconds; timeouts count as errors, as do
+            exceptions the app raises.
+        stall_threshold_ms: Event loop stalls longer than this are reported.
+        seed: Seeds the arrival times and request choices, for repeatable runs.
+    """
+    rng = random.Random(seed)
+    weights = [spec.weight for spec in mix]
+    report = AsgiLoadReport(rate=rate)
+    for spec in mix:
+        report.latency_by_request.setdefault(spec.label, LatencyHistogram())
+    in_flight: set[asyncio.Task] = set()
+
+    async with (
+        _lifespan(app),
+        httpx.AsyncClient(
+            # Exceptions the app raises become 500s, as a server would send
+            transport=httpx.ASGITransport(app=app, raise_app_exceptions=False),
+            base_url="http://bench",
+            headers=headers,
+            timeout=timeout,
+        ) as client,
+        LoopLagMonitor(stall_threshold_ms=stall_threshold_ms) as monitor,
+    ):
+
+        async def send(spec: RequestSpec, scheduled_at: float) -> None:
+            try:
+                response = await client.request(spec.method, spec.path, json=spec.body)
+                status = str(response.status_code)
+                failed = response.status_code >= 500
+            except Exception as e:
+                # Any failure is a result to report; raising would lose the run
+                status = type(e).__name__
+                failed = True
+            elapsed_ms = (time.perf_counter() - scheduled_at) * 1000
+            report.completed += 1
+            report.errors += failed
+            report.statuses[status] += 1
+            report.latency.record(elapsed_ms)
+            report.latency_by_request[spec.label].record(elapsed_ms)
+
+        started = time.perf_counter()
+        deadline = started + duration
+        next_at = started
+        while next_at < deadline:
+            if (delay := next_at - time.perf_counter()) > 0:
+                await asyncio.sleep(delay)
+            # If the loop fell behind, this catches up on every overdue arrival
+            # immediately; each still counts its latency from when it was due
+            spec = rng.choices(mix, weights)[0]
+            report.scheduled += 1
+            if len(in_flight) >= max_in_flight:
+                report.dropped += 1
+            else:
+                task = asyncio.create_task(send(spec, next_at))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+                report.peak_in_flight = max(report.peak_in_flight, len(in_flight))
+            next_at += rng.expovariate(rate) if poisson else 1 / rate
+
+        await asyncio.gather(*in_flight)
+        report.duration_s = time.perf_counter() - started
+
+    report.event_loop = monitor.summary()
+    return report
@@ -0,0 +1,702 @@
+"""Benchmarking CLI commands."""
+
+import asyncio
+import datetime
+import json
+import logging
+from pathlib import Path
+from typing import Any
+
+from rich.console import Console
+from rich.table import Table
+
+import blanket.io.click as click
+from blanket.bench.asgi import (
+    RequestSpec,
+    import_app,
+    load_request_mix,
+    run_asgi_load,
+)
+from blanket.bench.http import run_http_load
+from blanket.bench.replay import (
+    DIFFED_PERCENTILES,
+    ReplayOptions,
+    default_vocabulary,
+    diff_replay_reports,
+    load_capture,
+    replay_capture,
+)
+from blanket.bench.rls import (
+    explain_rls_queries,
+    get_busiest_creator_id,
+    run_rls_context_benchmark,
+    seed_rls_tasks,
+)
+from blanket.bench.serialization import run_serialization_benchmark
+from blanket.bench.statements import run_statement_benchmark
+from blanket.bench.suite import (
+    DEFAULT_COMPARED_METRICS,
+    SUITE_SCENARIOS,
+    Regression,
+    compare_to_baseline,
+    run_suite,
+    seed_suite_data,
+)
+from blanket.io.env import BLANKET_ENV
+
+console = Console()
+
+DEFAULT_HTTP_PATHS = (
+    "/tasks",
+    "/tasks?page=5",
+    "/tasks?completed=false&priority=HIGH",
+    "/tasks?search=report",
+)
+
+
+def print_summary(title: str, summary: dict[str, float | int]) -> None:
+    table = Table(title=title)
+    table.add_column("Metric")
+    table.add_column("Value", justify="right")
+    for key, value in summary.items():
+        table.add_row(key, str(value))
+    console.print(table)
+
+
+@click.group()
+def bench():
+    """Performance benchmarks for the API and database."""
+    pass
+
+
+@bench.command()
+@click.option(
+    "--url",
+    default="http://localhost:80",
+    help="Base URL of the running API (e.g. the docker-compose gunicorn service)",
+)
+@click.option(
+    "--path",
+    "paths",
+    multiple=True,
+    default=DEFAULT_HTTP_PATHS,
+    help="Request path to cycle through; repeat for a mix",
+)
+@click.option("--concurrency", "-c", default=64, help="Concurrent in-flight requests")
+@click.option("--duration", "-d", default=30.0, help="Seconds to generate load for")
+@click.option(
+    "--header",
+    "-H",
+    "raw_headers",
+    multiple=True,
+    help="Extra header as 'Name: value'; repeatable",
+)
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Write the summary as JSON to this file",
+)
+def http(
+    url: str,
+    paths: tuple[str, ...],
+    concurrency: int,
+    duration: float,
+    raw_headers: tuple[str, ...],
+    output: Path | None,
+):
+    """Measure requests/sec and latency percentiles against a running API.
+
+    To compare two builds, run this against each under the same deployment (e.g.
+    `docker compose up api`) with `--output`, then compare the JSON files.
+    """
+    headers = {
+        name.strip(): value.strip()
+        for name, value in (h.split(":", 1) for h in raw_headers)
+    }
+    console.print(
+        f"[cyan]Running {concurrency} concurrent clients against {url} "
+        f"for {duration:g}s...[/cyan]"
+    )
+    report = asyncio.run(
+        run_http_load(
+            url,
+            list(paths),
+            concurrency=concurrency,
+            duration=duration,
+            headers=headers,
+        )
+    )
+    summary = report.summary()
+    print_summary(f"HTTP load: {url}", summary)
+    if output:
+        output.write_text(json.dumps(summary, indent=2))
+        console.print(f"[green]Wrote summary to {output}[/green]")
+
+
+@bench.command()
+@click.option(
+    "--app",
+    "app_path",
+    default="blanket.api.main:app",
+    help="ASGI app to load, as module:attribute",
+)
+@click.option(
+    "--request",
+    "raw_requests",
+    multiple=True,
+    default=[f"GET {path}" for path in DEFAULT_HTTP_PATHS],
+    help="Request in the mix, as '[WEIGHT*]METHOD PATH'; repeatable",
+)
+@click.option(
+    "--mix-file",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="JSON list of requests (method, path, weight, body, name); replaces --request",
+)
+@click.option("--rate", "-r", default=500.0, help="Mean request arrivals per second")
+@click.option("--duration", "-d", default=30.0, help="Seconds to schedule arrivals for")
+@click.option(
+    "--arrivals",
+    type=click.Choice(["poisson", "uniform"]),
+    default="poisson",
+    help="How arrivals are spaced",
+)
+@click.option(
+    "--max-in-flight",
+    default=10_000,
+    help="Drop arrivals beyond this many requests in flight",
+)
+@click.option(
+    "--stall-threshold-ms",
+    default=50.0,
+    help="Report event loop stalls longer than this, with stack samples",
+)
+@click.option(
+    "--header",
+    "-H",
+    "raw_headers",
+    multiple=True,
+    help="Extra header as 'Name: value'; repeatable",
+)
+@click.option("--seed", type=int, help="Seed for repeatable arrivals and choices")
+@click.option("--app-logs", is_flag=True, help="Keep the app's per-request logs")
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Write the report, with latency histograms and stalls, as JSON",
+)
+def asgi(
+    app_path: str,
+    raw_requests: tuple[str, ...],
+    mix_file: Path | None,
+    rate: float,
+    duration: float,
+    arrivals: str,
+    max_in_flight: int,
+    stall_threshold_ms: float,
+    raw_headers: tuple[str, ...],
+    seed: int | None,
+    app_logs: bool,
+    output: Path | None,
+):
+    """Drive the ASGI app in-process with open-loop load, and watch its event loop.
+
+    No server is involved: requests go straight to the app on this process' event
+    loop, which isolates the app's own behavior (blocking calls, pool contention,
+    serialization). The app uses the configured database and Redis as usual.
+    """
+    try:
+        mix = (
+            load_request_mix(mix_file)
+            if mix_file
+            else [RequestSpec.parse(raw) for raw in raw_requests]
+        )
+    except (ValueError, KeyError) as e:
+        raise click.BadParameter(str(e)) from e
+    headers = {
+        name.strip(): value.strip()
+        for name, value in (h.split(":", 1) for h in raw_headers)
+    }
+    if not app_logs:
+        logging.getLogger().setLevel(logging.WARNING)
+    app = import_app(app_path)
+
+    console.print(
+        f"[cyan]Sending {rate:g} requests/s to {app_path} for {duration:g}s...[/cyan]"
+    )
+    report = asyncio.run(
+        run_asgi_load(
+            app,
+            mix,
+            rate=rate,
+            duration=duration,
+            poisson=arrivals == "poisson",
+            max_in_flight=max_in_flight,
+            headers=headers,
+            stall_threshold_ms=stall_threshold_ms,
+            seed=seed,
+        )
+    )
+    summary = report.summary()
+    print_summary(
+        "ASGI load",
+        {
+            key: value
+            for key, value in summary.items()
+            if isinstance(value, int | float)
+        },
+    )
+    for label, histogram in [
+        ("all", report.latency),
+        *report.latency_by_request.items(),
+    ]:
+        print_summary(f"Latency: {label}", histogram.summary())
+    loop = summary["event_loop"]
+    print_summary("Event loop lag", loop["lag_ms"])
+    stalls = loop["stalls"]
+    console.print(
+        f"[{'yellow' if stalls else 'green'}]{len(stalls)} event loop stall(s) over "
+        f"{stall_threshold_ms:g} ms[/]"
+    )
+    for stall in sorted(stalls, key=lambda s: -s["duration_ms"])[:3]:
+        console.print(f"[yellow]{stall['duration_ms']} ms stall in:[/yellow]")
+        console.print("\n".join(stall["stack"][-4:]), markup=False, highlight=False)
+    if output:
+        output.write_text(json.dumps(summary, indent=2))
+        console.print(f"[green]Wrote report to {output}[/green]")
+
+
+@bench.command("rls-context")
+@click.option("--user-id", required=True, type=int, help="User to scope queries to")
+@click.option("--iterations", "-n", default=1000, help="Timed requests per strategy")
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Write the summaries as JSON to this file",
+)
+def rls_context(user_id: int, iterations: int, output: Path | None):
+    """Compare per-request latency of the ways to apply the RLS user context.
+
+    Runs against the database configured by the BLANKET_PG_* variables; point it at a
+    database on another host to see realistic round-trip costs.
+    """
+    console.print(
+        f"[cyan]Timing {iterations} requests per strategy as user {user_id}...[/cyan]"
+    )
+    reports = asyncio.run(run_rls_context_benchmark(user_id, iterations))
+    summaries = {name: report.summary() for name, report in reports.items()}
+    for name, summary in summaries.items():
+        print_summary(f"RLS context: {name}", summary)
+
+    baseline = summaries["separate_statement"]["p50_ms"]
+    saved = baseline - summaries["with_begin"]["p50_ms"]
+    console.print(f"[green]Median latency saved per request: {saved:.2f} ms[/green]")
+    if output:
+        output.write_text(json.dumps(summaries, indent=2))
+        console.print(f"[green]Wrote summaries to {output}[/green]")
+
+
+@bench.command("rls-policy")
+@click.option(
+    "--user-id",
+    type=int,
+    help="User to run queries as; defaults to the one with the most tasks",
+)
+@click.option("--runs", default=5, help="EXPLAIN ANALYZE runs per query")
+@click.option(
+    "--seed-users",
+    default=0,
+    help="First insert this many benchmark users (requires the admin role)",
+)
+@click.option("--seed-tasks-per-user", default=2000, help="Tasks per seeded user")
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Write the results as JSON to this file",
+)
+def rls_policy(
+    user_id: int | None,
+    runs: int,
+    seed_users: int,
+    seed_tasks_per_user: int,
+    output: Path | None,
+):
+    """Show how the API's task queries are planned and timed under RLS.
+
+    To compare policies, run this with `--output` before and after applying (or
+    downgrading) the migration that changes them, against the same data. For example,
+    `--seed-users 1000` seeds two million tasks.
+    """
+
+    async def run() -> dict[str, dict]:
+        nonlocal user_id
+        if seed_users:
+            total = seed_users * seed_tasks_per_user
+            console.print(f"[cyan]Seeding {total:,} tasks...[/cyan]")
+            await seed_rls_tasks(seed_users, seed_tasks_per_user)
+        if user_id is None:
+            user_id = await get_busiest_creator_id()
+            if user_id is None:
+                raise click.ClickException("No tasks found; seed some first")
+        results = await explain_rls_queries(user_id, runs)
+        return {name: result.summary() for name, result in results.items()}
+
+    summaries = asyncio.run(run())
+    for name, summary in summaries.items():
+        print_summary(f"RLS policy: {name}", summary)
+    if output:
+        output.write_text(json.dumps(summaries, indent=2))
+        console.print(f"[green]Wrote results to {output}[/green]")
+
+
+@bench.command()
+@click.option("--page-size", default=100, help="Tasks per serialized page")
+@click.option("--iterations", "-n", default=2000, help="Timed pages per path")
+def serialization(page_size: int, iterations: int):
+    """Compare the cost of serializing a task list page through each response path.
+
+    Runs in-process, with no database or server needed.
+    """
+    results = run_serialization_benchmark(page_size, iterations)
+    for name, summary in results.items():
+        print_summary(f"Serializing {page_size} tasks: {name}", summary)
+    speedup = results["default"]["median_us"] / results["lean"]["median_us"]
+    console.print(f"[green]Lean path is {speedup:.1f}x faster per page[/green]")
+
+
+@bench.command()
+@click.option("--iterations", "-n", default=20_000, help="Timed queries per path")
+def statements(iterations: int):
+    """Compare the CPU cost of preparing task list queries per request.
+
+    Runs in-process, with no database or server needed. Database-side savings from
+    prepared statement reuse come on top of this.
+    """
+    results = run_statement_benchmark(iterations)
+    for name, summary in results.items():
+        print_summary(f"Preparing task list queries: {name}", summary)
+    saved = results["dynamic"]["median_us"] - results["prebuilt"]["median_us"]
+    console.print(f"[green]Median CPU saved per request: {saved:.1f} µs[/green]")
+
+
+def _require_dev(action: str) -> None:
+    if BLANKET_ENV != "dev":
+        raise click.ClickException(f"Refusing to {action} outside BLANKET_ENV=dev")
+
+
+def _load_suite_results(path: Path) -> dict[str, dict[str, Any]]:
+    try:
+        return json.loads(path.read_text())["scenarios"]
+    except (ValueError, KeyError) as e:
+        raise click.ClickException(f"{path} isn't a `bench run` results file") from e
+
+
+def _report_regressions(
+    results: dict[str, dict[str, Any]],
+    baseline_path: Path,
+    threshold: float,
+    metrics: tuple[str, ...],
+) -> None:
+    """Print the comparison with the baseline; fail if anything regressed."""
+    regressions = compare_to_baseline(
+        results, _load_suite_results(baseline_path), threshold, metrics
+    )
+    if not regressions:
+        console.print(
+            f"[green]No regressions beyond {threshold:.0%} against {baseline_path}"
+            "[/green]"
+        )
+        return
+
+    table = Table(title=f"Regressions against {baseline_path}")
+    for column in ("Scenario", "Metric", "Baseline", "Current", "Change"):
+        table.add_column(
+            column, justify="left" if column in ("Scenario", "Metric") else "right"
+        )
+    for regression in regressions:
+        table.add_row(*_regression_row(regression))
+    console.print(table)
+    raise click.ClickException(
+        f"{len(regressions)} metric(s) regressed by more than {threshold:.0%}"
+    )
+
+
+def _regression_row(regression: Regression) -> list[str]:
+    return [
+        regression.scenario,
+        regression.metric,
+        str(regression.baseline),
+        str(regression.current),
+        f"{regression.change:+.1%}",
+    ]
+
+
+_threshold_option = click.option(
+    "--threshold",
+    default=0.1,
+    help="Relative change counted as a regression, e.g. 0.1 for 10%",
+)
+_metric_option = click.option(
+    "--metric",
+    "metrics",
+    multiple=True,
+    default=DEFAULT_COMPARED_METRICS,
+    type=click.Choice(["p50_ms", "p95_ms", "p99_ms", "requests_per_second"]),
+    help="Metric to compare against the baseline; repeatable",
+)
+
+
+@bench.command()
+@click.option("--users", default=100, help="Users to create")
+@click.option("--tasks-per-user", default=10_000, help="Tasks per created user")
+def seed(users: int, tasks_per_user: int):
+    """Seed users and tasks for `bench run`.
+
+    Writes to the database configured by the BLANKET_PG_* variables, which should be a
+    disposable local one; nothing is provisioned or cleaned up. Only allowed with
+    BLANKET_ENV=dev. The defaults seed a million tasks.
+    """
+    _require_dev("seed benchmark data")
+    console.print(f"[cyan]Seeding {users * tasks_per_user:,} tasks...[/cyan]")
+    asyncio.run(seed_suite_data(users, tasks_per_user))
+    console.print("[green]Seeded[/green]")
+
+
+@bench.command()
+@click.option(
+    "--user-id",
+    type=int,
+    help="User to run as; defaults to the one with the most tasks",
+)
+@click.option(
+    "--scenario",
+    "scenarios",
+    multiple=True,
+    default=list(SUITE_SCENARIOS),
+    type=click.Choice(list(SUITE_SCENARIOS)),
+    help="Scenario to run; repeatable. Defaults to all",
+)
+@click.option("--requests", "-n", default=500, help="Timed requests per scenario")
+@click.option("--concurrency", "-c", default=1, help="Requests in flight at once")
+@click.option("--warmup", default=20, help="Untimed requests per scenario first")
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Write the results as JSON to this file, e.g. to use as a baseline",
+)
+@click.option(
+    "--baseline",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="Results file to compare against; exits non-zero on regressions",
+)
+@_threshold_option
+@_metric_option
+def run(
+    user_id: int | None,
+    scenarios: tuple[str, ...],
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    output: Path | None,
+    baseline: Path | None,
+    threshold: float,
+    metrics: tuple[str, ...],
+):
+    """Run the benchmark suite's scenarios and report latency and throughput.
+
+    Scenarios run in-process against the BLANKET_PG_* database, as the API role with
+    the user's RLS context; seed data with `bench seed` first. The write scenarios
+    create and update tasks, so only run this against a disposable database.
+    """
+    _require_dev("run write benchmarks")
+
+    async def run_all() -> dict[str, dict[str, Any]]:
+        nonlocal user_id
+        if user_id is None:
+            user_id = await get_busiest_creator_id()
+            if user_id is None:
+                raise click.ClickException("No tasks found; run `bench seed` first")
+        reports = await run_suite(
+            user_id,
+            list(scenarios),
+            requests=requests,
+            concurrency=concurrency,
+            warmup=warmup,
+        )
+        return {name: report.summary() for name, report in reports.items()}
+
+    results = asyncio.run(run_all())
+    for name, summary in results.items():
+        print_summary(f"Scenario: {name}", summary)
+    if output:
+        document = {
+            "created_at": datetime.datetime.now(datetime.UTC).isoformat(),
+            "config": {
+                "user_id": user_id,
+                "requests": requests,
+                "concurrency": concurrency,
+                "warmup": warmup,
+            },
+            "scenarios": results,
+        }
+        output.write_text(json.dumps(document, indent=2))
+        console.print(f"[green]Wrote results to {output}[/green]")
+    if baseline:
+        _report_regressions(results, baseline, threshold, metrics)
+
+
+@bench.command()
+@click.argument("results", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.argument(
+    "baseline", type=click.Path(exists=True, dir_okay=False, path_type=Path)
+)
+@_threshold_option
+@_metric_option
+def compare(results: Path, baseline: Path, threshold: float, metrics: tuple[str, ...]):
+    """Compare two `bench run --output` files; exits non-zero on regressions."""
+    _report_regressions(_load_suite_results(results), baseline, threshold, metrics)
+
+
+@click.group()
+def replay():
+    """Replay captured production traffic and compare latency between builds."""
+    pass
+
+
+def _parse_task_ids(value: str) -> list[int]:
+    ids: list[int] = []
+    for part in value.split(","):
+        start, _, end = part.partition("-")
+        ids.extend(range(int(start), int(end or start) + 1))
+    return ids
+
+
+@replay.command("run")
+@click.argument(
+    "captures",
+    nargs=-1,
+    required=True,
+    type=click.Path(exists=True, path_type=Path),
+)
+@click.option(
+    "--url",
+    default="http://localhost:8101",
+    help="Base URL of the instance to replay against",
+)
+@click.option(
+    "--speed", default=1.0, help="Replay this many times faster than captured"
+)
+@click.option(
+    "--task-ids",
+    default="1-1000",
+    help="Task IDs to fill path parameters with, as ranges and IDs, e.g. '1-500,900'",
+)
+@click.option(
+    "--words",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="File of words (one per line) to fill searches with",
+)
+@click.option("--include-writes", is_flag=True, help="Also replay creates and updates")
+@click.option(
+    "--header",
+    "-H",
+    "raw_headers",
+    multiple=True,
+    help="Extra header as 'Name: value'; repeatable",
+)
+@click.option("--seed", type=int, help="Seed for repeatable parameter choices")
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Write the report as JSON, e.g. to diff against another build's",
+)
+def replay_run(
+    captures: tuple[Path, ...],
+    url: str,
+    speed: float,
+    task_ids: str,
+    words: Path | None,
+    include_writes: bool,
+    raw_headers: tuple[str, ...],
+    seed: int | None,
+    output: Path | None,
+):
+    """Replay captured requests (files or directories of them) against an instance.
+
+    Capture with BLANKET_CAPTURE_SAMPLE_RATE (see blanket.api.capture). Run against a
+    local instance seeded with `blanket bench seed`, never production.
+    """
+    records = load_capture(captures)
+    if not records:
+        raise click.ClickException("No captured requests found")
+    options = ReplayOptions(
+        task_ids=_parse_task_ids(task_ids),
+        vocabulary=words.read_text().split() if words else default_vocabulary(),
+        include_writes=include_writes,
+    )
+    headers = {
+        name.strip(): value.strip()
+        for name, value in (h.split(":", 1) for h in raw_headers)
+    }
+    span = records[-1]["ts"] - records[0]["ts"]
+    console.print(
+        f"[cyan]Replaying {len(records):,} requests ({span:,.0f}s captured) against "
+        f"{url} at {speed:g}x...[/cyan]"
+    )
+    report = asyncio.run(
+        replay_capture(records, url, options, speed=speed, headers=headers, seed=seed)
+    )
+    summary = report.summary()
+    print_summary(
+        "Replay",
+        {
+            key: value
+            for key, value in summary.items()
+            if isinstance(value, int | float)
+        },
+    )
+    for label, histogram in sorted(report.by_route.items()):
+        print_summary(f"Latency: {label}", histogram.summary())
+    if output:
+        output.write_text(json.dumps(summary, indent=2))
+        console.print(f"[green]Wrote report to {output}[/green]")
+
+
+@replay.command("diff")
+@click.argument("before", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.argument("after", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option(
+    "--threshold",
+    default=0.1,
+    help="Highlight changes larger than this fraction, e.g. 0.1 for 10%",
+)
+def replay_diff(before: Path, after: Path, threshold: float):
+    """Compare latency percentiles between two `replay run --output` reports."""
+    diffs = diff_replay_reports(
+        json.loads(before.read_text()), json.loads(after.read_text())
+    )
+    table = Table(title=f"Replay latency: {before} -> {after}")
+    table.add_column("Route")
+    table.add_column("Requests", justify="right")
+    for percentile in DIFFED_PERCENTILES:
+        table.add_column(percentile, justify="right")
+    for diff in diffs:
+        cells = []
+        for percentile in DIFFED_PERCENTILES:
+            a, b = diff.percentiles[percentile]
+            change = diff.change(percentile)
+            color = (
+                "red"
+                if change > threshold
+                else "green"
+                if change < -threshold
+                else "white"
+            )
+            cells.append(f"{a} -> {b} [{color}]({change:+.1%})[/{color}]")
+        table.add_row(diff.route, f"{diff.count[0]} / {diff.count[1]}", *cells)
+    console.print(table)
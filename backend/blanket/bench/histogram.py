@@ -0,0 +1,77 @@
+"""A fixed-memory latency histogram with logarithmic buckets.
+
+Bucket bounds grow by a constant factor, so every recorded value is within a few
+percent of its bucket's bound at any scale, from microseconds to minutes, and a run
+of millions of requests costs no more memory than one of a hundred. Percentiles are
+read off the buckets, and histograms can be merged or exported as JSON.
+"""
+
+import math
+from typing import Any
+
+_MIN_MS = 0.01
+_MAX_MS = 600_000.0
+_BUCKETS_PER_DOUBLING = 16
+"""Bucket bounds grow by 2 ** (1/16), about 4.4%, which bounds the percentile error."""
+
+
+class LatencyHistogram:
+    def __init__(self):
+        bucket_count = math.ceil(math.log2(_MAX_MS / _MIN_MS) * _BUCKETS_PER_DOUBLING)
+        self.counts = [0] * (bucket_count + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    @staticmethod
+    def _bucket(ms: float) -> int:
+        if ms <= _MIN_MS:
+            return 0
+        return math.ceil(math.log2(ms / _MIN_MS) * _BUCKETS_PER_DOUBLING)
+
+    @staticmethod
+    def _upper_bound(bucket: int) -> float:
+        return _MIN_MS * 2 ** (bucket / _BUCKETS_PER_DOUBLING)
+
+    def record(self, ms: float) -> None:
+        self.counts[min(self._bucket(ms), len(self.counts) - 1)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        self.counts = [a + b for a, b in zip(self.counts, other.counts, strict=True)]
+        self.count += other.count
+        self.total_ms += other.total_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+
+    def percentile(self, p: float) -> float:
+        """The latency (in ms) below which `p` percent of values fell."""
+        if not self.count:
+            return 0.0
+        rank = max(math.ceil(p / 100 * self.count), 1)
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self._upper_bound(bucket), self.max_ms)
+        return self.max_ms
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            **{
+                f"p{p:g}_ms": round(self.percentile(p), 3)
+                for p in (50, 90, 95, 99, 99.9)
+            },
+            "max_ms": round(self.max_ms, 3),
+        }
+
+    def buckets(self) -> list[dict[str, float | int]]:
+        """Non-empty buckets, as upper bounds (ms) and counts, for plotting."""
+        return [
+            {"le_ms": round(self._upper_bound(bucket), 4), "count": count}
+            for bucket, count in enumerate(self.counts)
+            if count
+        ]
@@ -0,0 +1,104 @@
+"""A small closed-loop HTTP load driver for benchmarking a running API.
+
+Each of `concurrency` workers sends requests back-to-back for `duration` seconds,
+cycling through the given paths. This is the right tool for measuring a deployed
+stack (e.g. the 4-worker gunicorn/Uvicorn `api` service in docker-compose.yml); it
+reports throughput and latency percentiles for the whole run.
+"""
+
+import asyncio
+import itertools
+import math
+import time
+from dataclasses import dataclass, field
+
+import httpx
+
+
+@dataclass
+class LoadReport:
+    requests: int
+    errors: int
+    duration_s: float
+    latencies_ms: list[float] = field(repr=False)
+
+    @property
+    def requests_per_second(self) -> float:
+        return self.requests / self.duration_s if self.duration_s > 0 else 0.0
+
+    def percentile(self, p: float) -> float:
+        """The latency (in ms) below which `p` percent of requests completed."""
+        if not self.latencies_ms:
+            return 0.0
+        ordered = sorted(self.latencies_ms)
+        rank = max(math.ceil(p / 100 * len(ordered)) - 1, 0)
+        return ordered[rank]
+
+    def summary(self) -> dict[str, float | int]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "duration_s": round(self.duration_s, 3),
+            "requests_per_second": round(self.requests_per_second, 1),
+            "p50_ms": round(self.percentile(50), 2),
+            "p95_ms": round(self.percentile(95), 2),
+            "p99_ms": round(self.percentile(99), 2),
+        }
+
+
+async def run_http_load(
+    base_url: str,
+    paths: list[str],
+    *,
+    concurrency: int = 64,
+    duration: float = 30.0,
+    headers: dict[str, str] | None = None,
+    timeout: float = 30.0,
+) -> LoadReport:
+    """Drive GET requests against `base_url` and collect latencies.
+
+    Args:
+        base_url: The root URL of the API, e.g. http://localhost:80.
+        paths: Request paths (with query strings) to cycle through.
+        concurrency: The number of concurrent in-flight requests.
+        duration: How long to generate load for, in seconds.
+        headers: Extra headers to send with every request (e.g. Authorization).
+        timeout: Per-request timeout in seconds; timeouts count as errors.
+    """
+    latencies_ms: list[float] = []
+    errors = 0
+    path_cycle = itertools.cycle(paths)
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+
+    async with httpx.AsyncClient(
+        base_url=base_url, headers=headers, limits=limits, timeout=timeout
+    ) as client:
+        started = time.perf_counter()
+        deadline = started + duration
+
+        async def worker() -> None:
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                path = next(path_cycle)
+                request_started = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    failed = response.status_code >= 500
+                except httpx.HTTPError:
+                    failed = True
+                if failed:
+                    errors += 1
+                else:
+                    latencies_ms.append((time.perf_counter() - request_started) * 1000)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return LoadReport(
+        requests=len(latencies_ms) + errors,
+        errors=errors,
+        duration_s=elapsed,
+        latencies_ms=latencies_ms,
+    )
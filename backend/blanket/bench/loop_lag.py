@@ -0,0 +1,136 @@
+"""Measures event loop lag, and catches what the loop was doing when it stalled.
+
+A coroutine on the loop wakes every `interval` and records how late it woke: that
+lateness is how long any ready callback (e.g. a request) would have waited for the loop.
+A watchdog thread checks the coroutine's heartbeat; when it's older than the stall
+threshold, the loop is blocked (e.g. by a synchronous call or heavy serialization),
+and the watchdog samples the loop thread's stack every `interval` until it recovers.
+
+Stalls are reported with their duration and their most common stack, which points at
+the blocking code.
+"""
+
+import asyncio
+import collections
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+from typing import Any
+
+from blanket.bench.histogram import LatencyHistogram
+
+
+@dataclass
+class Stall:
+    started_at: float
+    """Seconds since the monitor started."""
+    duration_ms: float
+    samples: int
+    stack: list[str]
+    """The most frequently sampled stack, outermost frame first."""
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "started_at_s": round(self.started_at, 3),
+            "duration_ms": round(self.duration_ms, 1),
+            "samples": self.samples,
+            "stack": self.stack,
+        }
+
+
+@dataclass
+class _OpenStall:
+    started: float
+    stacks: collections.Counter[tuple[str, ...]] = field(
+        default_factory=collections.Counter
+    )
+
+
+class LoopLagMonitor:
+    """Run with `async with LoopLagMonitor(...) as monitor:` on the loop to watch."""
+
+    def __init__(
+        self,
+        stall_threshold_ms: float = 100.0,
+        interval_ms: float = 10.0,
+        max_stalls: int = 100,
+    ):
+        self.stall_threshold_s = stall_threshold_ms / 1000
+        self.interval_s = interval_ms / 1000
+        self.max_stalls = max_stalls
+        self.lag = LatencyHistogram()
+        self.stalls: list[Stall] = []
+        self.dropped_stalls = 0
+        self._heartbeat = 0.0
+        self._started = 0.0
+        self._loop_thread_id = 0
+        self._stop = threading.Event()
+        self._task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+
+    async def __aenter__(self) -> "LoopLagMonitor":
+        self._started = self._heartbeat = time.perf_counter()
+        self._loop_thread_id = threading.get_ident()
+        self._task = asyncio.create_task(self._tick())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-lag-watchdog", daemon=True
+        )
+        self._watchdog.start()
+        return self
+
+    async def __aexit__(self, *_exc) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join)
+
+    async def _tick(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval_s
+            await asyncio.sleep(self.interval_s)
+            now = time.perf_counter()
+            self.lag.record(max(now - expected, 0.0) * 1000)
+            self._heartbeat = now
+
+    def _watch(self) -> None:
+        stall: _OpenStall | None = None
+        while not self._stop.wait(self.interval_s):
+            heartbeat = self._heartbeat
+            blocked_for = time.perf_counter() - heartbeat
+            if blocked_for > self.stall_threshold_s:
+                if stall is None:
+                    # The loop was due to wake one interval after its last heartbeat
+                    stall = _OpenStall(started=heartbeat + self.interval_s)
+                if frame := sys._current_frames().get(self._loop_thread_id):
+                    stack = traceback.format_stack(frame)
+                    stall.stacks[tuple(line.strip() for line in stack)] += 1
+            elif stall is not None:
+                self._close(stall, heartbeat)
+                stall = None
+        if stall is not None:
+            self._close(stall, time.perf_counter())
+
+    def _close(self, stall: _OpenStall, ended: float) -> None:
+        if len(self.stalls) >= self.max_stalls:
+            self.dropped_stalls += 1
+            return
+        stack, _ = stall.stacks.most_common(1)[0] if stall.stacks else ((), 0)
+        self.stalls.append(
+            Stall(
+                started_at=stall.started - self._started,
+                duration_ms=(ended - stall.started) * 1000,
+                samples=stall.stacks.total(),
+                stack=list(stack),
+            )
+        )
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "stall_threshold_ms": self.stall_threshold_s * 1000,
+            "lag_ms": self.lag.summary(),
+            "stalls": [stall.summary() for stall in self.stalls],
+            "dropped_stalls": self.dropped_stalls,
+        }
@@ -0,0 +1,231 @@
+"""Replays captured traffic (blanket.api.capture) against a running instance.
+
+Requests are sent at the times they were captured, sped up by `speed`, whether or not
+earlier ones have finished, so the replayed load has production's mix and burstiness.
+Captures are anonymized, so details are filled back in:
+
+- path parameters (task IDs) are drawn from `task_ids`, e.g. the seeded tasks;
+- free-text query values (searches) become as many words from `vocabulary`, by
+  default the words `bench seed`'s generated text is made of; cursors start from the
+  first page;
+- writes are skipped unless `include_writes`, in which case task creates and updates
+  get a body of about the captured size. Bulk writes are always skipped.
+
+Replaying the same capture against two builds and diffing the reports
+(`diff_replay_reports`) shows how each route's latency distribution changed.
+"""
+
+import asyncio
+import json
+import random
+import re
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from blanket.bench.histogram import LatencyHistogram
+from blanket.bench.text import VOCABULARY
+
+_PATH_PARAM = re.compile(r"\{[^}]+\}")
+
+
+def default_vocabulary() -> list[str]:
+    """The words `bench seed`'s generated text is made of."""
+    return list(VOCABULARY)
+
+
+def load_capture(paths: Iterable[Path]) -> list[dict[str, Any]]:
+    """Read captured records from files, or directories of them, in arrival order.
+
+    Requests that matched no route are dropped.
+    """
+    files: list[Path] = []
+    for path in paths:
+        files.extend(sorted(path.glob("*.jsonl")) if path.is_dir() else [path])
+    records = []
+    for file in files:
+        with file.open() as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    return sorted(
+        (record for record in records if record.get("route")),
+        key=lambda record: record["ts"],
+    )
+
+
+@dataclass
+class ReplayOptions:
+    task_ids: list[int]
+    vocabulary: list[str]
+    include_writes: bool = False
+
+
+def _label(record: dict[str, Any]) -> str:
+    return f"{record['method']} {record['route']}"
+
+
+def _body(
+    record: dict[str, Any], rng: random.Random, options: ReplayOptions
+) -> dict[str, Any] | None:
+    size = record.get("request_bytes", 0)
+    match record["method"], record["route"]:
+        case "POST", "/tasks":
+            filler = " ".join(rng.choices(options.vocabulary, k=max(size // 8, 1)))
+            return {"title": "Replayed task", "description": filler[:size]}
+        case "PATCH", "/tasks/{task_id}":
+            return {"completed": rng.random() < 0.5}
+    return None
+
+
+def build_request(
+    record: dict[str, Any], rng: random.Random, options: ReplayOptions
+) -> tuple[str, str, dict[str, str], Any] | None:
+    """The method, path, query and JSON body to replay `record` with, or None to skip."""
+    method = record["method"]
+    if method not in ("GET", "HEAD", "OPTIONS"):
+        if not options.include_writes or "/bulk" in record["route"]:
+            return None
+    path = _PATH_PARAM.sub(lambda _: str(rng.choice(options.task_ids)), record["route"])
+    query = {}
+    for name, value in record.get("query", {}).items():
+        if not isinstance(value, dict):
+            query[name] = value
+        elif name == "cursor":
+            query[name] = ""
+        else:
+            query[name] = " ".join(
+                rng.choices(options.vocabulary, k=max(value.get("words", 1), 1))
+            )
+    return method, path, query, _body(record, rng, options)
+
+
+@dataclass
+class ReplayReport:
+    speed: float
+    scheduled: int = 0
+    skipped: int = 0
+    errors: int = 0
+    duration_s: float = 0.0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    by_route: dict[str, LatencyHistogram] = field(default_factory=dict)
+    captured_by_route: dict[str, LatencyHistogram] = field(default_factory=dict)
+    """Latencies as captured in production, for reference."""
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "speed": self.speed,
+            "scheduled": self.scheduled,
+            "skipped": self.skipped,
+            "errors": self.errors,
+            "duration_s": round(self.duration_s, 3),
+            "latency": {**self.latency.summary(), "buckets": self.latency.buckets()},
+            "by_route": {
+                label: {**histogram.summary(), "buckets": histogram.buckets()}
+                for label, histogram in sorted(self.by_route.items())
+            },
+            "captured_by_route": {
+                label: histogram.summary()
+                for label, histogram in sorted(self.captured_by_route.items())
+            },
+        }
+
+
+async def replay_capture(
+    records: list[dict[str, Any]],
+    base_url: str,
+    options: ReplayOptions,
+    *,
+    speed: float = 1.0,
+    headers: dict[str, str] | None = None,
+    timeout: float = 30.0,
+    seed: int | None = None,
+) -> ReplayReport:
+    """Send `records` to `base_url` on their captured schedule, `speed` times faster.
+
+    Latency is measured from each request's scheduled time, so requests the client
+    fell behind on count their wait too.
+    """
+    rng = random.Random(seed)
+    report = ReplayReport(speed=speed)
+    if not records:
+        return report
+    first_ts = records[0]["ts"]
+    in_flight: set[asyncio.Task] = set()
+
+    async with httpx.AsyncClient(
+        base_url=base_url,
+        headers=headers,
+        timeout=timeout,
+        limits=httpx.Limits(max_connections=None, max_keepalive_connections=100),
+    ) as client:
+
+        async def send(request: tuple, label: str, scheduled_at: float) -> None:
+            method, path, query, body = request
+            try:
+                response = await client.request(method, path, params=query, json=body)
+                failed = response.status_code >= 500
+            except httpx.HTTPError:
+                failed = True
+            elapsed_ms = (time.perf_counter() - scheduled_at) * 1000
+            report.errors += failed
+            report.latency.record(elapsed_ms)
+            report.by_route.setdefault(label, LatencyHistogram()).record(elapsed_ms)
+
+        started = time.perf_counter()
+        for record in records:
+            label = _label(record)
+            if (duration_ms := record.get("duration_ms")) is not None:
+                report.captured_by_route.setdefault(label, LatencyHistogram()).record(
+                    duration_ms
+                )
+            request = build_request(record, rng, options)
+            if request is None:
+                report.skipped += 1
+                continue
+            scheduled_at = started + (record["ts"] - first_ts) / speed
+            if (delay := scheduled_at - time.perf_counter()) > 0:
+                await asyncio.sleep(delay)
+            report.scheduled += 1
+            task = asyncio.create_task(send(request, label, scheduled_at))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+
+        await asyncio.gather(*in_flight)
+        report.duration_s = time.perf_counter() - started
+    return report
+
+
+DIFFED_PERCENTILES = ("p50_ms", "p95_ms", "p99_ms")
+
+
+@dataclass
+class RouteDiff:
+    route: str
+    count: tuple[int, int]
+    percentiles: dict[str, tuple[float, float]]
+    """Per percentile, the value in the first and second report."""
+
+    def change(self, percentile: str) -> float:
+        before, after = self.percentiles[percentile]
+        return after / before - 1 if before else 0.0
+
+
+def diff_replay_reports(
+    before: dict[str, Any], after: dict[str, Any]
+) -> list[RouteDiff]:
+    """Compare two replay reports' latency percentiles, overall and per route."""
+    pairs = [("all", before["latency"], after["latency"])]
+    for route, summary in before["by_route"].items():
+        if route in after["by_route"]:
+            pairs.append((route, summary, after["by_route"][route]))
+    return [
+        RouteDiff(
+            route=route,
+            count=(a["count"], b["count"]),
+            percentiles={p: (a[p], b[p]) for p in DIFFED_PERCENTILES},
+        )
+        for route, a, b in pairs
+    ]
@@ -0,0 +1,208 @@
+"""Benchmarks for row-level security overhead.
+
+`run_rls_context_benchmark` measures what applying the RLS user context costs per
+request. Each iteration mimics an authenticated API request: check out a pooled API
+session, scope it to a user, run one small RLS-filtered query, and commit. The user
+context is applied either with a separate `SELECT set_current_user(...)` statement (an
+extra round trip) or with `set_session_user`, which sends it along with the
+transaction's `BEGIN`.
+
+`explain_rls_queries` runs the API's task queries under `EXPLAIN ANALYZE` as a user, to
+check how the policy is planned; `seed_rls_tasks` fills the table to a realistic size
+first.
+"""
+
+import json
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from blanket.bench.http import LoadReport
+from blanket.db.models import Task, TaskPriority
+from blanket.db.session import get_admin_session, get_api_session, set_session_user
+
+
+async def _separate_statement(db: AsyncSession, user_id: int) -> None:
+    await db.execute(sa.text("SELECT set_current_user(:uid)"), {"uid": user_id})
+
+
+async def _with_begin(db: AsyncSession, user_id: int) -> None:
+    await set_session_user(db, user_id)
+
+
+RLS_CONTEXT_STRATEGIES: dict[str, Callable[[AsyncSession, int], Awaitable[None]]] = {
+    "separate_statement": _separate_statement,
+    "with_begin": _with_begin,
+}
+
+
+async def _run_strategy(
+    apply_context: Callable[[AsyncSession, int], Awaitable[None]],
+    user_id: int,
+    iterations: int,
+) -> LoadReport:
+    latencies_ms: list[float] = []
+    errors = 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        request_started = time.perf_counter()
+        try:
+            async with get_api_session() as db:
+                await apply_context(db, user_id)
+                await db.scalars(sa.select(Task.id).limit(10))
+                await db.commit()
+        except sa.exc.DBAPIError:
+            errors += 1
+            continue
+        latencies_ms.append((time.perf_counter() - request_started) * 1000)
+    return LoadReport(
+        requests=iterations,
+        errors=errors,
+        duration_s=time.perf_counter() - started,
+        latencies_ms=latencies_ms,
+    )
+
+
+async def run_rls_context_benchmark(
+    user_id: int, iterations: int = 1000, warmup: int = 50
+) -> dict[str, LoadReport]:
+    """Time `iterations` sequential requests per strategy, after `warmup` untimed ones.
+
+    Requests run one at a time so latencies reflect round trips, not pool contention.
+    """
+    reports = {}
+    for name, apply_context in RLS_CONTEXT_STRATEGIES.items():
+        await _run_strategy(apply_context, user_id, warmup)
+        reports[name] = await _run_strategy(apply_context, user_id, iterations)
+    return reports
+
+
+RLS_EXPLAIN_QUERIES: dict[str, sa.Select] = {
+    "list_first_page": (
+        sa.select(Task).order_by(Task.created_at.desc(), Task.id.desc()).limit(20)
+    ),
+    "list_filtered_page": (
+        sa.select(Task)
+        .where(Task.completed.is_(False), Task.priority == TaskPriority.HIGH)
+        .order_by(Task.created_at.desc(), Task.id.desc())
+        .limit(20)
+    ),
+    "count_all": sa.select(sa.func.count()).select_from(Task),
+}
+
+
+@dataclass
+class ExplainResult:
+    """Timings are medians over the runs; buffers and scans are from the last run."""
+
+    planning_ms: float
+    execution_ms: float
+    shared_buffers: int
+    """Shared buffers hit or read by the whole plan."""
+    scans: list[str]
+    """Each scan in the plan, e.g. 'Index Scan using ix_tasks_creator_id_created_at'."""
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "planning_ms": round(self.planning_ms, 3),
+            "execution_ms": round(self.execution_ms, 3),
+            "shared_buffers": self.shared_buffers,
+            "scans": "; ".join(self.scans),
+        }
+
+
+def _plan_scans(node: dict[str, Any]) -> list[str]:
+    scans = []
+    if "Relation Name" in node:
+        scan = f"{node['Node Type']} on {node['Relation Name']}"
+        if "Index Name" in node:
+            scan += f" using {node['Index Name']}"
+        scans.append(scan)
+    for child in node.get("Plans", []):
+        scans.extend(_plan_scans(child))
+    return scans
+
+
+async def seed_rls_tasks(users: int, tasks_per_user: int) -> None:
+    """Insert `users` users with `tasks_per_user` tasks each, then analyze the table.
+
+    Rows are generated server-side, so seeding millions of tasks takes seconds.
+    """
+    async with get_admin_session() as db:
+        run_id = time.time_ns()
+        user_ids = (
+            await db.scalars(
+                sa.text(
+                    "INSERT INTO app_users (email, display_name, created_at) "
+                    "SELECT 'rls-bench-' || :run_id || '-' || n || '@example.com', "
+                    "'RLS bench user ' || n, now() "
+                    "FROM generate_series(1, :users) AS n RETURNING id"
+                ),
+                {"run_id": str(run_id), "users": users},
+            )
+        ).all()
+        await db.execute(
+            sa.text(
+                "INSERT INTO tasks "
+                "(creator_id, title, description, completed, priority, "
+                "created_at, updated_at) "
+                "SELECT u.id, 'Task ' || n, 'Benchmark task ' || n, n % 3 = 0, "
+                "(ARRAY['LOW', 'MEDIUM', 'HIGH'])[n % 3 + 1], "
+                "now() - n * interval '1 minute', now() "
+                "FROM unnest(CAST(:user_ids AS integer[])) AS u(id), "
+                "generate_series(1, :tasks_per_user) AS n"
+            ),
+            {"user_ids": list(user_ids), "tasks_per_user": tasks_per_user},
+        )
+        await db.commit()
+        conn = await db.connection()
+        await conn.exec_driver_sql("ANALYZE tasks")
+        await db.commit()
+
+
+async def get_busiest_creator_id() -> int | None:
+    """The user who created the most tasks, a worst case for per-user queries."""
+    async with get_admin_session() as db:
+        return await db.scalar(
+            sa.select(Task.creator_id)
+            .group_by(Task.creator_id)
+            .order_by(sa.func.count().desc())
+            .limit(1)
+        )
+
+
+async def explain_rls_queries(user_id: int, runs: int = 5) -> dict[str, ExplainResult]:
+    """`EXPLAIN ANALYZE` each of `RLS_EXPLAIN_QUERIES` as `user_id`, `runs` times.
+
+    Queries run as the API role, so the tasks RLS policy applies as it does in requests.
+    """
+    results = {}
+    async with get_api_session() as db:
+        await set_session_user(db, user_id)
+        conn = await db.connection()
+        for name, query in RLS_EXPLAIN_QUERIES.items():
+            compiled = query.compile(
+                dialect=conn.dialect, compile_kwargs={"literal_binds": True}
+            )
+            plans = []
+            for _ in range(runs):
+                plan = (
+                    await conn.exec_driver_sql(
+                        f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {compiled}"
+                    )
+                ).scalar()
+                plans.append(json.loads(plan)[0] if isinstance(plan, str) else plan[0])
+            top = plans[-1]["Plan"]
+            results[name] = ExplainResult(
+                planning_ms=statistics.median(p["Planning Time"] for p in plans),
+                execution_ms=statistics.median(p["Execution Time"] for p in plans),
+                shared_buffers=top.get("Shared Hit Blocks", 0)
+                + top.get("Shared Read Blocks", 0),
+                scans=_plan_scans(top),
+            )
+    return results
@@ -0,0 +1,94 @@
+"""Measures what serializing one page of the task list costs, without a database.
+
+Compares FastAPI's default response path (validate ORM entities against the response
+model with `from_attributes`, `jsonable_encoder`, `json.dumps`) with the lean path
+`list_tasks` uses: rows of only the needed columns, `model_construct`, and
+`model_dump_json`.
+"""
+
+import datetime
+import json
+import statistics
+import time
+from collections.abc import Callable
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.engine.result import result_tuple
+
+from blanket.api.interfaces import PaginatedBase, TaskListItem
+from blanket.db.models import Task, TaskPriority
+
+
+def _task_fields(i: int) -> dict:
+    now = datetime.datetime.now(datetime.UTC)
+    return {
+        "id": i,
+        "title": f"Task {i}",
+        "completed": i % 3 == 0,
+        "priority": list(TaskPriority)[i % 3].value,
+        "description": f"Description for task {i}" * 3,
+        "created_at": now - datetime.timedelta(minutes=i),
+        "updated_at": now,
+    }
+
+
+def _default_path(tasks: list[Task]) -> bytes:
+    page = PaginatedBase[TaskListItem].model_validate(
+        {"items": tasks, "total": 1000, "page": 1, "size": len(tasks)},
+        from_attributes=True,
+    )
+    content = jsonable_encoder(page)
+    # As rendered by FastAPI's JSONResponse
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode()
+
+
+def _lean_path(rows: list) -> bytes:
+    page = PaginatedBase[TaskListItem].model_construct(
+        items=[TaskListItem.from_row(row) for row in rows],
+        total=1000,
+        page=1,
+        size=len(rows),
+    )
+    return page.model_dump_json(by_alias=True).encode()
+
+
+def _time_per_call_us(fn: Callable[[], bytes], iterations: int) -> list[float]:
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1e6)
+    return timings
+
+
+def run_serialization_benchmark(
+    page_size: int = 100, iterations: int = 2000
+) -> dict[str, dict[str, float]]:
+    """Time serializing a `page_size`-item page through each path.
+
+    Returns:
+        Median and p95 microseconds per page, by path name.
+    """
+    fields = [_task_fields(i) for i in range(page_size)]
+    tasks = [Task(**f) for f in fields]
+    make_row = result_tuple(list(TaskListItem.model_fields))
+    rows = [make_row([f[name] for name in TaskListItem.model_fields]) for f in fields]
+
+    paths = {
+        "default": lambda: _default_path(tasks),
+        "lean": lambda: _lean_path(rows),
+    }
+    if json.loads(paths["default"]()) != json.loads(paths["lean"]()):
+        raise RuntimeError("The two paths serialize the page differently")
+
+    results = {}
+    for name, fn in paths.items():
+        _time_per_call_us(fn, iterations // 10)
+        timings = sorted(_time_per_call_us(fn, iterations))
+        results[name] = {
+            "median_us": round(statistics.median(timings), 1),
+            "p95_us": round(timings[int(len(timings) * 0.95) - 1], 1),
+        }
+    return results
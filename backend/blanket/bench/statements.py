@@ -0,0 +1,106 @@
+"""Measures the Python cost of preparing the task list query, without a database.
+
+Compares building the `select` per request, as `list_tasks` used to, with looking up
+the prebuilt statement for the request's filters (`blanket.api.task_queries`). Both
+paths then do what SQLAlchemy does before each execution: compute the statement's
+cache key and look its compiled form up in the compiled cache.
+"""
+
+import itertools
+import statistics
+import time
+from collections.abc import Callable
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql.asyncpg import PGDialect_asyncpg
+
+from blanket.api.interfaces import TaskListItem
+from blanket.api.task_queries import TaskFilters, task_page
+from blanket.db.models import TASK_SEARCH_CONFIG, Task, TaskPriority
+
+
+def _dynamic_statement(filters: TaskFilters, offset: int, limit: int) -> sa.Select:
+    query = sa.select(*TaskListItem.columns())
+    if filters.completed is not None:
+        query = query.where(Task.completed == filters.completed)
+    if filters.priority is not None:
+        query = query.where(Task.priority == filters.priority)
+    if filters.search is not None:
+        search = filters.search
+        ts_query = sa.func.websearch_to_tsquery(TASK_SEARCH_CONFIG, search)
+        query = query.where(
+            sa.or_(
+                Task.search_vector.bool_op("@@")(ts_query),
+                Task.title.ilike(f"%{search}%", escape="\\"),
+                Task.description.ilike(f"%{search}%", escape="\\"),
+                Task.title.bool_op("%>")(search),
+            )
+        ).order_by(
+            (
+                sa.func.ts_rank_cd(Task.search_vector, ts_query)
+                + sa.func.word_similarity(search, Task.title)
+            ).desc()
+        )
+    return (
+        query.order_by(Task.created_at.desc(), Task.id.desc())
+        .offset(offset)
+        .limit(limit)
+    )
+
+
+def _request_filters() -> list[TaskFilters]:
+    """A mix of filter combinations and values, as a stream of requests would have."""
+    return [
+        TaskFilters(completed=completed, priority=priority, search=search)
+        for completed, priority, search in itertools.product(
+            (None, True, False),
+            (None, *TaskPriority),
+            (None, "report", "login bug"),
+        )
+    ]
+
+
+def run_statement_benchmark(iterations: int = 20_000) -> dict[str, dict[str, float]]:
+    """Time preparing `iterations` task list queries through each path.
+
+    Returns:
+        Median and p95 microseconds per query, by path name.
+    """
+    dialect = PGDialect_asyncpg()
+    compiled_cache: dict = {}
+
+    def prepare(statement: sa.Select) -> None:
+        # The cache key excludes bind values, so equal shapes share compiled SQL
+        key = statement._generate_cache_key().key
+        if key not in compiled_cache:
+            compiled_cache[key] = statement.compile(dialect=dialect)
+
+    def dynamic(filters: TaskFilters) -> None:
+        prepare(_dynamic_statement(filters, offset=0, limit=51))
+
+    def prebuilt(filters: TaskFilters) -> None:
+        # Values are passed separately on this path, so count building them
+        _ = {**filters.params, "offset": 0, "limit": 51}
+        prepare(task_page(filters.shape))
+
+    requests = _request_filters()
+    paths: dict[str, Callable[[TaskFilters], None]] = {
+        "dynamic": dynamic,
+        "prebuilt": prebuilt,
+    }
+    results = {}
+    for name, fn in paths.items():
+        # Warm up the compiled cache, as a long-running worker's would be
+        for filters in requests:
+            fn(filters)
+        timings = []
+        for filters in itertools.islice(itertools.cycle(requests), iterations):
+            started = time.perf_counter()
+            fn(filters)
+            timings.append((time.perf_counter() - started) * 1e6)
+        timings.sort()
+        results[name] = {
+            "median_us": round(statistics.median(timings), 1),
+            "p95_us": round(timings[int(len(timings) * 0.95) - 1], 1),
+        }
+    return results
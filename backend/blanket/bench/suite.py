@@ -0,0 +1,358 @@
+"""The benchmark suite for the API's hot paths, with a baseline to catch regressions.
+
+`seed_suite_data` fills the database with users and tasks at a realistic scale.
+`run_suite` then runs each of `SUITE_SCENARIOS` many times, as one user, and reports
+latency percentiles and throughput per scenario. Each request does what the matching
+route does: check out an API session, apply the RLS user context, run the route's
+queries (prebuilt statements from blanket.api.task_queries) or writes, build the
+response models, and commit.
+
+Results are saved as JSON; `compare_to_baseline` flags scenarios that got slower (or
+lower throughput) than a saved baseline by more than a threshold, so `blanket bench
+run --baseline` can fail CI on regressions. Compare results from the same machine and
+data; only relative changes are meaningful.
+
+Seeding and the write scenarios modify whatever database the BLANKET_PG_* variables
+configure; nothing here provisions or cleans up a separate one. Point them at a
+disposable local Postgres, never production. The commands refuse to run outside
+BLANKET_ENV=dev, but that's the only guard.
+"""
+
+import asyncio
+import datetime
+import itertools
+import random
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from blanket.api.interfaces import TaskListItem, TaskRead
+from blanket.api.pagination import CountStrategy, KeysetCursor, count_rows
+from blanket.api.task_queries import (
+    TaskFilters,
+    filtered_tasks,
+    task_keyset_page,
+    task_page,
+)
+from blanket.bench.http import LoadReport
+from blanket.bench.text import task_text
+from blanket.db.models import Task, TaskPriority
+from blanket.db.session import get_admin_session, get_api_session, set_session_user
+
+PAGE_SIZE = 50
+DEEP_PAGE = 200
+"""The page number deep paging scenarios fetch, at `PAGE_SIZE` tasks per page."""
+_TEXT_SAMPLES = 1000
+_COPY_BATCH_SIZE = 50_000
+
+
+@dataclass
+class SuiteContext:
+    """What scenarios need to know about the benchmark user's data."""
+
+    user_id: int
+    task_ids: list[int]
+    search_terms: list[str]
+    deep_cursor: KeysetCursor | None
+    """The cursor for the keyset page matching offset page `DEEP_PAGE`."""
+
+
+async def _list_page(
+    db: AsyncSession, filters: TaskFilters, page: int = 1
+) -> list[TaskListItem]:
+    shape = filters.shape
+    await count_rows(
+        db,
+        filtered_tasks(shape),
+        CountStrategy.EXACT,
+        namespace=Task.__tablename__,
+        cache_key="bench",
+        params=filters.params,
+    )
+    params = {
+        **filters.params,
+        "offset": (page - 1) * PAGE_SIZE,
+        "limit": PAGE_SIZE + 1,
+    }
+    rows = (await db.execute(task_page(shape), params)).all()
+    return [TaskListItem.from_row(row) for row in rows[:PAGE_SIZE]]
+
+
+async def _list(db: AsyncSession, ctx: SuiteContext) -> list[TaskListItem]:
+    return await _list_page(db, TaskFilters())
+
+
+async def _filter(db: AsyncSession, ctx: SuiteContext) -> list[TaskListItem]:
+    return await _list_page(
+        db, TaskFilters(completed=False, priority=TaskPriority.HIGH)
+    )
+
+
+async def _search(db: AsyncSession, ctx: SuiteContext) -> list[TaskListItem]:
+    return await _list_page(db, TaskFilters(search=random.choice(ctx.search_terms)))
+
+
+async def _deep_page_offset(db: AsyncSession, ctx: SuiteContext) -> list[TaskListItem]:
+    return await _list_page(db, TaskFilters(), page=DEEP_PAGE)
+
+
+async def _deep_page_keyset(db: AsyncSession, ctx: SuiteContext) -> list[TaskListItem]:
+    params: dict[str, Any] = {"limit": PAGE_SIZE + 1}
+    if ctx.deep_cursor is not None:
+        params.update(
+            cursor_created_at=ctx.deep_cursor.created_at,
+            cursor_id=ctx.deep_cursor.id,
+        )
+    query = task_keyset_page(
+        TaskFilters().shape, after_cursor=ctx.deep_cursor is not None
+    )
+    rows = (await db.execute(query, params)).all()
+    return [TaskListItem.from_row(row) for row in rows[:PAGE_SIZE]]
+
+
+async def _create(db: AsyncSession, ctx: SuiteContext) -> TaskRead:
+    task = Task(
+        creator_id=ctx.user_id,
+        title="Benchmark task",
+        description="Created by the benchmark suite",
+        priority=TaskPriority.MEDIUM,
+    )
+    db.add(task)
+    await db.commit()
+    await db.refresh(task)
+    return TaskRead.model_validate(task)
+
+
+async def _update(db: AsyncSession, ctx: SuiteContext) -> TaskRead | None:
+    task = await db.get(Task, random.choice(ctx.task_ids))
+    if task is None:
+        return None
+    task.completed = not task.completed
+    await db.commit()
+    await db.refresh(task)
+    return TaskRead.model_validate(task)
+
+
+# Each returns the response model its route would, so serialization is included
+Scenario = Callable[[AsyncSession, SuiteContext], Awaitable[Any]]
+
+SUITE_SCENARIOS: dict[str, Scenario] = {
+    "list": _list,
+    "filter": _filter,
+    "search": _search,
+    "deep_page_offset": _deep_page_offset,
+    "deep_page_keyset": _deep_page_keyset,
+    "create": _create,
+    "update": _update,
+}
+
+
+async def seed_suite_data(users: int, tasks_per_user: int) -> None:
+    """Insert `users` users with `tasks_per_user` tasks each, then analyze the tables.
+
+    Titles and descriptions are generated from blanket.bench.text's vocabulary, so
+    searches for its words have matches to rank; a sample of them is generated and
+    reused. Rows are loaded with COPY.
+    """
+    rng = random.Random(0)
+    samples = [task_text(rng) for _ in range(min(_TEXT_SAMPLES, tasks_per_user))]
+    priorities = list(TaskPriority)
+    now = datetime.datetime.now(datetime.UTC)
+    run_id = time.time_ns()
+
+    async with get_admin_session() as db:
+        raw = (await (await db.connection()).get_raw_connection()).driver_connection
+        await raw.copy_records_to_table(
+            "app_users",
+            columns=["email", "display_name", "created_at"],
+            records=[
+                (f"bench-{run_id}-{n}@example.com", f"Bench user {n}", now)
+                for n in range(users)
+            ],
+        )
+        user_ids = (
+            await db.scalars(
+                sa.text("SELECT id FROM app_users WHERE email LIKE :pattern"),
+                {"pattern": f"bench-{run_id}-%"},
+            )
+        ).all()
+
+        def task_records():
+            sample_cycle = itertools.cycle(samples)
+            for user_id in user_ids:
+                for n in range(tasks_per_user):
+                    title, description = next(sample_cycle)
+                    created_at = now - datetime.timedelta(minutes=n)
+                    yield (
+                        user_id,
+                        title,
+                        description,
+                        n % 3 == 0,
+                        priorities[n % len(priorities)].value,
+                        created_at,
+                        created_at,
+                    )
+
+        records = task_records()
+        while batch := list(itertools.islice(records, _COPY_BATCH_SIZE)):
+            await raw.copy_records_to_table(
+                "tasks",
+                columns=[
+                    "creator_id",
+                    "title",
+                    "description",
+                    "completed",
+                    "priority",
+                    "created_at",
+                    "updated_at",
+                ],
+                records=batch,
+            )
+        await db.commit()
+        conn = await db.connection()
+        await conn.exec_driver_sql("ANALYZE app_users")
+        await conn.exec_driver_sql("ANALYZE tasks")
+        await db.commit()
+
+
+async def load_suite_context(user_id: int) -> SuiteContext:
+    async with get_admin_session() as db:
+        task_ids = (
+            await db.scalars(
+                sa.select(Task.id)
+                .where(Task.creator_id == user_id)
+                .order_by(sa.func.random())
+                .limit(1000)
+            )
+        ).all()
+        titles = (
+            await db.scalars(sa.select(Task.title).where(Task.id.in_(task_ids[:50])))
+        ).all()
+        deep_row = (
+            await db.execute(
+                sa.select(Task.created_at, Task.id)
+                .where(Task.creator_id == user_id)
+                .order_by(Task.created_at.desc(), Task.id.desc())
+                .offset((DEEP_PAGE - 1) * PAGE_SIZE - 1)
+                .limit(1)
+            )
+        ).first()
+    # Leading words of real titles, so searches have matches to rank
+    search_terms = [title.split()[0].strip(".").lower() for title in titles if title]
+    return SuiteContext(
+        user_id=user_id,
+        task_ids=list(task_ids),
+        search_terms=search_terms or ["task"],
+        deep_cursor=KeysetCursor(created_at=deep_row.created_at, id=deep_row.id)
+        if deep_row
+        else None,
+    )
+
+
+async def _run_scenario(
+    scenario: Scenario,
+    ctx: SuiteContext,
+    requests: int,
+    concurrency: int,
+) -> LoadReport:
+    latencies_ms: list[float] = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for _ in remaining:
+            request_started = time.perf_counter()
+            try:
+                async with get_api_session() as db:
+                    await set_session_user(db, ctx.user_id)
+                    await scenario(db, ctx)
+                    await db.commit()
+            except sa.exc.DBAPIError:
+                errors += 1
+                continue
+            latencies_ms.append((time.perf_counter() - request_started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return LoadReport(
+        requests=requests,
+        errors=errors,
+        duration_s=time.perf_counter() - started,
+        latencies_ms=latencies_ms,
+    )
+
+
+async def run_suite(
+    user_id: int,
+    scenarios: list[str],
+    *,
+    requests: int = 500,
+    concurrency: int = 1,
+    warmup: int = 20,
+) -> dict[str, LoadReport]:
+    """Run each scenario `requests` times, after `warmup` untimed runs.
+
+    Args:
+        user_id: The user to run as; RLS scopes every query to their tasks.
+        scenarios: Names from `SUITE_SCENARIOS`, run in order.
+        requests: Timed requests per scenario.
+        concurrency: Requests in flight at once. At 1, latencies reflect the work
+            itself rather than contention for the pool.
+        warmup: Untimed requests per scenario first, e.g. to prepare statements.
+    """
+    ctx = await load_suite_context(user_id)
+    reports = {}
+    for name in scenarios:
+        scenario = SUITE_SCENARIOS[name]
+        await _run_scenario(scenario, ctx, warmup, concurrency)
+        reports[name] = await _run_scenario(scenario, ctx, requests, concurrency)
+    return reports
+
+
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms")
+HIGHER_IS_BETTER = ("requests_per_second",)
+DEFAULT_COMPARED_METRICS = ("p50_ms", "p95_ms", "requests_per_second")
+
+
+@dataclass
+class Regression:
+    scenario: str
+    metric: str
+    baseline: float
+    current: float
+
+    @property
+    def change(self) -> float:
+        """The relative change from the baseline, e.g. 0.25 for 25% higher."""
+        return self.current / self.baseline - 1 if self.baseline else 0.0
+
+
+def compare_to_baseline(
+    results: dict[str, dict[str, Any]],
+    baseline: dict[str, dict[str, Any]],
+    threshold: float,
+    metrics: tuple[str, ...] = DEFAULT_COMPARED_METRICS,
+) -> list[Regression]:
+    """Metrics that got worse than the baseline by more than `threshold` (a fraction).
+
+    Scenarios missing from either side are skipped.
+    """
+    regressions = []
+    for scenario, summary in results.items():
+        if scenario not in baseline:
+            continue
+        for metric in metrics:
+            before, after = baseline[scenario].get(metric), summary.get(metric)
+            if not before or after is None:
+                continue
+            regression = Regression(scenario, metric, before, after)
+            if (metric in LOWER_IS_BETTER and regression.change > threshold) or (
+                metric in HIGHER_IS_BETTER and regression.change < -threshold
+            ):
+                regressions.append(regression)
+    return regressions
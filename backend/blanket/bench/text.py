@@ -0,0 +1,41 @@
+"""Generated task text for benchmarks, with no dependencies beyond the standard library.
+
+Titles and descriptions are drawn from `VOCABULARY`, so full-text and trigram searches
+for its words find matches at realistic rates. `bench replay` fills anonymized
+searches in with the same words.
+"""
+
+import random
+
+VOCABULARY = (
+    "account", "action", "agenda", "analysis", "approval", "archive", "audit",
+    "backlog", "budget", "bug", "build", "calendar", "call", "campaign", "change",
+    "check", "client", "code", "comment", "contract", "cost", "customer", "data",
+    "deadline", "demo", "deploy", "design", "detail", "document", "draft", "email",
+    "estimate", "event", "expense", "feature", "feedback", "file", "final", "fix",
+    "follow", "forecast", "form", "goal", "guide", "hire", "idea", "import", "invoice",
+    "issue", "item", "launch", "lead", "legal", "list", "log", "meeting", "metric",
+    "migration", "milestone", "model", "monthly", "note", "offer", "onboarding",
+    "order", "outline", "owner", "page", "partner", "payment", "plan", "policy",
+    "post", "prepare", "price", "priority", "process", "product", "project",
+    "proposal", "quarterly", "question", "quote", "release", "renewal", "report",
+    "request", "research", "review", "risk", "roadmap", "sales", "schedule", "script",
+    "send", "server", "session", "setup", "share", "sign", "slide", "spec", "sprint",
+    "status", "summary", "support", "survey", "sync", "team", "template", "test",
+    "ticket", "timeline", "training", "update", "upgrade", "vendor", "weekly",
+    "workshop", "write",
+)  # fmt: skip
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    text = " ".join(rng.choices(VOCABULARY, k=words))
+    return f"{text[0].upper()}{text[1:]}."
+
+
+def task_text(rng: random.Random) -> tuple[str, str]:
+    """A title of a few words and a description of a few sentences."""
+    title = sentence(rng, rng.randint(2, 6))
+    description = " ".join(
+        sentence(rng, rng.randint(4, 12)) for _ in range(rng.randint(1, 3))
+    )
+    return title, description[:200]
@@ -1,4 +1,6 @@
+import blanket.bench.commands as bench_commands
 import blanket.db.commands as db_commands
+import blanket.importer.commands as importer_commands
 import blanket.io.click as click
 
 
@@ -8,6 +10,9 @@ def cli():
 
 
 cli.add_command(db_commands.db)
+cli.add_command(bench_commands.bench)
+cli.add_command(bench_commands.replay)
+cli.add_command(importer_commands.tasks)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,99 @@
+"""Set-based writes for applying many rows in a few statements.
+
+Each helper sends one statement per batch of rows instead of one per row, and returns
+the affected rows via RETURNING, so callers can report per-row outcomes without
+reloading anything.
+"""
+
+from collections import defaultdict
+from collections.abc import Sequence
+from typing import Any, TypeVar
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from blanket.db.models import Base
+
+ModelT = TypeVar("ModelT", bound=Base)
+
+
+async def bulk_insert(
+    db: AsyncSession, model: type[ModelT], rows: Sequence[dict[str, Any]]
+) -> list[ModelT]:
+    """Insert `rows` with multi-row `INSERT ... RETURNING`, returning them in order.
+
+    Python-side column defaults apply as they do for `db.add()`.
+    """
+    if not rows:
+        return []
+    result = await db.scalars(
+        sa.insert(model).returning(model, sort_by_parameter_order=True),
+        list(rows),
+    )
+    return list(result.all())
+
+
+async def bulk_update(
+    db: AsyncSession, model: type[ModelT], changes: dict[int, dict[str, Any]]
+) -> dict[int, ModelT]:
+    """Apply per-row `changes` (keyed by primary key) with `UPDATE ... FROM (VALUES ...)`.
+
+    Rows setting the same columns share one statement, so a batch that e.g. only
+    toggles `completed` costs a single round trip. Column `onupdate` defaults apply.
+
+    Returns:
+        The updated rows by primary key. Keys missing from the result matched no row
+        visible to the session.
+    """
+    by_columns: defaultdict[tuple[str, ...], list[int]] = defaultdict(list)
+    for pk, fields in changes.items():
+        by_columns[tuple(sorted(fields))].append(pk)
+
+    table = model.__table__
+    (pk_column,) = table.primary_key.columns
+    updated: dict[int, ModelT] = {}
+    for columns, pks in by_columns.items():
+        if not columns:
+            # Nothing to set; report the rows as they are
+            rows = await db.scalars(sa.select(model).where(pk_column.in_(pks)))
+            updated.update({getattr(row, pk_column.key): row for row in rows})
+            continue
+
+        values = sa.values(
+            sa.column(pk_column.key, pk_column.type),
+            *(sa.column(name, table.c[name].type) for name in columns),
+            name="changes",
+        ).data([(pk, *(changes[pk][name] for name in columns)) for pk in pks])
+        stmt = (
+            sa.update(model)
+            .where(pk_column == values.c[pk_column.key])
+            .values({name: values.c[name] for name in columns})
+            .returning(model)
+            # The returned rows are used as-is; nothing else needs synchronizing
+            .execution_options(synchronize_session=False)
+        )
+        rows = await db.scalars(stmt)
+        updated.update({getattr(row, pk_column.key): row for row in rows})
+    return updated
+
+
+async def bulk_delete(
+    db: AsyncSession, model: type[ModelT], pks: Sequence[int]
+) -> list[ModelT]:
+    """Delete rows by primary key with `DELETE ... WHERE pk = ANY(...)`.
+
+    Returns:
+        The rows as they were before deletion.
+    """
+    (pk_column,) = model.__table__.primary_key.columns
+    stmt = (
+        sa.delete(model)
+        .where(
+            pk_column
+            == sa.any_(sa.bindparam("pks", list(pks), type_=ARRAY(pk_column.type)))
+        )
+        .returning(model)
+        .execution_options(synchronize_session=False)
+    )
+    return list((await db.scalars(stmt)).all())
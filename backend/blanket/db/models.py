@@ -5,7 +5,7 @@ from enum import StrEnum
 
 import sqlalchemy as sa
 from sqlalchemy import ForeignKey, String
-from sqlalchemy.dialects.postgresql import TIMESTAMP
+from sqlalchemy.dialects.postgresql import TIMESTAMP, TSVECTOR
 from sqlalchemy.orm import (
     DeclarativeBase,
     Mapped,
@@ -50,8 +50,37 @@ class TaskPriority(StrEnum):
     HIGH = "HIGH"
 
 
+TASK_SEARCH_CONFIG = "english"
+
+
 class Task(Base, IndexedTimestampMixin):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Serves keyset pagination over (created_at DESC, id DESC)
+        sa.Index("ix_tasks_created_at_id", "created_at", "id"),
+        # Serves the same listing once RLS narrows it to one creator
+        sa.Index(
+            "ix_tasks_creator_id_created_at",
+            "creator_id",
+            sa.desc("created_at"),
+            sa.desc("id"),
+        ),
+        # Full-text search; see blanket.db.search
+        sa.Index("ix_tasks_search_vector", "search_vector", postgresql_using="gin"),
+        # Substring (ILIKE) and fuzzy matching; requires the pg_trgm extension
+        sa.Index(
+            "ix_tasks_title_trgm",
+            "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ),
+        sa.Index(
+            "ix_tasks_description_trgm",
+            "description",
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"},
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     creator_id: Mapped[int] = mapped_column(ForeignKey("app_users.id"))
@@ -59,5 +88,19 @@ class Task(Base, IndexedTimestampMixin):
     description: Mapped[str | None] = mapped_column()
     completed: Mapped[bool] = mapped_column(server_default=sa.text("false"))
     priority: Mapped[TaskPriority] = mapped_column(String(255))
+    updated_at: Mapped[datetime.datetime] = mapped_column(
+        TIMESTAMP(timezone=True),
+        default=lambda: datetime.datetime.now(datetime.UTC),
+        onupdate=lambda: datetime.datetime.now(datetime.UTC),
+    )
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        sa.Computed(
+            f"setweight(to_tsvector('{TASK_SEARCH_CONFIG}', coalesce(title, '')), 'A')"
+            f" || setweight(to_tsvector('{TASK_SEARCH_CONFIG}', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
 
     creator: Mapped[User] = relationship(back_populates="tasks")
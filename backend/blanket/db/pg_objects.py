@@ -6,58 +6,56 @@ from alembic_utils.pg_extension import PGExtension
 from alembic_utils.pg_function import PGFunction
 from alembic_utils.pg_policy import PGPolicy
 
+# The setting is transaction-local so it never leaks to other checkouts of a pooled
+# connection. The API applies it with `blanket.db.session.set_session_user` instead,
+# which avoids a round trip of its own.
 set_current_user_function = PGFunction(
     schema="public",
     signature="set_current_user(user_id integer)",
     definition="""
     RETURNS VOID AS $$
     BEGIN
-        PERFORM set_config('app.current_user_id', user_id::text, false);
+        PERFORM set_config('app.current_user_id', user_id::text, true);
     END;
     $$ LANGUAGE plpgsql;
     """,
 )
 
+# A STABLE SQL function, so the planner can inline it and treat the result as a
+# constant within a query. A setting that's unset, empty or not an integer means no
+# user (NULL), so a bad value hides every row rather than failing every query. The
+# CASEs are nested so the casts only ever see digits.
 get_current_user_function = PGFunction(
     schema="public",
     signature="get_current_user()",
     definition="""
     RETURNS integer AS $$
-    DECLARE
-        user_id_text text;
-    BEGIN
-        user_id_text := current_setting('app.current_user_id', true);
-
-        -- Return NULL if not set or empty string
-        IF user_id_text IS NULL OR user_id_text = '' THEN
-            RETURN NULL;
-        END IF;
-
-        -- Try to convert to integer, return NULL if invalid
-        BEGIN
-            RETURN user_id_text::integer;
-        EXCEPTION WHEN invalid_text_representation THEN
-            RETURN NULL;
+        SELECT CASE WHEN current_setting('app.current_user_id', true) ~ '^[0-9]{1,10}$'
+            THEN CASE WHEN current_setting('app.current_user_id', true)::bigint
+                <= 2147483647
+                THEN current_setting('app.current_user_id', true)::integer
+            END
         END;
-    END;
-    $$ LANGUAGE plpgsql;
+    $$ LANGUAGE sql STABLE;
     """,
 )
 
 postgis_extension = PGExtension(schema="public", signature="postgis")
 
+# Trigram operator classes back the substring and fuzzy task search indexes
+pg_trgm_extension = PGExtension(schema="public", signature="pg_trgm")
+
 
+# Wrapping the call in a scalar subquery evaluates it once per query (an InitPlan), so
+# the policy reduces to `creator_id = $1` and can use ix_tasks_creator_id_created_at.
+# The creator_id foreign key already guarantees the user exists.
 tasks_user_policy = PGPolicy(
     schema="public",
     signature="tasks_user_policy",
     on_entity="public.tasks",
     definition="""
     AS PERMISSIVE
-    USING (EXISTS (
-        SELECT 1
-        FROM app_users ua
-        WHERE ua.id = get_current_user() AND ua.id = tasks.creator_id
-    ))
+    USING (creator_id = (SELECT get_current_user()))
     """,
 )
 
@@ -66,5 +64,6 @@ PG_OBJECTS = [
     set_current_user_function,
     get_current_user_function,
     postgis_extension,
+    pg_trgm_extension,
     tasks_user_policy,
 ]
@@ -0,0 +1,294 @@
+"""Connection pools that record how long checkouts take and how full they run.
+
+Each engine's pool keeps a `PoolStats` for this process, covering:
+
+- checkout wait: time spent getting a connection from the pool, including waiting for
+  one to be returned or opening a new one;
+- pre-ping: time spent checking a pooled connection is alive before handing it out;
+- wait-queue depth: how many checkouts are waiting at once;
+- overflow: checkouts served beyond `pool_size`, from `max_overflow`;
+- connection age: how long checked-out connections have been open;
+- recent checkout wait: a decaying average that admission control
+  (blanket.api.admission) sheds load on.
+
+Every gunicorn worker and Celery process has its own pools, so a deployment can open
+up to processes x engines x (pool_size + max_overflow) connections; keep that under
+Postgres' `max_connections`. `get_pool_stats` reports this process' numbers (served at
+`/metrics/pool`, alongside the scrape endpoint), and the `blanket_db_pool_*` metrics
+every process' (see blanket.io.metrics).
+"""
+
+import functools
+import math
+import os
+import threading
+import time
+import weakref
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry, QueuePool
+
+from blanket.io.metrics import CallbackMetric
+from blanket.io.timing import get_request_timings
+
+_CONNECTED_AT_KEY = "blanket_connected_at"
+_CHECKED_OUT_AT_KEY = "blanket_checked_out_at"
+
+
+@dataclass
+class TimingStats:
+    count: int = 0
+    total_s: float = 0.0
+    max_s: float = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.count += 1
+        self.total_s += seconds
+        self.max_s = max(self.max_s, seconds)
+
+    def summary(self) -> dict[str, float | int]:
+        mean = self.total_s / self.count if self.count else 0.0
+        return {
+            "count": self.count,
+            "mean_ms": round(mean * 1000, 3),
+            "max_ms": round(self.max_s * 1000, 3),
+        }
+
+
+@dataclass
+class DecayingAverage:
+    """A moving average of recent samples that decays toward 0 while none arrive.
+
+    Unlike a plain moving average, it can't stay stuck at a high value once samples
+    stop, e.g. because callers stopped using the pool in response to it.
+    """
+
+    half_life_s: float = 5.0
+    weight: float = 0.2
+    """How much each new sample counts against the current average."""
+    _value: float = 0.0
+    _updated_at: float = 0.0
+
+    def value(self, now: float | None = None) -> float:
+        now = time.monotonic() if now is None else now
+        return self._value * math.pow(0.5, (now - self._updated_at) / self.half_life_s)
+
+    def record(self, sample: float) -> None:
+        now = time.monotonic()
+        self._value = self.value(now) * (1 - self.weight) + sample * self.weight
+        self._updated_at = now
+
+
+@dataclass
+class PoolStats:
+    role: str
+    checkouts: int = 0
+    overflow_checkouts: int = 0
+    connections_opened: int = 0
+    invalidations: int = 0
+    waiting: int = 0
+    peak_waiting: int = 0
+    checkout_wait: TimingStats = field(default_factory=TimingStats)
+    pre_ping: TimingStats = field(default_factory=TimingStats)
+    connection_age: TimingStats = field(default_factory=TimingStats)
+    recent_checkout_wait: DecayingAverage = field(default_factory=DecayingAverage)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def start_waiting(self) -> None:
+        with self._lock:
+            self.waiting += 1
+            self.peak_waiting = max(self.peak_waiting, self.waiting)
+
+    def stop_waiting(self, seconds: float, overflowed: bool) -> None:
+        with self._lock:
+            self.waiting -= 1
+            self.checkouts += 1
+            self.overflow_checkouts += overflowed
+            self.checkout_wait.record(seconds)
+            self.recent_checkout_wait.record(seconds)
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "role": self.role,
+            "checkouts": self.checkouts,
+            "overflow_checkouts": self.overflow_checkouts,
+            "connections_opened": self.connections_opened,
+            "invalidations": self.invalidations,
+            "waiting": self.waiting,
+            "peak_waiting": self.peak_waiting,
+            "checkout_wait": self.checkout_wait.summary(),
+            "recent_checkout_wait_ms": round(
+                self.recent_checkout_wait.value() * 1000, 3
+            ),
+            "pre_ping": self.pre_ping.summary(),
+            "connection_age_at_checkout": self.connection_age.summary(),
+        }
+
+
+class _InstrumentedPoolMixin:
+    """Times `_do_get`, the hook pool implementations use to hand out connections."""
+
+    stats: PoolStats
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats(role="unknown")
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        self.stats.start_waiting()
+        started = time.perf_counter()
+        overflowed = False
+        try:
+            record = super()._do_get()
+            overflowed = self.checkedout() > self.size()
+            record.info[_CHECKED_OUT_AT_KEY] = time.perf_counter()
+            return record
+        finally:
+            waited = time.perf_counter() - started
+            self.stats.stop_waiting(waited, overflowed)
+            if (timings := get_request_timings()) is not None:
+                timings.pool_wait_s += waited
+
+    def recreate(self):
+        # Pools are recreated after e.g. a database restart; keep counting
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class InstrumentedAsyncPool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+_instrumented_engines: weakref.WeakSet[Engine] = weakref.WeakSet()
+
+
+def instrument_pool(engine: Engine, role: str) -> None:
+    """Label an engine's pool stats and record connection lifecycle events.
+
+    The engine must use `InstrumentedAsyncPool` or `InstrumentedQueuePool`. For async
+    engines, pass `engine.sync_engine`.
+    """
+    stats: PoolStats = engine.pool.stats
+    stats.role = role
+
+    @sa.event.listens_for(engine, "connect")
+    def _on_connect(_dbapi_connection, record: ConnectionPoolEntry) -> None:
+        stats.connections_opened += 1
+        record.info[_CONNECTED_AT_KEY] = time.monotonic()
+
+    @sa.event.listens_for(engine, "checkout")
+    def _on_checkout(_dbapi_connection, record: ConnectionPoolEntry, _proxy) -> None:
+        # Between _do_get returning and this event firing, the pool pre-pings
+        if (checked_out_at := record.info.pop(_CHECKED_OUT_AT_KEY, None)) is not None:
+            stats.pre_ping.record(time.perf_counter() - checked_out_at)
+        if (connected_at := record.info.get(_CONNECTED_AT_KEY)) is not None:
+            stats.connection_age.record(time.monotonic() - connected_at)
+
+    @sa.event.listens_for(engine, "invalidate")
+    def _on_invalidate(_dbapi_connection, _record, _exception) -> None:
+        stats.invalidations += 1
+
+    _instrumented_engines.add(engine)
+
+
+def get_recent_checkout_wait(role: str) -> float:
+    """Recent checkout wait in seconds, across this process' pools for `role`.
+
+    Takes the worst pool's, so one saturated event loop's pool is enough to show.
+    """
+    return max(
+        (
+            engine.pool.stats.recent_checkout_wait.value()
+            for engine in list(_instrumented_engines)
+            if engine.pool.stats.role == role
+        ),
+        default=0.0,
+    )
+
+
+def get_pool_stats() -> dict[str, Any]:
+    """Pool configuration, current usage and accumulated stats for this process."""
+    pools = []
+    for engine in list(_instrumented_engines):
+        pool = engine.pool
+        pools.append(
+            {
+                **pool.stats.summary(),
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+            }
+        )
+    return {"pid": os.getpid(), "pools": pools}
+
+
+def _pool_samples(value: Callable[[Any], float]) -> list[tuple[tuple[str], float]]:
+    return [
+        ((engine.pool.stats.role,), value(engine.pool))
+        for engine in list(_instrumented_engines)
+    ]
+
+
+for _name, _type, _help, _value in [
+    (
+        "blanket_db_pool_checked_out",
+        "gauge",
+        "Connections currently checked out of the pool.",
+        lambda pool: pool.checkedout(),
+    ),
+    (
+        "blanket_db_pool_idle",
+        "gauge",
+        "Connections open and idle in the pool.",
+        lambda pool: pool.checkedin(),
+    ),
+    (
+        "blanket_db_pool_overflow",
+        "gauge",
+        "Connections open beyond pool_size.",
+        lambda pool: max(pool.overflow(), 0),
+    ),
+    (
+        "blanket_db_pool_waiting",
+        "gauge",
+        "Checkouts currently waiting for a connection.",
+        lambda pool: pool.stats.waiting,
+    ),
+    (
+        "blanket_db_pool_checkouts_total",
+        "counter",
+        "Connections checked out of the pool.",
+        lambda pool: pool.stats.checkouts,
+    ),
+    (
+        "blanket_db_pool_checkout_wait_seconds_total",
+        "counter",
+        "Time spent waiting to check out connections.",
+        lambda pool: pool.stats.checkout_wait.total_s,
+    ),
+    (
+        "blanket_db_pool_connections_opened_total",
+        "counter",
+        "Connections opened by the pool.",
+        lambda pool: pool.stats.connections_opened,
+    ),
+    (
+        "blanket_db_pool_invalidations_total",
+        "counter",
+        "Pooled connections invalidated, e.g. after a disconnect.",
+        lambda pool: pool.stats.invalidations,
+    ),
+]:
+    CallbackMetric(
+        _name, _help, _type, ["role"], functools.partial(_pool_samples, _value)
+    )
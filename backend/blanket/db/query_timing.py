@@ -0,0 +1,30 @@
+"""Adds each query's time to the current request's timings (see blanket.io.timing)."""
+
+import time
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Engine
+
+from blanket.io.timing import get_request_timings
+
+_STARTED_AT_ATTR = "_blanket_started_at"
+
+
+def instrument_queries(engine: Engine) -> None:
+    """Record query time and counts for `engine`; for async engines, pass `sync_engine`."""
+
+    @sa.event.listens_for(engine, "before_cursor_execute")
+    def _before_execute(_conn, _cursor, _statement, _parameters, context, _many):
+        if get_request_timings() is not None:
+            setattr(context, _STARTED_AT_ATTR, time.perf_counter())
+
+    @sa.event.listens_for(engine, "after_cursor_execute")
+    def _after_execute(_conn, _cursor, statement, _parameters, context, _many):
+        timings = get_request_timings()
+        started_at = getattr(context, _STARTED_AT_ATTR, None)
+        if timings is None or started_at is None:
+            return
+        timings.db_s += time.perf_counter() - started_at
+        timings.db_queries += 1
+        if timings.statements is not None:
+            timings.statements[statement] += 1
@@ -1,23 +1,76 @@
+import asyncio
+import time
+import weakref
+from asyncio import AbstractEventLoop
+
 from redis.asyncio import Redis as AsyncRedis
+from redis.asyncio.client import Pipeline
 
 import blanket.io.env as env
+from blanket.io.metrics import Histogram
 
 BLANKET_REDIS_HOST = env.getenv("BLANKET_REDIS_HOST")
 BLANKET_REDIS_PORT = env.getenv("BLANKET_REDIS_PORT")
 BLANKET_REDIS_DB = env.getenv("BLANKET_REDIS_DB")
 
+REDIS_COMMAND_SECONDS = Histogram(
+    "blanket_redis_command_duration_seconds",
+    "Latency of Redis commands, and of pipelines as a whole, including errors.",
+    ["command"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
 
-_ASYNC_REDIS_CLIENT: AsyncRedis | None = None
 
+class _TimedPipeline(Pipeline):
+    async def execute(self, raise_on_error: bool = True):
+        started = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error)
+        finally:
+            REDIS_COMMAND_SECONDS.labels("PIPELINE").observe(
+                time.perf_counter() - started
+            )
 
-def validate_redis_config() -> None:
-    if any(
+
+class _TimedRedis(AsyncRedis):
+    """Records the latency of each command in `REDIS_COMMAND_SECONDS`."""
+
+    async def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            REDIS_COMMAND_SECONDS.labels(str(args[0]).upper()).observe(
+                time.perf_counter() - started
+            )
+
+    def pipeline(
+        self, transaction: bool = True, shard_hint: str | None = None
+    ) -> Pipeline:
+        return _TimedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint
+        )
+
+
+# Connections belong to the event loop that opened them, so each loop gets its own
+# client (and connection pool), as with the database engines in blanket.db.session
+_async_redis_clients: weakref.WeakKeyDictionary[AbstractEventLoop, AsyncRedis] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def redis_is_configured() -> bool:
+    return all(
         [
-            not BLANKET_REDIS_HOST,
-            not BLANKET_REDIS_PORT,
-            not BLANKET_REDIS_DB,
+            BLANKET_REDIS_HOST,
+            BLANKET_REDIS_PORT,
+            BLANKET_REDIS_DB,
         ]
-    ):
+    )
+
+
+def validate_redis_config() -> None:
+    if not redis_is_configured():
         raise ValueError(
             "BLANKET_REDIS_HOST, BLANKET_REDIS_PORT, and BLANKET_REDIS_DB must be set"
         )
@@ -29,12 +82,20 @@ def get_redis_url() -> str:
 
 
 def get_redis_client() -> AsyncRedis:
+    """Get the Redis client for the running event loop."""
     validate_redis_config()
-    global _ASYNC_REDIS_CLIENT
-    if _ASYNC_REDIS_CLIENT is None:
-        _ASYNC_REDIS_CLIENT = AsyncRedis(
+    loop = asyncio.get_running_loop()
+    if loop not in _async_redis_clients:
+        _async_redis_clients[loop] = _TimedRedis(
             host=BLANKET_REDIS_HOST,
             port=BLANKET_REDIS_PORT,
             db=BLANKET_REDIS_DB,
         )
-    return _ASYNC_REDIS_CLIENT
+    return _async_redis_clients[loop]
+
+
+async def close_redis_client() -> None:
+    """Close the running event loop's Redis client, if one was created."""
+    client = _async_redis_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
@@ -0,0 +1,302 @@
+"""`@cached`: Redis-backed caching for async functions and FastAPI dependencies.
+
+Results are pickled (and zlib-compressed when large) into Redis with a TTL, keyed by
+the function and its arguments. On top of a plain read-through cache:
+
+- Tags: each entry records the versions of its tags when it was computed, and
+  `invalidate_cache_tags` bumps versions, so one call invalidates every entry sharing a
+  tag without tracking which keys those are.
+- Single flight: concurrent misses for a key in a worker share one call, and across
+  workers only the holder of a short Redis lock recomputes. The others serve the
+  expired value while it does, or wait briefly for the new one if there's none.
+- Probabilistic early refresh ("XFetch"): as an entry nears expiry, reads become
+  increasingly likely to recompute it ahead of time, sooner for values that are slow
+  to compute, so a hot key is usually refreshed before it expires at all.
+
+Like the other Redis-backed caches here, this fails open: if Redis is unconfigured or
+unavailable, the function is simply called.
+
+Only cache values that are safe to pickle and share between users, e.g. plain data or
+Pydantic models; never ORM instances bound to a session.
+"""
+
+import asyncio
+import functools
+import hashlib
+import inspect
+import math
+import pickle
+import random
+import secrets
+import time
+import weakref
+import zlib
+from asyncio import AbstractEventLoop
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, ParamSpec, TypeVar
+
+from redis.asyncio import Redis as AsyncRedis
+from redis.exceptions import RedisError
+
+from blanket.db.redis import get_redis_client, redis_is_configured
+from blanket.io.cache import SingleFlight
+from blanket.io.log import LOGGER
+
+CACHE_KEY_PREFIX = "cache"
+DEFAULT_LOCK_TIMEOUT_SECONDS = 10.0
+_COMPRESS_MIN_BYTES = 1024
+_LOCK_POLL_SECONDS = 0.05
+_KEYABLE_TYPES = (str, int, float, bool, type(None), Enum, date, datetime)
+
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+@dataclass(frozen=True)
+class _Entry:
+    value: Any
+    expires_at: float
+    """Unix time after which the value must be recomputed."""
+    compute_seconds: float
+    tag_versions: tuple[int, ...]
+
+
+def _dumps(entry: _Entry) -> bytes:
+    data = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(data) >= _COMPRESS_MIN_BYTES:
+        return b"z" + zlib.compress(data)
+    return b"p" + data
+
+
+def _loads(raw: bytes) -> _Entry | None:
+    try:
+        data = zlib.decompress(raw[1:]) if raw[:1] == b"z" else raw[1:]
+        entry = pickle.loads(data)
+    except Exception:
+        # E.g. written by a version of the code whose classes have since changed
+        return None
+    return entry if isinstance(entry, _Entry) else None
+
+
+def _tag_key(tag: str) -> str:
+    return f"{CACHE_KEY_PREFIX}:tag:{tag}"
+
+
+def _should_refresh_early(entry: _Entry, beta: float) -> bool:
+    # XFetch (Vattani et al., 2015): -log(U) is exponentially distributed, so the
+    # chance of refreshing rises smoothly as expiry approaches
+    jitter = -math.log(1.0 - random.random())
+    return time.time() + entry.compute_seconds * beta * jitter >= entry.expires_at
+
+
+async def _init_tag_versions(redis: AsyncRedis, tag_keys: list[str]) -> list[int]:
+    # Versions start at the current time rather than 0, so a tag whose version Redis
+    # lost can't return to a version existing entries recorded
+    async with redis.pipeline(transaction=False) as pipe:
+        for tag_key in tag_keys:
+            pipe.set(tag_key, time.time_ns(), nx=True)
+            pipe.get(tag_key)
+        results = await pipe.execute()
+    return [int(version) for version in results[1::2]]
+
+
+async def invalidate_cache_tags(*tags: str) -> None:
+    """Invalidate every cached entry carrying any of `tags`."""
+    if not tags or not redis_is_configured():
+        return
+    try:
+        async with get_redis_client().pipeline(transaction=False) as pipe:
+            for tag in set(tags):
+                pipe.set(_tag_key(tag), time.time_ns(), nx=True)
+                pipe.incr(_tag_key(tag))
+            await pipe.execute()
+    except RedisError:
+        LOGGER.warning("Failed to invalidate cache tags", tags=sorted(tags))
+
+
+@dataclass(frozen=True)
+class _CachePolicy:
+    ttl: float
+    beta: float
+    lock_timeout: float
+
+
+async def _fetch(
+    redis: AsyncRedis,
+    key: str,
+    tag_keys: list[str],
+    policy: _CachePolicy,
+    compute: Callable[[], Awaitable[Any]],
+) -> Any:
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.get(key)
+        if tag_keys:
+            pipe.mget(tag_keys)
+        results = await pipe.execute()
+    raw = results[0]
+    versions = [None if v is None else int(v) for v in results[1]] if tag_keys else []
+
+    entry = _loads(raw) if raw is not None else None
+    if entry is not None and list(entry.tag_versions) != versions:
+        # Invalidated; unlike an expired value, never worth serving
+        entry = None
+    if entry is not None and time.time() < entry.expires_at:
+        if not _should_refresh_early(entry, policy.beta):
+            return entry.value
+
+    lock_key = f"{key}:lock"
+    token = secrets.token_hex(16)
+    lock_ms = int(policy.lock_timeout * 1000)
+    if not await redis.set(lock_key, token, nx=True, px=lock_ms):
+        # Another worker is recomputing; use the value we have, even if expired
+        if entry is not None:
+            return entry.value
+        return await _wait_for_value(redis, key, raw, policy, compute)
+
+    try:
+        if None in versions:
+            versions = await _init_tag_versions(redis, tag_keys)
+        started = time.perf_counter()
+        value = await compute()
+        entry = _Entry(
+            value=value,
+            expires_at=time.time() + policy.ttl,
+            compute_seconds=time.perf_counter() - started,
+            tag_versions=tuple(versions),
+        )
+        try:
+            # Kept past expiry so other workers can serve it while one recomputes
+            await redis.set(key, _dumps(entry), px=int(policy.ttl * 2000))
+        except RedisError:
+            LOGGER.warning("Failed to store cached value", key=key)
+    finally:
+        await _release_lock(redis, lock_key, token)
+    return value
+
+
+async def _release_lock(redis: AsyncRedis, lock_key: str, token: str) -> None:
+    try:
+        await redis.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+    except RedisError:
+        # It expires on its own after the lock timeout
+        pass
+
+
+async def _wait_for_value(
+    redis: AsyncRedis,
+    key: str,
+    previous_raw: bytes | None,
+    policy: _CachePolicy,
+    compute: Callable[[], Awaitable[Any]],
+) -> Any:
+    deadline = time.monotonic() + policy.lock_timeout
+    while time.monotonic() < deadline:
+        await asyncio.sleep(_LOCK_POLL_SECONDS)
+        raw = await redis.get(key)
+        if raw is not None and raw != previous_raw:
+            entry = _loads(raw)
+            if entry is not None and time.time() < entry.expires_at:
+                return entry.value
+    # The lock holder may have failed; don't wait on it any longer
+    return await compute()
+
+
+def _make_key(
+    namespace: str, signature: inspect.Signature, ignore: frozenset[str], args, kwargs
+) -> str:
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    parts = []
+    for name, value in bound.arguments.items():
+        if name in ignore:
+            continue
+        if not isinstance(value, _KEYABLE_TYPES):
+            raise TypeError(
+                f"Can't derive a cache key from argument {name!r} of type "
+                f"{type(value).__name__}; pass `key` or list it in `ignore`"
+            )
+        parts.append(f"{name}={value!r}")
+    digest = hashlib.sha256("\0".join(parts).encode()).hexdigest()[:32]
+    return f"{CACHE_KEY_PREFIX}:{namespace}:{digest}"
+
+
+def cached(
+    *,
+    ttl: float,
+    tags: Iterable[str] | Callable[..., Iterable[str]] = (),
+    key: Callable[..., str] | None = None,
+    ignore: Iterable[str] = (),
+    namespace: str | None = None,
+    beta: float = 1.0,
+    lock_timeout: float = DEFAULT_LOCK_TIMEOUT_SECONDS,
+) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R]]]:
+    """Cache an async function's results in Redis.
+
+    The decorated function keeps its signature, so it also works as a FastAPI
+    dependency.
+
+    Args:
+        ttl: Seconds a result stays fresh.
+        tags: Tags for every result, or a function of the call's arguments returning
+            them. Invalidate them with `invalidate_cache_tags`.
+        key: A function of the call's arguments returning the cache key. By default,
+            the key is derived from every argument not in `ignore`, which must then
+            be simple values (strings, numbers, enums, dates, None).
+        ignore: Arguments that don't affect the result, e.g. a database session.
+        namespace: Prefix for the function's keys; defaults to its qualified name.
+            Change it when the shape of cached values changes.
+        beta: How eagerly to refresh before expiry; 0 disables early refresh.
+        lock_timeout: The longest one call may hold the recompute lock, and so the
+            longest other calls wait for it before computing themselves.
+    """
+    policy = _CachePolicy(ttl=ttl, beta=beta, lock_timeout=lock_timeout)
+    ignored = frozenset(ignore)
+
+    def decorator(fn: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+        signature = inspect.signature(fn)
+        prefix = namespace or f"{fn.__module__}.{fn.__qualname__}"
+        # Futures belong to a loop, so calls are de-duplicated per loop
+        flights: weakref.WeakKeyDictionary[AbstractEventLoop, SingleFlight] = (
+            weakref.WeakKeyDictionary()
+        )
+
+        @functools.wraps(fn)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            if not redis_is_configured():
+                return await fn(*args, **kwargs)
+
+            if key is not None:
+                cache_key = f"{CACHE_KEY_PREFIX}:{prefix}:{key(*args, **kwargs)}"
+            else:
+                cache_key = _make_key(prefix, signature, ignored, args, kwargs)
+            call_tags = tags(*args, **kwargs) if callable(tags) else tags
+            tag_keys = sorted({_tag_key(tag) for tag in call_tags})
+
+            async def compute() -> R:
+                return await fn(*args, **kwargs)
+
+            async def fetch() -> R:
+                try:
+                    return await _fetch(
+                        get_redis_client(), cache_key, tag_keys, policy, compute
+                    )
+                except RedisError:
+                    LOGGER.warning("Cache unavailable", key=cache_key)
+                    return await compute()
+
+            flight = flights.setdefault(asyncio.get_running_loop(), SingleFlight())
+            return await flight.do(cache_key, fetch)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,66 @@
+"""Indexed task search.
+
+Matches combine three indexed predicates so that no search needs a sequential scan:
+
+- Full-text matches against the generated `tasks.search_vector` column (GIN index),
+  which handle stemming and multi-word queries ("fix login bugs").
+- Substring matches on title and description via `ILIKE`, served by the pg_trgm GIN
+  indexes ("logi" finds "login").
+- Fuzzy matches on title via pg_trgm word similarity, so small typos still match
+  ("lgoin" finds "login").
+
+Results are ranked by full-text relevance plus title similarity.
+"""
+
+import sqlalchemy as sa
+
+from blanket.db.models import TASK_SEARCH_CONFIG, Task
+
+SEARCH_PARAM = "search"
+SEARCH_PATTERN_PARAM = "search_pattern"
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def task_search_params(search: str) -> dict[str, str]:
+    """Values for the bind parameters of `task_search_filter` and `task_search_rank`."""
+    return {
+        SEARCH_PARAM: search,
+        SEARCH_PATTERN_PARAM: f"%{_escape_like(search)}%",
+    }
+
+
+def _search() -> sa.BindParameter[str]:
+    return sa.bindparam(SEARCH_PARAM, type_=sa.String)
+
+
+def _ts_query() -> sa.ColumnElement:
+    return sa.func.websearch_to_tsquery(TASK_SEARCH_CONFIG, _search())
+
+
+def task_search_filter() -> sa.ColumnElement[bool]:
+    """A WHERE clause matching tasks against a user-provided search string.
+
+    The search string is a bind parameter, so statements using this clause can be
+    built once and reused; execute them with `task_search_params(search)`.
+    """
+    pattern = sa.bindparam(SEARCH_PATTERN_PARAM, type_=sa.String)
+    return sa.or_(
+        Task.search_vector.bool_op("@@")(_ts_query()),
+        Task.title.ilike(pattern, escape="\\"),
+        Task.description.ilike(pattern, escape="\\"),
+        # `a %> b`: b is similar to some word in a
+        Task.title.bool_op("%>")(_search()),
+    )
+
+
+def task_search_rank() -> sa.ColumnElement[float]:
+    """A relevance score for ordering search results, highest first.
+
+    Takes the same bind parameters as `task_search_filter`.
+    """
+    return sa.func.ts_rank_cd(
+        Task.search_vector, _ts_query()
+    ) + sa.func.word_similarity(_search(), Task.title)
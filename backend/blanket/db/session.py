@@ -1,20 +1,32 @@
 import asyncio
+import time
+import uuid
 import weakref
 from asyncio import AbstractEventLoop
 from dataclasses import dataclass
 from urllib.parse import quote_plus
 
+import asyncpg
+import sqlalchemy as sa
 from sqlalchemy import create_engine
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import Connection, Engine
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
-from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.orm import Session, SessionTransaction
+from sqlalchemy.pool import Pool
 
 import blanket.io.env as env
+from blanket.db.pool import (
+    InstrumentedAsyncPool,
+    InstrumentedQueuePool,
+    instrument_pool,
+)
+from blanket.db.query_timing import instrument_queries
+from blanket.io.log import LOGGER
 
 PG_HOST = env.getenv("BLANKET_PG_HOST")
 PG_PORT = env.getenv("BLANKET_PG_PORT")
@@ -27,6 +39,32 @@ PG_ADMIN_PASSWORD = env.getenv("BLANKET_PG_ADMIN_PASSWORD")
 PG_API_USER = env.getenv("BLANKET_PG_API_USER")
 PG_API_PASSWORD = env.getenv("BLANKET_PG_API_PASSWORD")
 
+# Optional read replica, used by read-only API routes with the API role's credentials
+PG_REPLICA_HOST = env.getenv("BLANKET_PG_REPLICA_HOST", "")
+PG_REPLICA_PORT = env.getenv("BLANKET_PG_REPLICA_PORT", PG_PORT)
+PG_REPLICA_MAX_LAG_SECONDS = float(
+    env.getenv("BLANKET_PG_REPLICA_MAX_LAG_SECONDS", "5")
+)
+"""Reads go to the primary while the replica lags further behind than this."""
+PG_REPLICA_LAG_CHECK_INTERVAL_SECONDS = 1.0
+
+# Pool settings apply per engine, and each process has an engine per role (and per
+# event loop); see blanket.db.pool for sizing against max_connections
+PG_POOL_SIZE = int(env.getenv("BLANKET_PG_POOL_SIZE", "5"))
+PG_MAX_OVERFLOW = int(env.getenv("BLANKET_PG_MAX_OVERFLOW", "10"))
+PG_POOL_TIMEOUT = float(env.getenv("BLANKET_PG_POOL_TIMEOUT", "30"))
+PG_POOL_RECYCLE = int(env.getenv("BLANKET_PG_POOL_RECYCLE", "-1"))
+PG_POOL_PRE_PING = env.getenv("BLANKET_PG_POOL_PRE_PING", "1") == "1"
+
+# Prepared statements cached per connection by SQLAlchemy's asyncpg adapter. The task
+# list alone has a few dozen statement variants (see blanket.api.task_queries), so
+# leave room above that.
+PG_STATEMENT_CACHE_SIZE = int(env.getenv("BLANKET_PG_STATEMENT_CACHE_SIZE", "256"))
+# Set when connecting through PgBouncer in transaction pooling mode, where consecutive
+# transactions may run on different server connections: prepared statements can't be
+# reused, and their names must be unique across clients.
+PG_PGBOUNCER = env.getenv("BLANKET_PG_PGBOUNCER", "0") == "1"
+
 
 def get_postgres_uri(
     postgres_host: str,
@@ -53,28 +91,147 @@ def get_postgres_uri(
     return f"{prefix}{postgres_user}:{postgres_password}@{postgres_host}:{postgres_port}/{postgres_db}"
 
 
-def _create_async_engine(postgres_uri: str) -> AsyncEngine:
-    return create_async_engine(
+USER_CONTEXT_SETTING = "app.current_user_id"
+"""The Postgres setting RLS policies read the current user from (`get_current_user()`)."""
+
+_SESSION_USER_KEY = "rls_user_id"
+
+
+class UserContextConnection(asyncpg.Connection):
+    """An asyncpg connection that can send the RLS user context along with `BEGIN`.
+
+    SQLAlchemy starts asyncpg transactions lazily, right before a transaction's first
+    statement, with a simple-protocol `BEGIN`. When a user context is pending, it's
+    appended to that message, so setting it costs no extra round trip.
+    """
+
+    __slots__ = ("_pending_user_id",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pending_user_id: int | None = None
+
+    def set_pending_user(self, user_id: int | None) -> None:
+        """Apply `user_id` as the user context of the next transaction started."""
+        self._pending_user_id = user_id
+
+    async def execute(self, query: str, *args, timeout: float | None = None) -> str:
+        user_id = self._pending_user_id
+        if user_id is not None and not args and query.startswith("BEGIN"):
+            self._pending_user_id = None
+            query = (
+                f"{query} SELECT set_config('{USER_CONTEXT_SETTING}', "
+                f"'{int(user_id)}', true);"
+            )
+        return await super().execute(query, *args, timeout=timeout)
+
+
+async def set_session_user(session: AsyncSession, user_id: int | None) -> None:
+    """Set the user RLS policies apply to for every transaction of `session`.
+
+    The setting is transaction-local, so it never leaks to other checkouts of a pooled
+    connection; it's re-applied whenever the session begins a new transaction.
+    """
+    session.info[_SESSION_USER_KEY] = user_id
+    if session.in_transaction():
+        # The transaction has already begun, so `_apply_session_user` has run
+        await session.execute(
+            sa.text("SELECT set_config(:setting, :user_id, true)"),
+            {"setting": USER_CONTEXT_SETTING, "user_id": _setting_value(user_id)},
+        )
+
+
+def get_session_user(session: AsyncSession) -> int | None:
+    """The user RLS policies apply to for `session`, if `set_session_user` set one."""
+    return session.info.get(_SESSION_USER_KEY)
+
+
+def _user_context_connection(dbapi_connection) -> UserContextConnection | None:
+    driver_connection = getattr(dbapi_connection, "driver_connection", None)
+    # Not isinstance: asyncpg's connection metaclass makes every asyncpg connection
+    # an instance of every Connection subclass
+    if issubclass(type(driver_connection), UserContextConnection):
+        return driver_connection
+    return None
+
+
+def _setting_value(user_id: int | None) -> str:
+    return "" if user_id is None else str(int(user_id))
+
+
+@sa.event.listens_for(Session, "after_begin")
+def _apply_session_user(
+    session: Session, _transaction: SessionTransaction, connection: Connection
+) -> None:
+    user_id = session.info.get(_SESSION_USER_KEY)
+    if user_id is None:
+        return
+    driver_connection = _user_context_connection(connection.connection)
+    if driver_connection is not None and not driver_connection.is_in_transaction():
+        driver_connection.set_pending_user(user_id)
+    else:
+        # E.g. sync engines, or a session joined to an outer transaction
+        connection.execute(
+            sa.text("SELECT set_config(:setting, :user_id, true)"),
+            {"setting": USER_CONTEXT_SETTING, "user_id": _setting_value(user_id)},
+        )
+
+
+@sa.event.listens_for(Pool, "checkin")
+def _discard_pending_user(dbapi_connection, _connection_record) -> None:
+    # A transaction that ran no statements never sent its `BEGIN`; don't let its
+    # user context carry over to the connection's next checkout
+    driver_connection = _user_context_connection(dbapi_connection)
+    if driver_connection is not None:
+        driver_connection.set_pending_user(None)
+
+
+def _asyncpg_connect_args() -> dict:
+    connect_args = {
+        "connection_class": UserContextConnection,
+        "prepared_statement_cache_size": PG_STATEMENT_CACHE_SIZE,
+    }
+    if PG_PGBOUNCER:
+        connect_args.update(
+            prepared_statement_cache_size=0,
+            # asyncpg's own cache, used for statements run on the driver directly
+            statement_cache_size=0,
+            prepared_statement_name_func=lambda: f"__asyncpg_{uuid.uuid4()}__",
+        )
+    return connect_args
+
+
+def _create_async_engine(postgres_uri: str, role: str) -> AsyncEngine:
+    engine = create_async_engine(
         postgres_uri,
         echo=env.getenv("BLANKET_SA_ECHO", "0") == "1",
-        poolclass=AsyncAdaptedQueuePool,
-        pool_size=5,
-        max_overflow=10,
-        pool_timeout=30,
-        pool_pre_ping=True,
+        connect_args=_asyncpg_connect_args(),
+        poolclass=InstrumentedAsyncPool,
+        pool_size=PG_POOL_SIZE,
+        max_overflow=PG_MAX_OVERFLOW,
+        pool_timeout=PG_POOL_TIMEOUT,
+        pool_recycle=PG_POOL_RECYCLE,
+        pool_pre_ping=PG_POOL_PRE_PING,
     )
+    instrument_pool(engine.sync_engine, role)
+    instrument_queries(engine.sync_engine)
+    return engine
 
 
-def _create_sync_engine(postgres_uri: str) -> Engine:
-    return create_engine(
+def _create_sync_engine(postgres_uri: str, role: str) -> Engine:
+    engine = create_engine(
         postgres_uri,
         echo=env.getenv("BLANKET_SA_ECHO", "0") == "1",
-        poolclass=QueuePool,
-        pool_size=5,
-        max_overflow=10,
-        pool_timeout=30,
-        pool_pre_ping=True,
+        poolclass=InstrumentedQueuePool,
+        pool_size=PG_POOL_SIZE,
+        max_overflow=PG_MAX_OVERFLOW,
+        pool_timeout=PG_POOL_TIMEOUT,
+        pool_recycle=PG_POOL_RECYCLE,
+        pool_pre_ping=PG_POOL_PRE_PING,
     )
+    instrument_pool(engine, role)
+    instrument_queries(engine)
+    return engine
 
 
 @dataclass
@@ -83,16 +240,26 @@ class _LoopResources:
     sessionmaker: async_sessionmaker[AsyncSession]
 
 
+@dataclass
+class _ReplicaLoopResources(_LoopResources):
+    lag_checked_at: float = float("-inf")
+    lag_seconds: float | None = None
+
+
 _admin_resources: weakref.WeakKeyDictionary[AbstractEventLoop, _LoopResources] = (
     weakref.WeakKeyDictionary()
 )
 _api_resources: weakref.WeakKeyDictionary[AbstractEventLoop, _LoopResources] = (
     weakref.WeakKeyDictionary()
 )
+_api_replica_resources: weakref.WeakKeyDictionary[
+    AbstractEventLoop, _ReplicaLoopResources
+] = weakref.WeakKeyDictionary()
 
 _SUPERUSER_POSTGRES_URI: str | None = None
 _ADMIN_POSTGRES_URI: str | None = None
 _API_POSTGRES_URI: str | None = None
+_API_REPLICA_POSTGRES_URI: str | None = None
 
 _SUPERUSER_ENGINE: Engine | None = None
 
@@ -125,6 +292,24 @@ def get_api_postgres_uri() -> str:
     return _API_POSTGRES_URI
 
 
+def replica_is_configured() -> bool:
+    return bool(PG_REPLICA_HOST)
+
+
+def get_api_replica_postgres_uri() -> str:
+    global _API_REPLICA_POSTGRES_URI
+    if _API_REPLICA_POSTGRES_URI is None:
+        _API_REPLICA_POSTGRES_URI = get_postgres_uri(
+            postgres_host=PG_REPLICA_HOST,
+            postgres_port=PG_REPLICA_PORT,
+            postgres_db=PG_DB,
+            postgres_user=PG_API_USER,
+            postgres_password=PG_API_PASSWORD,
+            async_mode=True,
+        )
+    return _API_REPLICA_POSTGRES_URI
+
+
 def get_superuser_postgres_uri() -> str:
     global _SUPERUSER_POSTGRES_URI
     if _SUPERUSER_POSTGRES_URI is None:
@@ -143,14 +328,16 @@ def get_superuser_engine() -> Engine:
     """Get a sync superuser engine for use with Alembic migrations."""
     global _SUPERUSER_ENGINE
     if _SUPERUSER_ENGINE is None:
-        _SUPERUSER_ENGINE = _create_sync_engine(get_superuser_postgres_uri())
+        _SUPERUSER_ENGINE = _create_sync_engine(
+            get_superuser_postgres_uri(), "superuser"
+        )
     return _SUPERUSER_ENGINE
 
 
 def _get_admin_resources() -> _LoopResources:
     loop = asyncio.get_running_loop()
     if loop not in _admin_resources:
-        engine = _create_async_engine(get_admin_postgres_uri())
+        engine = _create_async_engine(get_admin_postgres_uri(), "admin")
         _admin_resources[loop] = _LoopResources(
             engine=engine,
             sessionmaker=async_sessionmaker(bind=engine, expire_on_commit=False),
@@ -161,7 +348,7 @@ def _get_admin_resources() -> _LoopResources:
 def _get_api_resources() -> _LoopResources:
     loop = asyncio.get_running_loop()
     if loop not in _api_resources:
-        engine = _create_async_engine(get_api_postgres_uri())
+        engine = _create_async_engine(get_api_postgres_uri(), "api")
         _api_resources[loop] = _LoopResources(
             engine=engine,
             sessionmaker=async_sessionmaker(bind=engine, expire_on_commit=False),
@@ -169,6 +356,17 @@ def _get_api_resources() -> _LoopResources:
     return _api_resources[loop]
 
 
+def _get_api_replica_resources() -> _ReplicaLoopResources:
+    loop = asyncio.get_running_loop()
+    if loop not in _api_replica_resources:
+        engine = _create_async_engine(get_api_replica_postgres_uri(), "api_replica")
+        _api_replica_resources[loop] = _ReplicaLoopResources(
+            engine=engine,
+            sessionmaker=async_sessionmaker(bind=engine, expire_on_commit=False),
+        )
+    return _api_replica_resources[loop]
+
+
 def get_admin_engine() -> AsyncEngine:
     return _get_admin_resources().engine
 
@@ -185,6 +383,57 @@ def get_api_sessionmaker() -> async_sessionmaker[AsyncSession]:
     return _get_api_resources().sessionmaker
 
 
+def get_api_replica_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    return _get_api_replica_resources().sessionmaker
+
+
+async def dispose_engines() -> None:
+    """Close the running event loop's engines and their pooled connections.
+
+    Call before closing a long-lived loop (e.g. a Celery worker's); the engines are
+    recreated if the loop is used again.
+    """
+    loop = asyncio.get_running_loop()
+    for resources in (_admin_resources, _api_resources, _api_replica_resources):
+        if (loop_resources := resources.pop(loop, None)) is not None:
+            await loop_resources.engine.dispose()
+
+
+# A replica that has replayed everything it received is caught up, however long ago
+# the last transaction was; otherwise it's as far behind as its last replayed commit.
+# A primary (e.g. a local stand-in for a replica) is never behind.
+_REPLICA_LAG_QUERY = sa.text("""
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())
+END
+""")
+
+
+async def get_replica_lag() -> float | None:
+    """The replica's replication lag in seconds, or None if it's unreachable.
+
+    Measured at most once per `PG_REPLICA_LAG_CHECK_INTERVAL_SECONDS` per event loop;
+    requests in between reuse the last measurement.
+    """
+    resources = _get_api_replica_resources()
+    now = time.monotonic()
+    if now - resources.lag_checked_at < PG_REPLICA_LAG_CHECK_INTERVAL_SECONDS:
+        return resources.lag_seconds
+
+    # Claimed before measuring, so concurrent requests don't all measure at once
+    resources.lag_checked_at = now
+    try:
+        async with resources.engine.connect() as conn:
+            lag = await conn.scalar(_REPLICA_LAG_QUERY)
+    except (sa.exc.SQLAlchemyError, OSError, TimeoutError):
+        LOGGER.warning("Replica unreachable, reading from the primary", exc_info=True)
+        lag = None
+    resources.lag_seconds = None if lag is None else float(lag)
+    return resources.lag_seconds
+
+
 def get_admin_session() -> AsyncSession:
     """Get a new admin session. Use `async with` to ensure the session is closed."""
     return get_admin_sessionmaker()()
@@ -193,3 +442,12 @@ def get_admin_session() -> AsyncSession:
 def get_api_session() -> AsyncSession:
     """Get a new API session. Use `async with` to ensure the session is closed."""
     return get_api_sessionmaker()()
+
+
+def get_api_replica_session() -> AsyncSession:
+    """Get a new read-only API session on the replica.
+
+    Use `async with` to ensure the session is closed. Check `replica_is_configured()`
+    first, and `get_replica_lag()` if the reads can tolerate only so much lag.
+    """
+    return get_api_replica_sessionmaker()()
@@ -0,0 +1,89 @@
+"""Task data CLI commands."""
+
+import asyncio
+from pathlib import Path
+
+from rich.console import Console
+from tqdm import tqdm
+
+import blanket.io.click as click
+from blanket.importer.tasks import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_WORKERS,
+    ImportFormat,
+    count_records,
+    import_tasks,
+)
+
+console = Console()
+
+
+@click.group()
+def tasks():
+    """Task data utilities."""
+    pass
+
+
+@tasks.command("import")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option(
+    "--format",
+    "import_format",
+    type=click.Choice([f.value for f in ImportFormat]),
+    help="File format; inferred from the file extension by default",
+)
+@click.option(
+    "--creator-id",
+    type=int,
+    help="Creator of records that don't have a creator_id",
+)
+@click.option(
+    "--batch-size", default=DEFAULT_BATCH_SIZE, help="Records per COPY transaction"
+)
+@click.option(
+    "--workers", "-w", default=DEFAULT_WORKERS, help="Batches loaded concurrently"
+)
+def import_(
+    path: Path,
+    import_format: str | None,
+    creator_id: int | None,
+    batch_size: int,
+    workers: int,
+):
+    """Bulk-load tasks from a CSV, NDJSON or Parquet file.
+
+    Records need a title and may set description, priority, completed, created_at and
+    creator_id. Records with an id update that task if it exists. Invalid records are
+    skipped and reported.
+    """
+    try:
+        resolved_format = (
+            ImportFormat(import_format)
+            if import_format
+            else ImportFormat.from_path(path)
+        )
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--format") from e
+
+    with tqdm(
+        total=count_records(path, resolved_format), unit="rows", unit_scale=True
+    ) as progress:
+        report = asyncio.run(
+            import_tasks(
+                path,
+                import_format=resolved_format,
+                default_creator_id=creator_id,
+                batch_size=batch_size,
+                workers=workers,
+                on_progress=progress.update,
+            )
+        )
+
+    console.print(
+        f"[green]Inserted {report.inserted:,} and updated {report.updated:,} "
+        f"tasks[/green]"
+    )
+    if report.invalid:
+        console.print(f"[yellow]Skipped {report.invalid:,} invalid records:[/yellow]")
+        for error in report.errors:
+            console.print(error)
@@ -0,0 +1,351 @@
+"""Bulk-load tasks from CSV, NDJSON or Parquet files with `COPY`.
+
+Records are validated against `TaskCreate` (plus the import-only fields of
+`TaskImportRow`) and grouped into batches. Each of several workers, with its own
+connection, copies a batch into a temporary staging table with `COPY` and upserts it
+into `tasks` in a single transaction. Rows with an `id` that already exists update that
+task; the rest are inserted. Batches are partitioned by `id`, so every record for an ID
+is loaded by the same worker, in file order.
+
+Reading and validation run in a thread, so they overlap with the workers' database
+round trips.
+"""
+
+import asyncio
+import csv
+import datetime
+import json
+import threading
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from enum import StrEnum
+from pathlib import Path
+from typing import Any
+
+from pydantic import ValidationError
+
+from blanket.api.interfaces import TaskCreate
+from blanket.db.session import get_admin_engine
+
+DEFAULT_BATCH_SIZE = 10_000
+DEFAULT_WORKERS = 4
+MAX_REPORTED_ERRORS = 20
+
+_STAGING_TABLE = "task_import_staging"
+_COLUMNS = (
+    "id",
+    "creator_id",
+    "title",
+    "description",
+    "completed",
+    "priority",
+    "created_at",
+)
+
+_CREATE_STAGING_TABLE = f"""
+CREATE TEMP TABLE IF NOT EXISTS {_STAGING_TABLE} (
+    id integer,
+    creator_id integer NOT NULL,
+    title varchar NOT NULL,
+    description varchar,
+    completed boolean NOT NULL,
+    priority varchar NOT NULL,
+    created_at timestamptz
+) ON COMMIT DELETE ROWS
+"""
+
+# xmax is 0 only for freshly inserted rows, which tells inserts and updates apart
+_UPSERT_FROM_STAGING = f"""
+WITH upserted AS (
+    INSERT INTO tasks (
+        id, creator_id, title, description, completed, priority,
+        created_at, updated_at
+    )
+    SELECT
+        coalesce(id, nextval(pg_get_serial_sequence('tasks', 'id'))),
+        creator_id, title, description, completed, priority,
+        coalesce(created_at, now()), now()
+    FROM {_STAGING_TABLE}
+    ON CONFLICT (id) DO UPDATE SET
+        creator_id = excluded.creator_id,
+        title = excluded.title,
+        description = excluded.description,
+        completed = excluded.completed,
+        priority = excluded.priority,
+        updated_at = excluded.updated_at
+    RETURNING xmax = 0 AS inserted
+)
+SELECT
+    count(*) FILTER (WHERE inserted) AS inserted,
+    count(*) FILTER (WHERE NOT inserted) AS updated
+FROM upserted
+"""
+
+# Explicit IDs bypass the sequence, so move it past them. Taking nextval() into account
+# keeps it from moving backwards past IDs concurrent inserts were handed.
+_SYNC_ID_SEQUENCE = """
+SELECT setval(
+    pg_get_serial_sequence('tasks', 'id'),
+    greatest(
+        (SELECT max(id) FROM tasks),
+        nextval(pg_get_serial_sequence('tasks', 'id'))
+    )
+)
+"""
+
+
+class TaskImportRow(TaskCreate):
+    """A task to import: `TaskCreate`, plus fields only imports may set."""
+
+    id: int | None = None
+    """Update the task with this ID if it exists, rather than inserting a new one."""
+    creator_id: int
+    completed: bool = False
+    created_at: datetime.datetime | None = None
+
+    def to_record(self) -> tuple:
+        return (
+            self.id,
+            self.creator_id,
+            self.title,
+            self.description,
+            self.completed,
+            self.priority.value,
+            self.created_at,
+        )
+
+
+class ImportFormat(StrEnum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+    PARQUET = "parquet"
+
+    @classmethod
+    def from_path(cls, path: Path) -> "ImportFormat":
+        match path.suffix.lower():
+            case ".csv":
+                return cls.CSV
+            case ".ndjson" | ".jsonl":
+                return cls.NDJSON
+            case ".parquet":
+                return cls.PARQUET
+        raise ValueError(f"Can't infer the format of {path}; pass it explicitly")
+
+
+@dataclass
+class ImportReport:
+    inserted: int = 0
+    updated: int = 0
+    invalid: int = 0
+    errors: list[str] = field(default_factory=list)
+    """Messages for the first `MAX_REPORTED_ERRORS` invalid records."""
+
+
+@dataclass
+class _MalformedRecord:
+    """A record a reader couldn't parse, reported as invalid in its place."""
+
+    error: str
+
+
+def _read_csv(path: Path, batch_size: int) -> Iterator[dict[str, Any]]:
+    with path.open(newline="") as f:
+        for record in csv.DictReader(f):
+            # CSV has no null, so treat empty cells as missing
+            yield {key: value for key, value in record.items() if value != ""}
+
+
+def _read_ndjson(
+    path: Path, batch_size: int
+) -> Iterator[dict[str, Any] | _MalformedRecord]:
+    with path.open() as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield _MalformedRecord(f"Invalid JSON: {e}")
+                continue
+            if isinstance(record, dict):
+                yield record
+            else:
+                yield _MalformedRecord("Expected a JSON object")
+
+
+def _import_pyarrow_parquet():
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError(
+            "Importing Parquet files requires pyarrow; install it with `uv add pyarrow`"
+        ) from e
+    return pq
+
+
+def _read_parquet(path: Path, batch_size: int) -> Iterator[dict[str, Any]]:
+    pq = _import_pyarrow_parquet()
+    for record_batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+        yield from record_batch.to_pylist()
+
+
+_READERS: dict[
+    ImportFormat,
+    Callable[[Path, int], Iterator[dict[str, Any] | _MalformedRecord]],
+] = {
+    ImportFormat.CSV: _read_csv,
+    ImportFormat.NDJSON: _read_ndjson,
+    ImportFormat.PARQUET: _read_parquet,
+}
+
+
+def count_records(path: Path, import_format: ImportFormat) -> int | None:
+    """The number of records in the file, if it's cheap to know up front."""
+    if import_format is not ImportFormat.PARQUET:
+        return None
+    return _import_pyarrow_parquet().ParquetFile(path).metadata.num_rows
+
+
+def _validated_batches(
+    path: Path,
+    import_format: ImportFormat,
+    batch_size: int,
+    default_creator_id: int | None,
+    report: ImportReport,
+    partitions: int = 1,
+) -> Iterator[tuple[int, list[tuple]]]:
+    """Valid records in batches, each with the partition that must load it.
+
+    Records with an `id` always fall in partition `id % partitions`, so a single loader
+    applies every record for an ID, in file order: the last one wins, and concurrent
+    loaders never upsert the same row. Records without one are spread evenly.
+    """
+    unkeyed: list[list[tuple]] = [[] for _ in range(partitions)]
+    keyed: list[dict[int, tuple]] = [{} for _ in range(partitions)]
+
+    def flush(partition: int) -> tuple[int, list[tuple]]:
+        records = [*unkeyed[partition], *keyed[partition].values()]
+        unkeyed[partition].clear()
+        keyed[partition].clear()
+        return partition, records
+
+    def reject(number: int, error: object) -> None:
+        report.invalid += 1
+        if len(report.errors) < MAX_REPORTED_ERRORS:
+            report.errors.append(f"Record {number}: {error}")
+
+    records = _READERS[import_format](path, batch_size)
+    for number, record in enumerate(records, start=1):
+        if isinstance(record, _MalformedRecord):
+            reject(number, record.error)
+            continue
+        if default_creator_id is not None:
+            record.setdefault("creator_id", default_creator_id)
+        try:
+            row = TaskImportRow.model_validate(record)
+        except ValidationError as e:
+            reject(number, e)
+            continue
+
+        # An upsert can't touch the same row twice, so the last record per ID wins
+        if row.id is None:
+            partition = number % partitions
+            unkeyed[partition].append(row.to_record())
+        else:
+            partition = row.id % partitions
+            keyed[partition][row.id] = row.to_record()
+        if len(unkeyed[partition]) + len(keyed[partition]) >= batch_size:
+            yield flush(partition)
+
+    for partition in range(partitions):
+        if unkeyed[partition] or keyed[partition]:
+            yield flush(partition)
+
+
+async def _load_batches(
+    queue: asyncio.Queue[list[tuple] | None],
+    report: ImportReport,
+    on_progress: Callable[[int], None],
+) -> None:
+    async with get_admin_engine().connect() as conn:
+        raw_connection = await conn.get_raw_connection()
+        # COPY is driver-specific, so this talks to asyncpg directly
+        driver = raw_connection.driver_connection
+        await driver.execute(_CREATE_STAGING_TABLE)
+        while (records := await queue.get()) is not None:
+            async with driver.transaction():
+                await driver.copy_records_to_table(
+                    _STAGING_TABLE, records=records, columns=_COLUMNS
+                )
+                counts = await driver.fetchrow(_UPSERT_FROM_STAGING)
+            report.inserted += counts["inserted"]
+            report.updated += counts["updated"]
+            on_progress(len(records))
+
+
+async def import_tasks(
+    path: Path,
+    *,
+    import_format: ImportFormat | None = None,
+    default_creator_id: int | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int = DEFAULT_WORKERS,
+    on_progress: Callable[[int], None] = lambda _: None,
+) -> ImportReport:
+    """Load the tasks in `path` into the database.
+
+    Args:
+        path: A CSV, NDJSON or Parquet file of task records.
+        import_format: The file's format; inferred from its extension by default.
+        default_creator_id: The creator of records without a `creator_id`.
+        batch_size: Records per `COPY` and upsert transaction.
+        workers: Batches loaded concurrently, each over its own connection.
+        on_progress: Called with the number of records in each loaded batch.
+    """
+    import_format = import_format or ImportFormat.from_path(path)
+    report = ImportReport()
+    # One queue per loader, each for a partition of the batches. Bounded, so reading
+    # never runs far ahead of loading.
+    queues: list[asyncio.Queue[list[tuple] | None]] = [
+        asyncio.Queue(maxsize=2) for _ in range(workers)
+    ]
+    loop = asyncio.get_running_loop()
+    stop_reading = threading.Event()
+
+    def read() -> None:
+        batches = _validated_batches(
+            path, import_format, batch_size, default_creator_id, report, workers
+        )
+        for partition, batch in batches:
+            if stop_reading.is_set():
+                return
+            asyncio.run_coroutine_threadsafe(
+                queues[partition].put(batch), loop
+            ).result()
+
+    loaders = [
+        asyncio.create_task(_load_batches(queue, report, on_progress))
+        for queue in queues
+    ]
+
+    async def feed() -> None:
+        await asyncio.to_thread(read)
+        for queue in queues:
+            await queue.put(None)
+
+    try:
+        await asyncio.gather(feed(), *loaders)
+    except BaseException:
+        stop_reading.set()
+        for loader in loaders:
+            loader.cancel()
+        # Unblock the reader if it's waiting for room in a queue
+        for queue in queues:
+            while not queue.empty():
+                queue.get_nowait()
+        raise
+
+    async with get_admin_engine().connect() as conn:
+        raw_connection = await conn.get_raw_connection()
+        await raw_connection.driver_connection.execute(_SYNC_ID_SEQUENCE)
+    return report
@@ -0,0 +1,45 @@
+"""A shared, connection-pooled async HTTP client for outbound requests.
+
+Creating an `httpx` client per request pays for a new TCP and TLS handshake every time.
+Instead, each event loop gets one long-lived client whose keep-alive connections are
+reused across requests and recycled after `HTTP_KEEPALIVE_EXPIRY_SECONDS` idle.
+"""
+
+import asyncio
+import weakref
+from asyncio import AbstractEventLoop
+
+import httpx
+
+HTTP_TIMEOUT_SECONDS = 5.0
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+HTTP_KEEPALIVE_EXPIRY_SECONDS = 60.0
+
+_http_clients: weakref.WeakKeyDictionary[AbstractEventLoop, httpx.AsyncClient] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared HTTP client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _http_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=HTTP_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+        )
+        _http_clients[loop] = client
+    return client
+
+
+async def close_http_client() -> None:
+    """Close the running event loop's HTTP client, if one was created."""
+    client = _http_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
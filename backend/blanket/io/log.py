@@ -18,6 +18,8 @@ def configure_logging():
 
     structlog.configure(
         processors=[
+            # Fields bound for the current request (see blanket.api.timing)
+            structlog.contextvars.merge_contextvars,
             structlog.stdlib.filter_by_level,
             structlog.stdlib.add_logger_name,
             structlog.stdlib.add_log_level,
@@ -0,0 +1,525 @@
+"""Prometheus-style metrics, kept in process and aggregated across processes.
+
+Metrics are `Counter`s, `Gauge`s and `Histogram`s registered in `REGISTRY` when their
+module is imported. Recording a value is a dict lookup and an addition, so it's cheap
+enough to do on every request. `CallbackMetric`s instead read running totals another
+module already keeps (e.g. the pool stats in blanket.db.pool) whenever they're
+collected. `render_metrics` formats everything in the Prometheus text format.
+
+Each gunicorn worker and Celery process has its own registry. When
+`BLANKET_METRICS_DIR` is set, `start_metrics_writer` makes a process write a snapshot
+of its registry there every `BLANKET_METRICS_FLUSH_INTERVAL_SECONDS`, and
+`render_metrics` merges every process' snapshot (writing its own first):
+
+- counters and histograms are summed, including those of processes that have exited,
+  so totals don't go backwards when a worker restarts;
+- gauges are summed over live processes only.
+
+A snapshot that hasn't been updated for `_STALE_AFTER_SECONDS` is taken to belong to a
+process that died; its counters are folded into an archive file and the snapshot is
+removed. Processes may share the directory across containers on one host (e.g. the API
+and Celery on one volume). Scrapes see other processes' values as of their last
+snapshot, so up to one flush interval old.
+
+Without `BLANKET_METRICS_DIR`, a scrape reports only the process that serves it.
+"""
+
+import bisect
+import contextlib
+import fcntl
+import json
+import math
+import os
+import socket
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, ClassVar
+
+import blanket.io.env as env
+from blanket.io.log import LOGGER
+
+# Empty (as in .env.example) means unset, not the working directory
+METRICS_DIR = env.getenv("BLANKET_METRICS_DIR") or None
+METRICS_FLUSH_INTERVAL_SECONDS = float(
+    env.getenv("BLANKET_METRICS_FLUSH_INTERVAL_SECONDS", "5")
+)
+# The writer is a thread of its own, so a busy event loop doesn't delay snapshots; one
+# this far behind belongs to a process that's gone
+_STALE_AFTER_SECONDS = max(60.0, 10 * METRICS_FLUSH_INTERVAL_SECONDS)
+_SNAPSHOT_SUFFIX = ".snapshot.json"
+_ARCHIVE_FILE = "archive.json"
+_LOCK_FILE = ".lock"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = tuple[str, ...]
+
+
+@dataclass
+class MetricFamily:
+    """A metric's samples, as they're snapshotted, merged and rendered."""
+
+    name: str
+    type: str
+    help: str
+    label_names: tuple[str, ...] = ()
+    buckets: tuple[float, ...] = ()
+    samples: dict[LabelValues, Any] = field(default_factory=dict)
+    """Values per label set. For histograms, a list of the count in each bucket (not
+    cumulative), then +Inf's, then the sum of observations."""
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "type": self.type,
+            "help": self.help,
+            "label_names": self.label_names,
+            "buckets": self.buckets,
+            "samples": [[labels, value] for labels, value in self.samples.items()],
+        }
+
+    @classmethod
+    def from_json(cls, data: dict[str, Any]) -> "MetricFamily":
+        return cls(
+            name=data["name"],
+            type=data["type"],
+            help=data["help"],
+            label_names=tuple(data["label_names"]),
+            buckets=tuple(data["buckets"]),
+            samples={tuple(labels): value for labels, value in data["samples"]},
+        )
+
+    def merge(self, other: "MetricFamily") -> None:
+        """Add `other`'s samples to this family's."""
+        if (other.type, other.label_names, other.buckets) != (
+            self.type,
+            self.label_names,
+            self.buckets,
+        ):
+            # Recorded by a different version of the code; can't be combined
+            return
+        for labels, value in other.samples.items():
+            current = self.samples.get(labels)
+            if current is None:
+                self.samples[labels] = list(value) if isinstance(value, list) else value
+            elif self.type == "histogram":
+                self.samples[labels] = [
+                    a + b for a, b in zip(current, value, strict=True)
+                ]
+            else:
+                self.samples[labels] = current + value
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric | CallbackMetric] = {}
+
+    def register(self, metric: "_Metric | CallbackMetric") -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name!r} is already registered")
+        self._metrics[metric.name] = metric
+
+    def families(self) -> list[MetricFamily]:
+        return [metric.family() for metric in list(self._metrics.values())]
+
+
+REGISTRY = Registry()
+
+
+class _CounterValue:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def snapshot(self) -> float:
+        return self.value
+
+
+class _GaugeValue(_CounterValue):
+    __slots__ = ()
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        # Buckets are inclusive of their upper bound
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def snapshot(self) -> list[float]:
+        return [*self.counts, self.sum]
+
+
+class _Metric:
+    type: ClassVar[str]
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        *,
+        registry: Registry | None = REGISTRY,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._children: dict[LabelValues, Any] = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def labels(self, *values: str) -> Any:
+        """The value for one combination of label values, in `labels` order."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(
+                    f"{self.name} takes labels {self.label_names}, got {values}"
+                )
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def _buckets(self) -> tuple[float, ...]:
+        return ()
+
+    def family(self) -> MetricFamily:
+        return MetricFamily(
+            name=self.name,
+            type=self.type,
+            help=self.documentation,
+            label_names=self.label_names,
+            buckets=self._buckets(),
+            samples={
+                labels: child.snapshot()
+                for labels, child in list(self._children.items())
+            },
+        )
+
+
+class Counter(_Metric):
+    """A total that only goes up, e.g. requests served."""
+
+    type = "counter"
+
+    def _new_child(self) -> _CounterValue:
+        return _CounterValue()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, e.g. requests in flight."""
+
+    type = "gauge"
+
+    def _new_child(self) -> _GaugeValue:
+        return _GaugeValue()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class Histogram(_Metric):
+    """Counts of observations (e.g. latencies in seconds) by bucket, and their sum."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        *,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry: Registry | None = REGISTRY,
+    ):
+        self.bounds = tuple(sorted(float(bound) for bound in buckets))
+        super().__init__(name, documentation, labels, registry=registry)
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.bounds)
+
+    def _buckets(self) -> tuple[float, ...]:
+        return self.bounds
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+
+class CallbackMetric:
+    """A counter or gauge whose samples are read from `callback` when collected.
+
+    `callback` returns (label values, value) pairs; for counters, the values must be
+    this process' running totals.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        type: str,
+        labels: Sequence[str],
+        callback: Callable[[], Iterable[tuple[LabelValues, float]]],
+        *,
+        registry: Registry | None = REGISTRY,
+    ):
+        if type not in ("counter", "gauge"):
+            raise ValueError(f"Callback metrics are counters or gauges, not {type!r}")
+        self.name = name
+        self.documentation = documentation
+        self.type = type
+        self.label_names = tuple(labels)
+        self.callback = callback
+        if registry is not None:
+            registry.register(self)
+
+    def family(self) -> MetricFamily:
+        samples: dict[LabelValues, float] = {}
+        for labels, value in self.callback():
+            samples[labels] = samples.get(labels, 0.0) + value
+        return MetricFamily(
+            name=self.name,
+            type=self.type,
+            help=self.documentation,
+            label_names=self.label_names,
+            samples=samples,
+        )
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _sample_line(name: str, labels: Iterable[tuple[str, str]], value: float) -> str:
+    label_str = ",".join(f'{key}="{_escape_label(val)}"' for key, val in labels)
+    if label_str:
+        return f"{name}{{{label_str}}} {_format_value(value)}"
+    return f"{name} {_format_value(value)}"
+
+
+def format_metrics(families: Iterable[MetricFamily]) -> str:
+    """Format families in the Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    for family in families:
+        help_text = family.help.replace("\\", r"\\").replace("\n", r"\n")
+        lines.append(f"# HELP {family.name} {help_text}")
+        lines.append(f"# TYPE {family.name} {family.type}")
+        for labels, value in family.samples.items():
+            pairs = list(zip(family.label_names, labels, strict=True))
+            if family.type != "histogram":
+                lines.append(_sample_line(family.name, pairs, value))
+                continue
+            cumulative = 0
+            for bound, count in zip(
+                (*family.buckets, math.inf), value[:-1], strict=True
+            ):
+                cumulative += count
+                le = ("le", _format_value(bound))
+                lines.append(
+                    _sample_line(f"{family.name}_bucket", [*pairs, le], cumulative)
+                )
+            lines.append(_sample_line(f"{family.name}_sum", pairs, value[-1]))
+            lines.append(_sample_line(f"{family.name}_count", pairs, cumulative))
+    return "\n".join(lines) + "\n"
+
+
+def _merge_into(
+    merged: dict[str, MetricFamily],
+    families: Iterable[MetricFamily],
+    *,
+    include_gauges: bool,
+) -> None:
+    for family in families:
+        if family.type == "gauge" and not include_gauges:
+            continue
+        if family.name in merged:
+            merged[family.name].merge(family)
+        else:
+            merged[family.name] = MetricFamily(
+                name=family.name,
+                type=family.type,
+                help=family.help,
+                label_names=family.label_names,
+                buckets=family.buckets,
+            )
+            merged[family.name].merge(family)
+
+
+def _read_families(path: Path) -> list[MetricFamily] | None:
+    try:
+        return [MetricFamily.from_json(data) for data in json.loads(path.read_text())]
+    except FileNotFoundError:
+        return None
+    except (ValueError, KeyError, TypeError):
+        LOGGER.warning("Ignoring unreadable metrics snapshot", path=str(path))
+        return None
+
+
+def _write_families(path: Path, families: Iterable[MetricFamily]) -> None:
+    # Written aside and renamed into place, so readers never see a partial file
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps([family.to_json() for family in families]))
+    tmp.replace(path)
+
+
+def _snapshot_path(directory: Path) -> Path:
+    return directory / f"{socket.gethostname()}-{os.getpid()}{_SNAPSHOT_SUFFIX}"
+
+
+@contextlib.contextmanager
+def _directory_lock(directory: Path) -> Iterator[None]:
+    """Serialize archiving, so no snapshot is folded into the archive twice."""
+    with (directory / _LOCK_FILE).open("a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def write_snapshot(registry: Registry = REGISTRY) -> None:
+    """Write this process' snapshot to `BLANKET_METRICS_DIR`."""
+    if METRICS_DIR is None:
+        return
+    directory = Path(METRICS_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    _write_families(_snapshot_path(directory), registry.families())
+
+
+def _collect_directory(directory: Path) -> list[MetricFamily]:
+    merged: dict[str, MetricFamily] = {}
+    with _directory_lock(directory):
+        archive_path = directory / _ARCHIVE_FILE
+        archive: dict[str, MetricFamily] = {}
+        _merge_into(archive, _read_families(archive_path) or [], include_gauges=False)
+        archived_any = False
+        now = time.time()
+        own_path = _snapshot_path(directory)
+        # This process' first, so its definitions win over other code versions'
+        paths = sorted(
+            directory.glob(f"*{_SNAPSHOT_SUFFIX}"), key=lambda p: (p != own_path, p)
+        )
+        for path in paths:
+            try:
+                stale = now - path.stat().st_mtime > _STALE_AFTER_SECONDS
+            except FileNotFoundError:
+                continue
+            families = _read_families(path)
+            if families is None:
+                continue
+            if stale:
+                _merge_into(archive, families, include_gauges=False)
+                path.unlink(missing_ok=True)
+                archived_any = True
+            else:
+                _merge_into(merged, families, include_gauges=True)
+        if archived_any:
+            _write_families(archive_path, archive.values())
+    _merge_into(merged, archive.values(), include_gauges=False)
+    return list(merged.values())
+
+
+def render_metrics(
+    extra: Iterable[MetricFamily] = (), registry: Registry = REGISTRY
+) -> str:
+    """Every process' metrics (or just this one's; see above), plus `extra`, as text.
+
+    Reads and writes files when `BLANKET_METRICS_DIR` is set, so call it from a thread
+    rather than an event loop.
+    """
+    if METRICS_DIR is None:
+        families = registry.families()
+    else:
+        write_snapshot(registry)
+        families = _collect_directory(Path(METRICS_DIR))
+    return format_metrics([*families, *extra])
+
+
+_writer: threading.Thread | None = None
+_stop_writer = threading.Event()
+
+
+def _write_periodically(registry: Registry) -> None:
+    while True:
+        try:
+            write_snapshot(registry)
+        except OSError:
+            LOGGER.warning("Failed to write metrics snapshot", exc_info=True)
+        if _stop_writer.wait(METRICS_FLUSH_INTERVAL_SECONDS):
+            return
+
+
+def start_metrics_writer(registry: Registry = REGISTRY) -> None:
+    """Snapshot this process' metrics periodically, if `BLANKET_METRICS_DIR` is set.
+
+    Call in each process once it has forked; threads don't survive a fork.
+    """
+    global _writer
+    if METRICS_DIR is None or (_writer is not None and _writer.is_alive()):
+        return
+    _stop_writer.clear()
+    _writer = threading.Thread(
+        target=_write_periodically, args=(registry,), name="metrics-writer", daemon=True
+    )
+    _writer.start()
+
+
+def stop_metrics_writer(registry: Registry = REGISTRY) -> None:
+    """Stop snapshotting, and archive this process' counters as it exits.
+
+    Its gauges then stop counting straight away, rather than once its snapshot goes
+    stale.
+    """
+    if METRICS_DIR is None or _writer is None:
+        return
+    _stop_writer.set()
+    _writer.join()
+    directory = Path(METRICS_DIR)
+    try:
+        with _directory_lock(directory):
+            archive: dict[str, MetricFamily] = {}
+            archive_path = directory / _ARCHIVE_FILE
+            for families in (_read_families(archive_path) or [], registry.families()):
+                _merge_into(archive, families, include_gauges=False)
+            _write_families(archive_path, archive.values())
+            _snapshot_path(directory).unlink(missing_ok=True)
+    except OSError:
+        LOGGER.warning("Failed to archive metrics", exc_info=True)
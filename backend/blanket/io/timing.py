@@ -0,0 +1,62 @@
+"""Per-request timing breakdowns.
+
+`ServerTimingMiddleware` (blanket.api.timing) starts a `RequestTimings` for each
+request in a context variable. Code along the request's path adds to it: the database
+hooks (query time, count and pool wait), and `timing_phase` blocks around auth, RLS
+setup and serialization. Outside a request, recording is a no-op.
+"""
+
+import contextlib
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+
+@dataclass
+class RequestTimings:
+    db_s: float = 0.0
+    db_queries: int = 0
+    pool_wait_s: float = 0.0
+    phases: dict[str, float] = field(default_factory=dict)
+    """Seconds spent in each named `timing_phase`; phases may overlap the DB time."""
+    statements: Counter[str] | None = None
+    """How often each SQL statement ran, if tracked (for spotting N+1 queries)."""
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+
+_current_timings: ContextVar[RequestTimings | None] = ContextVar(
+    "request_timings", default=None
+)
+
+
+def get_request_timings() -> RequestTimings | None:
+    return _current_timings.get()
+
+
+@contextlib.contextmanager
+def track_request_timings(track_statements: bool = False) -> Iterator[RequestTimings]:
+    """Record timings for the code run within, including tasks it starts."""
+    timings = RequestTimings(statements=Counter() if track_statements else None)
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+@contextlib.contextmanager
+def timing_phase(name: str) -> Iterator[None]:
+    """Add the time spent within to the current request's `name` phase."""
+    timings = _current_timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add_phase(name, time.perf_counter() - started)
@@ -1,15 +1,80 @@
-from celery import Celery, signals
+import functools
+import time
+from collections.abc import Callable, Coroutine
+from typing import Any, ParamSpec, TypeVar
+
+from celery import Celery, Task, signals
 
 from blanket.db.redis import get_redis_url
 from blanket.io.log import safe_init_sentry
+from blanket.io.metrics import (
+    Counter,
+    Histogram,
+    start_metrics_writer,
+    stop_metrics_writer,
+)
+from blanket.jobs.loop import close_worker_loop, get_worker_loop, run_in_worker_loop
 from blanket.jobs.schedule import BEAT_SCHEDULE
 
+P = ParamSpec("P")
+R = TypeVar("R")
+
+CELERY_TASKS = Counter(
+    "blanket_celery_tasks_total",
+    "Celery tasks finished, by task and final state.",
+    ["task", "state"],
+)
+CELERY_TASK_SECONDS = Histogram(
+    "blanket_celery_task_duration_seconds",
+    "Time Celery tasks took to run.",
+    ["task"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0),
+)
+
+_task_started_at: dict[str, float] = {}
+
 
 @signals.celeryd_init.connect
 def init_sentry(**_kwargs):
     safe_init_sentry()
 
 
+@signals.worker_process_init.connect
+def init_metrics(**_kwargs):
+    # Each pool process writes its own metrics snapshot for the API to aggregate
+    start_metrics_writer()
+
+
+@signals.worker_process_init.connect
+def init_worker_loop(**_kwargs):
+    get_worker_loop()
+
+
+@signals.worker_process_shutdown.connect
+def shutdown_metrics(**_kwargs):
+    stop_metrics_writer()
+
+
+# Pool processes exit through worker_process_shutdown; the solo pool runs tasks in the
+# main process, which exits through worker_shutdown
+@signals.worker_process_shutdown.connect
+@signals.worker_shutdown.connect
+def shutdown_worker_loop(**_kwargs):
+    close_worker_loop()
+
+
+@signals.task_prerun.connect
+def record_task_start(task_id: str, **_kwargs):
+    _task_started_at[task_id] = time.perf_counter()
+
+
+@signals.task_postrun.connect
+def record_task_end(task_id: str, task, state: str | None = None, **_kwargs):
+    CELERY_TASKS.labels(task.name, str(state)).inc()
+    if (started_at := _task_started_at.pop(task_id, None)) is not None:
+        CELERY_TASK_SECONDS.labels(task.name).observe(time.perf_counter() - started_at)
+
+
 def get_celery_app() -> Celery:
     app = Celery("blanket", broker=get_redis_url(), include=["blanket.jobs.tasks"])
 
@@ -28,3 +93,23 @@ def get_celery_app() -> Celery:
 
 # Create singleton instance
 celery_app = get_celery_app()
+
+
+def async_task(
+    *args, **kwargs
+) -> Callable[[Callable[P, Coroutine[Any, Any, R]]], Task]:
+    """Like `celery_app.task`, for coroutine functions.
+
+    The task runs on its worker process' long-lived event loop (see
+    blanket.jobs.loop), so it shares database and Redis connection pools with the
+    process' other async tasks.
+    """
+
+    def decorator(fn: Callable[P, Coroutine[Any, Any, R]]) -> Task:
+        @functools.wraps(fn)
+        def run(*task_args: P.args, **task_kwargs: P.kwargs) -> R:
+            return run_in_worker_loop(fn(*task_args, **task_kwargs))
+
+        return celery_app.task(*args, **kwargs)(run)
+
+    return decorator
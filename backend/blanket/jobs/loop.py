@@ -0,0 +1,70 @@
+"""One long-lived event loop per Celery worker process, for async tasks.
+
+Database engines (blanket.db.session) and the Redis and HTTP clients are cached per
+event loop. Calling `asyncio.run` in a task would create a new loop, and with it new
+connection pools, for every task, and never close them. Instead, each worker process
+runs its async tasks (see `async_task` in blanket.jobs.celery) on one loop, created when
+the process starts and closed, along with its engines and clients, when it exits. Tasks
+after the first reuse its warm connection pools.
+
+Tasks run one at a time on the loop, so this suits the prefork (default) and solo
+pools, not the threads pool.
+"""
+
+import asyncio
+from asyncio import AbstractEventLoop
+from collections.abc import Coroutine
+from typing import Any, TypeVar
+
+from blanket.db.redis import close_redis_client
+from blanket.db.session import dispose_engines
+from blanket.io.http import close_http_client
+from blanket.io.log import LOGGER
+
+R = TypeVar("R")
+
+_worker_loop: AbstractEventLoop | None = None
+
+
+def get_worker_loop() -> AbstractEventLoop:
+    """This process' event loop for async tasks, created on first use."""
+    global _worker_loop
+    if _worker_loop is None or _worker_loop.is_closed():
+        _worker_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_worker_loop)
+    return _worker_loop
+
+
+def run_in_worker_loop(coro: Coroutine[Any, Any, R]) -> R:
+    """Run `coro` to completion on this process' event loop."""
+    loop = get_worker_loop()
+    if loop.is_running():
+        coro.close()
+        raise RuntimeError(
+            "The worker event loop is already running a task; await the coroutine "
+            "instead, or use a pool that runs one task per process at a time"
+        )
+    return loop.run_until_complete(coro)
+
+
+async def _close_loop_resources() -> None:
+    await dispose_engines()
+    await close_redis_client()
+    await close_http_client()
+
+
+def close_worker_loop() -> None:
+    """Close this process' event loop and everything cached for it, if it exists."""
+    global _worker_loop
+    loop = _worker_loop
+    if loop is None or loop.is_closed():
+        return
+    try:
+        loop.run_until_complete(_close_loop_resources())
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.run_until_complete(loop.shutdown_default_executor())
+    except Exception:
+        LOGGER.warning("Failed to clean up the worker event loop", exc_info=True)
+    finally:
+        loop.close()
+        _worker_loop = None
@@ -1,6 +1,15 @@
-from blanket.jobs.celery import celery_app
+import sqlalchemy as sa
+
+from blanket.db.session import get_admin_session
+from blanket.jobs.celery import async_task, celery_app
 
 
 @celery_app.task
 def healthy_job():
     print("healthy_job")
+
+
+@async_task()
+async def database_healthy_job() -> bool:
+    async with get_admin_session() as db:
+        return await db.scalar(sa.text("SELECT true"))
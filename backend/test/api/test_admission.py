@@ -0,0 +1,177 @@
+import asyncio
+from dataclasses import asdict
+
+import httpx
+import pytest
+
+from blanket.api import admission
+from blanket.api.admission import AdmissionControlMiddleware
+
+
+async def slow_app(scope, receive, send):
+    await asyncio.sleep(0.1)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+class GatedApp:
+    """Records the order requests start in, and holds them until opened."""
+
+    def __init__(self):
+        self.started: list[str] = []
+        self.gate = asyncio.Event()
+
+    async def __call__(self, scope, receive, send):
+        self.started.append(scope["path"])
+        await self.gate.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+
+def _client(app) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    )
+
+
+async def _wait_until(condition) -> None:
+    async with asyncio.timeout(1):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def pool_wait(monkeypatch) -> list[float]:
+    """The API pools' recent checkout wait, as admission control sees it."""
+    wait = [0.0]
+    monkeypatch.setattr(admission, "get_recent_checkout_wait", lambda _role: wait[0])
+    return wait
+
+
+class TestAdmissionControl:
+    async def test_sheds_load_beyond_concurrency_and_queue(self):
+        """Test that excess requests get a fast 503 while health checks still pass."""
+        app = AdmissionControlMiddleware(
+            slow_app, max_concurrency=2, max_queue=2, queue_timeout=1
+        )
+        async with _client(app) as c:
+            responses = await asyncio.gather(
+                *(c.get("/tasks") for _ in range(6)), c.get("/health")
+            )
+
+        statuses = [response.status_code for response in responses]
+        assert statuses == [200, 200, 200, 200, 503, 503, 200]
+        assert responses[4].headers["retry-after"] == "1"
+
+    async def test_admits_queued_requests_by_priority(self):
+        """Test that queued normal requests start before earlier low-priority ones."""
+        app = GatedApp()
+        middleware = AdmissionControlMiddleware(app, max_concurrency=1, queue_timeout=5)
+        async with _client(middleware) as c:
+            requests = [asyncio.create_task(c.get("/tasks/1"))]
+            await _wait_until(lambda: app.started)
+            paths = ("/tasks/export", "/tasks/bulk", "/tasks/2", "/tasks/3")
+            for queued, path in enumerate(paths, start=1):
+                requests.append(asyncio.create_task(c.post(path)))
+                await _wait_until(lambda n=queued: middleware._waiting == n)
+
+            app.gate.set()
+            responses = await asyncio.gather(*requests)
+
+        assert [response.status_code for response in responses] == [200] * 5
+        assert app.started == [
+            "/tasks/1",
+            "/tasks/2",
+            "/tasks/3",
+            "/tasks/export",
+            "/tasks/bulk",
+        ]
+
+    async def test_low_priority_requests_fill_half_the_queue(self):
+        app = GatedApp()
+        middleware = AdmissionControlMiddleware(
+            app, max_concurrency=1, max_queue=2, queue_timeout=5
+        )
+        async with _client(middleware) as c:
+            running = asyncio.create_task(c.get("/tasks"))
+            await _wait_until(lambda: app.started)
+            queued = asyncio.create_task(c.get("/tasks/export"))
+            await _wait_until(lambda: middleware._waiting == 1)
+
+            assert (await c.get("/tasks/export")).status_code == 503
+            app.gate.set()
+            assert (await running).status_code == 200
+            assert (await queued).status_code == 200
+
+    async def test_queue_timeouts_retry_after_the_timeout(self):
+        app = GatedApp()
+        middleware = AdmissionControlMiddleware(
+            app, max_concurrency=1, queue_timeout=0.2
+        )
+        async with _client(middleware) as c:
+            running = asyncio.create_task(c.get("/tasks"))
+            await _wait_until(lambda: app.started)
+            response = await c.get("/tasks")
+            app.gate.set()
+            await running
+
+        assert response.status_code == 503
+        # Rounded up to whole seconds, and never 0
+        assert response.headers["retry-after"] == "1"
+
+        middleware = AdmissionControlMiddleware(
+            slow_app, max_concurrency=1, max_queue=0, queue_timeout=2.5
+        )
+        async with _client(middleware) as c:
+            responses = await asyncio.gather(c.get("/tasks"), c.get("/tasks"))
+        assert responses[1].status_code == 503
+        assert responses[1].headers["retry-after"] == "3"
+
+
+class TestPoolSaturation:
+    async def test_sheds_low_priority_requests(self, pool_wait: list[float]):
+        middleware = AdmissionControlMiddleware(slow_app, shed_pool_wait=1)
+        rejected = admission.get_admission_stats().rejected_pool_saturated
+        async with _client(middleware) as c:
+            pool_wait[0] = 0.5
+            assert (await c.post("/tasks/bulk")).status_code == 200
+
+            pool_wait[0] = 2.5
+            response = await c.post("/tasks/bulk")
+            assert response.status_code == 503
+            # Retry once the pool has had about as long to recover
+            assert response.headers["retry-after"] == "3"
+            assert (await c.get("/tasks/export")).status_code == 503
+            # Normal requests are still admitted while there's free concurrency
+            assert (await c.get("/tasks")).status_code == 200
+            assert (await c.get("/health")).status_code == 200
+
+        stats = admission.get_admission_stats()
+        assert stats.rejected_pool_saturated == rejected + 2
+
+    async def test_queues_nothing_while_saturated(self, pool_wait: list[float]):
+        app = GatedApp()
+        middleware = AdmissionControlMiddleware(
+            app, max_concurrency=1, shed_pool_wait=1, queue_timeout=5
+        )
+        pool_wait[0] = 2
+        async with _client(middleware) as c:
+            running = asyncio.create_task(c.get("/tasks"))
+            await _wait_until(lambda: app.started)
+
+            response = await c.get("/tasks")
+            assert response.status_code == 503
+            assert response.headers["retry-after"] == "2"
+            assert middleware._waiting == 0
+
+            app.gate.set()
+            assert (await running).status_code == 200
+
+
+class TestAdmissionStats:
+    async def test_served_with_metrics_not_health(self, client: httpx.AsyncClient):
+        response = await client.get("/metrics/admission")
+        assert response.status_code == 200
+        stats = asdict(admission.get_admission_stats())
+        assert response.json().keys() == stats.keys()
+        assert (await client.get("/health/admission")).status_code == 404
@@ -0,0 +1,81 @@
+import json
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+from blanket.api.capture import TrafficCaptureMiddleware, anonymize_query
+from blanket.api.main import app
+
+
+class TestAnonymizeQuery:
+    """Only the shapes of identifying query values are kept."""
+
+    def test_free_text_and_unknown_params(self):
+        query = anonymize_query(
+            b"search=quarterly+budget+review&cursor=eyJpZCI6IDQyfQ&page=3"
+            b"&completed=true&owner=alice"
+        )
+
+        assert query == {
+            "search": {"words": 3, "length": 23},
+            "cursor": {"words": 1, "length": 14},
+            "page": "3",
+            "completed": "true",
+            "owner": {"words": 1, "length": 5},
+        }
+
+    def test_blank_values(self):
+        assert anonymize_query(b"search=&limit=") == {
+            "search": {"words": 0, "length": 0},
+            "limit": "",
+        }
+
+
+class TestTrafficCaptureMiddleware:
+    """Captured records keep the route, never the path."""
+
+    @pytest.fixture
+    async def capture_client(self, client: httpx.AsyncClient, tmp_path: Path):
+        captured = TrafficCaptureMiddleware(app, sample_rate=1, directory=tmp_path)
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=captured), base_url="http://test"
+        ) as capture_client:
+            yield capture_client
+
+    def _read_records(self, directory: Path, count: int) -> list[dict]:
+        # Written by a background thread
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            lines = [
+                line
+                for file in directory.glob("*.jsonl")
+                for line in file.read_text().splitlines()
+            ]
+            if len(lines) >= count:
+                return [json.loads(line) for line in lines]
+            time.sleep(0.01)
+        raise AssertionError(f"Expected {count} captured records")
+
+    async def test_record_has_no_path_or_ids(
+        self, capture_client: httpx.AsyncClient, tmp_path: Path
+    ):
+        response = await capture_client.get(
+            "/tasks/48213", params={"search": "secret plans", "limit": 5}
+        )
+        assert response.status_code == 404
+        await capture_client.get("/health")
+
+        (record,) = self._read_records(tmp_path, 1)
+        assert record["method"] == "GET"
+        assert record["route"] == "/tasks/{task_id}"
+        assert record["status"] == 404
+        assert record["query"] == {
+            "search": {"words": 2, "length": 12},
+            "limit": "5",
+        }
+        assert record["response_bytes"] > 0
+        serialized = json.dumps(record)
+        assert "48213" not in serialized
+        assert "secret" not in serialized
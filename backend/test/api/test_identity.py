@@ -0,0 +1,91 @@
+from collections.abc import Generator
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from blanket.api.identity import clear_identity_cache, get_user_by_auth0_sub
+from blanket.db.models import User
+from test.factories import UserFactory
+
+SUBJECT = "auth0|alice"
+
+
+@pytest.fixture(autouse=True)
+def identity_cache() -> Generator[None, None, None]:
+    clear_identity_cache()
+    yield
+    clear_identity_cache()
+
+
+@pytest.fixture
+def statements(test_engine: AsyncEngine) -> Generator[list[str], None, None]:
+    """The SQL statements executed while the test runs."""
+    executed: list[str] = []
+
+    def record(_conn, _cursor, statement, *_args):
+        executed.append(statement)
+
+    sa.event.listen(test_engine.sync_engine, "before_cursor_execute", record)
+    yield executed
+    sa.event.remove(test_engine.sync_engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+async def user(db_session: AsyncSession) -> User:
+    user = UserFactory.build(auth0_sub=SUBJECT)
+    db_session.add(user)
+    await db_session.commit()
+    return user
+
+
+async def _is_cached(db_session: AsyncSession, statements: list[str]) -> bool:
+    """Whether looking up the user costs no query (and caches it if it did)."""
+    db_session.expunge_all()
+    statements.clear()
+    await get_user_by_auth0_sub(db_session, SUBJECT)
+    return not statements
+
+
+class TestIdentityCache:
+    async def test_cached_users_are_returned_without_a_query(
+        self, db_session: AsyncSession, user: User, statements: list[str]
+    ):
+        assert not await _is_cached(db_session, statements)
+
+        db_session.expunge_all()
+        statements.clear()
+        cached = await get_user_by_auth0_sub(db_session, SUBJECT)
+
+        assert statements == []
+        assert (cached.id, cached.email) == (user.id, user.email)
+        assert cached in db_session
+
+    async def test_committed_writes_invalidate_the_cache(
+        self, db_session: AsyncSession, user: User, statements: list[str]
+    ):
+        """Test that updates and deletes invalidate only once they're committed."""
+        await get_user_by_auth0_sub(db_session, SUBJECT)
+
+        user.display_name = "Alice"
+        await db_session.flush()
+        assert await _is_cached(db_session, statements)
+        await db_session.commit()
+        assert not await _is_cached(db_session, statements)
+        assert await _is_cached(db_session, statements)
+
+        cached = await get_user_by_auth0_sub(db_session, SUBJECT)
+        await db_session.delete(cached)
+        await db_session.commit()
+        assert await get_user_by_auth0_sub(db_session, SUBJECT) is None
+
+    async def test_rolled_back_writes_keep_the_cache(
+        self, db_session: AsyncSession, user: User, statements: list[str]
+    ):
+        await get_user_by_auth0_sub(db_session, SUBJECT)
+
+        user.display_name = "Alice"
+        await db_session.flush()
+        await db_session.rollback()
+
+        assert await _is_cached(db_session, statements)
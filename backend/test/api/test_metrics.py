@@ -0,0 +1,116 @@
+import importlib.util
+import json
+import os
+import socket
+
+from blanket.io import metrics
+from blanket.io.metrics import Counter, Gauge, Histogram, Registry
+
+
+def _record(registry: Registry, requests: int, in_flight: int) -> None:
+    Counter("requests_total", "Requests.", ["route"], registry=registry).labels(
+        "/tasks"
+    ).inc(requests)
+    Gauge("in_flight", "In flight.", registry=registry).set(in_flight)
+    latency = Histogram(
+        "latency_seconds", "Latency.", buckets=[0.1, 1], registry=registry
+    )
+    for _ in range(requests):
+        latency.observe(0.5)
+
+
+class TestMetrics:
+    def test_aggregates_snapshots_across_processes(self, tmp_path, monkeypatch):
+        """Test that live processes' metrics are summed and dead ones keep counters."""
+        monkeypatch.setattr(metrics, "METRICS_DIR", str(tmp_path))
+        other = Registry()
+        _record(other, requests=2, in_flight=3)
+        metrics.write_snapshot(other)
+        snapshot = next(tmp_path.glob("*.snapshot.json"))
+        snapshot.rename(tmp_path / "other-1.snapshot.json")
+
+        this = Registry()
+        _record(this, requests=1, in_flight=1)
+        text = metrics.render_metrics(registry=this)
+        assert 'requests_total{route="/tasks"} 3.0' in text
+        assert "in_flight 4.0" in text
+        assert 'latency_seconds_bucket{le="0.1"} 0' in text
+        assert 'latency_seconds_bucket{le="1.0"} 3' in text
+
+        # Once the other process' snapshot goes stale, only its counters remain
+        os.utime(tmp_path / "other-1.snapshot.json", (0, 0))
+        text = metrics.render_metrics(registry=this)
+        assert 'requests_total{route="/tasks"} 3.0' in text
+        assert "in_flight 1.0" in text
+
+    def test_exited_process_keeps_counters(self, tmp_path, monkeypatch):
+        """Test that a process' counters outlive it, counted once, and its gauges don't."""
+        monkeypatch.setattr(metrics, "METRICS_DIR", str(tmp_path))
+        exiting = Registry()
+        _record(exiting, requests=2, in_flight=3)
+        metrics.start_metrics_writer(exiting)
+        metrics.stop_metrics_writer(exiting)
+        assert not list(tmp_path.glob("*.snapshot.json"))
+
+        this = Registry()
+        _record(this, requests=1, in_flight=1)
+        for _ in range(2):
+            text = metrics.render_metrics(registry=this)
+            assert 'requests_total{route="/tasks"} 3.0' in text
+            assert "in_flight 1.0" in text
+            assert "latency_seconds_count 3" in text
+
+    def test_snapshot_format(self, tmp_path, monkeypatch):
+        """Test the snapshot file layout other processes (and versions) read."""
+        monkeypatch.setattr(metrics, "METRICS_DIR", str(tmp_path))
+        registry = Registry()
+        _record(registry, requests=2, in_flight=3)
+        metrics.write_snapshot(registry)
+
+        (snapshot,) = tmp_path.glob("*.snapshot.json")
+        assert snapshot.name == f"{socket.gethostname()}-{os.getpid()}.snapshot.json"
+        families = {
+            family["name"]: family for family in json.loads(snapshot.read_text())
+        }
+        assert families["requests_total"] == {
+            "name": "requests_total",
+            "type": "counter",
+            "help": "Requests.",
+            "label_names": ["route"],
+            "buckets": [],
+            "samples": [[["/tasks"], 2.0]],
+        }
+        # Histograms: per-bucket (not cumulative) counts, then +Inf's, then the sum
+        assert families["latency_seconds"]["buckets"] == [0.1, 1.0]
+        assert families["latency_seconds"]["samples"] == [[[], [0, 2, 0, 1.0]]]
+
+    def test_incompatible_and_unreadable_snapshots(self, tmp_path, monkeypatch):
+        """Test that snapshots that can't be merged are skipped, not fatal."""
+        monkeypatch.setattr(metrics, "METRICS_DIR", str(tmp_path))
+        older = Registry()
+        Histogram("latency_seconds", "Latency.", buckets=[5], registry=older).observe(1)
+        metrics.write_snapshot(older)
+        next(tmp_path.glob("*.snapshot.json")).rename(tmp_path / "old-1.snapshot.json")
+        (tmp_path / "broken-1.snapshot.json").write_text("[{")
+
+        this = Registry()
+        _record(this, requests=1, in_flight=1)
+        text = metrics.render_metrics(registry=this)
+        assert 'latency_seconds_bucket{le="1.0"} 1' in text
+        assert "latency_seconds_count 1" in text
+
+    def test_empty_directory_setting_is_unset(self, tmp_path, monkeypatch):
+        """Test that `BLANKET_METRICS_DIR=` doesn't write into the working directory."""
+        monkeypatch.setenv("BLANKET_METRICS_DIR", "")
+        monkeypatch.chdir(tmp_path)
+        # A separate copy, so the shared registry isn't recreated
+        spec = importlib.util.spec_from_file_location("fresh_metrics", metrics.__file__)
+        fresh = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(fresh)
+
+        assert fresh.METRICS_DIR is None
+        fresh.Counter("requests_total", "Requests.").inc()
+        assert "requests_total 1.0" in fresh.render_metrics()
+        fresh.start_metrics_writer()
+        assert fresh._writer is None
+        assert not list(tmp_path.iterdir())
@@ -0,0 +1,63 @@
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from blanket.api.pagination import CountStrategy, count_rows
+from blanket.api.task_queries import TaskFilters, filtered_tasks
+from blanket.db.models import Task
+from blanket.db.session import set_session_user
+from test.factories import TaskFactory, UserFactory
+from test.fake_redis import FakeRedis
+
+
+async def _count(
+    api_engine: AsyncEngine, user_id: int | None, strategy: CountStrategy
+) -> int | None:
+    filters = TaskFilters()
+    async with AsyncSession(api_engine) as session:
+        if user_id is not None:
+            await set_session_user(session, user_id)
+        return await count_rows(
+            session,
+            filtered_tasks(filters.shape),
+            strategy,
+            namespace=Task.__tablename__,
+            cache_key="all",
+            params=filters.params,
+        )
+
+
+class TestCountsUnderRLS:
+    """Counts of tasks as users who can only see their own."""
+
+    async def _seed(self, test_engine: AsyncEngine) -> tuple[int, int]:
+        async with AsyncSession(test_engine, expire_on_commit=False) as session:
+            alice, bob = UserFactory.build_batch(2)
+            session.add_all(
+                [
+                    *TaskFactory.build_batch(3, creator=alice),
+                    TaskFactory.build(creator=bob),
+                ]
+            )
+            await session.commit()
+        async with test_engine.connect() as connection:
+            await connection.execute(sa.text("ANALYZE tasks"))
+        return alice.id, bob.id
+
+    async def test_cached_counts_are_per_user(
+        self, test_engine: AsyncEngine, api_engine: AsyncEngine, redis: FakeRedis
+    ):
+        alice, bob = await self._seed(test_engine)
+
+        for _ in range(2):
+            assert await _count(api_engine, alice, CountStrategy.CACHED) == 3
+            assert await _count(api_engine, bob, CountStrategy.CACHED) == 1
+            assert await _count(api_engine, None, CountStrategy.CACHED) == 0
+        assert len([key for key in redis.data if key.startswith("cache:count:")]) == 3
+
+    async def test_unfiltered_estimates_are_table_wide(
+        self, test_engine: AsyncEngine, api_engine: AsyncEngine
+    ):
+        _, bob = await self._seed(test_engine)
+
+        assert await _count(api_engine, bob, CountStrategy.EXACT) == 1
+        assert await _count(api_engine, bob, CountStrategy.ESTIMATED) == 4
@@ -0,0 +1,64 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from blanket.api.replica import READ_PRIMARY_COOKIE
+from blanket.db.models import User
+from test.factories import TaskFactory
+
+
+@pytest.fixture
+def replica_lag(monkeypatch, replica_engine: AsyncEngine) -> dict[str, float | None]:
+    """Route reads to the stand-in replica, with a lag tests can change."""
+    lag: dict[str, float | None] = {"seconds": 0.0}
+
+    async def get_replica_lag() -> float | None:
+        return lag["seconds"]
+
+    monkeypatch.setattr("blanket.api.replica.replica_is_configured", lambda: True)
+    monkeypatch.setattr("blanket.api.replica.get_replica_lag", get_replica_lag)
+    monkeypatch.setattr(
+        "blanket.api.deps.get_api_replica_session",
+        async_sessionmaker(replica_engine, expire_on_commit=False),
+    )
+    return lag
+
+
+class TestReplicaRouting:
+    async def test_reads_follow_replica_lag_and_recent_writes(
+        self,
+        client: AsyncClient,
+        db_session: AsyncSession,
+        replica_engine: AsyncEngine,
+        replica_lag: dict[str, float | None],
+        current_user: User,
+    ):
+        """Test that reads use the replica unless it lags or the client just wrote."""
+        db_session.add(TaskFactory.build(title="On primary"))
+        await db_session.commit()
+        async with AsyncSession(replica_engine) as replica_session:
+            replica_session.add(TaskFactory.build(title="On replica"))
+            await replica_session.commit()
+
+        async def list_titles() -> list[str]:
+            response = await client.get("/tasks")
+            assert response.status_code == 200
+            return [item["title"] for item in response.json()["items"]]
+
+        assert await list_titles() == ["On replica"]
+
+        replica_lag["seconds"] = 60.0
+        assert await list_titles() == ["On primary"]
+        replica_lag["seconds"] = None
+        assert await list_titles() == ["On primary"]
+
+        replica_lag["seconds"] = 0.0
+        response = await client.post(
+            "/tasks/bulk", json={"tasks": [{"title": "Just written"}]}
+        )
+        assert response.status_code == 200
+        assert READ_PRIMARY_COOKIE in response.cookies
+        assert await list_titles() == ["Just written", "On primary"]
+
+        client.cookies.clear()
+        assert await list_titles() == ["On replica"]
@@ -0,0 +1,107 @@
+import datetime
+
+import httpx
+import pytest
+from fastapi import FastAPI, Response
+from pydantic import Field
+
+from blanket.api.interfaces import (
+    ApiModel,
+    CursorPaginatedBase,
+    PaginatedBase,
+    TaskListItem,
+    TaskRead,
+)
+from blanket.api.pagination import CountStrategy
+from blanket.api.responses import model_response
+from blanket.db.models import TaskPriority
+
+_ITEMS = [
+    TaskListItem.model_construct(
+        id=1,
+        title='Überprüfen 📋 "quoted" </script>',
+        completed=False,
+        priority=TaskPriority.HIGH,
+        description=None,
+        created_at=datetime.datetime(2026, 10, 18, 4, 41, 21, 335121, datetime.UTC),
+        updated_at=datetime.datetime(2026, 10, 18, 4, 41, 21, tzinfo=datetime.UTC),
+    ),
+    TaskListItem.model_construct(
+        id=2,
+        title="Plain",
+        completed=True,
+        priority=TaskPriority.LOW,
+        description="A\nmultiline\tdescription",
+        created_at=datetime.datetime(
+            2026, 1, 2, 3, 4, 5, 60, datetime.timezone(datetime.timedelta(hours=-5))
+        ),
+        updated_at=datetime.datetime(2026, 1, 2, 3, 4, 5, 60, datetime.UTC),
+    ),
+]
+
+
+class _AliasedItem(ApiModel):
+    item_id: int = Field(serialization_alias="itemId")
+    priority: TaskPriority
+    due_at: datetime.datetime | None = Field(default=None, alias="dueAt")
+
+
+_MODELS = {
+    "page": PaginatedBase[TaskListItem].model_construct(
+        items=_ITEMS,
+        total=51,
+        page=2,
+        size=2,
+        count_strategy=CountStrategy.ESTIMATED,
+        has_more=True,
+    ),
+    "empty_page": PaginatedBase[TaskListItem].model_construct(
+        items=[], total=None, page=1, size=50
+    ),
+    "cursor_page": CursorPaginatedBase[TaskListItem].model_construct(
+        items=_ITEMS, size=2, next_cursor="eyJpZCI6IDJ9"
+    ),
+    "task": TaskRead.model_validate(_ITEMS[0].model_dump()),
+    "aliased": _AliasedItem.model_validate(
+        {"item_id": 7, "priority": "MEDIUM", "dueAt": "2026-10-18T04:41:21+02:00"}
+    ),
+}
+
+
+def _app() -> FastAPI:
+    """Each model, served through `response_model` and through `model_response`."""
+    app = FastAPI()
+    for name, model in _MODELS.items():
+
+        def by_fastapi(model=model):
+            return model
+
+        def by_model_response(response: Response, model=model):
+            return model_response(model, response)
+
+        app.get(f"/fastapi/{name}", response_model=type(model))(by_fastapi)
+        app.get(f"/model_response/{name}")(by_model_response)
+    return app
+
+
+class TestModelResponse:
+    @pytest.mark.parametrize("name", _MODELS)
+    async def test_matches_response_model_serialization(self, name: str):
+        transport = httpx.ASGITransport(app=_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+            expected = await c.get(f"/fastapi/{name}")
+            response = await c.get(f"/model_response/{name}")
+
+        assert expected.status_code == response.status_code == 200
+        assert response.content == expected.content
+        assert response.headers["content-type"] == expected.headers["content-type"]
+
+    def test_carries_over_headers(self):
+        injected = Response()
+        injected.headers["etag"] = 'W/"1"'
+        injected.set_cookie("sticky", "1")
+
+        response = model_response(_MODELS["task"], injected)
+
+        assert response.headers["etag"] == 'W/"1"'
+        assert response.headers["set-cookie"].startswith("sticky=1")
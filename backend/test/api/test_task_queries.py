@@ -0,0 +1,107 @@
+import itertools
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from blanket.api.interfaces import TaskListItem
+from blanket.api.task_queries import (
+    TaskFilters,
+    filtered_tasks,
+    task_export,
+    task_keyset_page,
+    task_page,
+)
+from blanket.db.models import Task, TaskPriority
+from test.factories import TaskFactory, UserFactory
+
+FILTERS = [
+    TaskFilters(completed=completed, priority=priority)
+    for completed, priority in itertools.product(
+        [None, True, False], [None, TaskPriority.LOW, TaskPriority.HIGH]
+    )
+]
+
+
+def _ad_hoc_query(filters: TaskFilters) -> sa.Select:
+    """The list query as built per request, with the filter values inlined."""
+    query = sa.select(*TaskListItem.columns())
+    if filters.completed is not None:
+        query = query.where(Task.completed == filters.completed)
+    if filters.priority is not None:
+        query = query.where(Task.priority == filters.priority)
+    return query.order_by(Task.created_at.desc(), Task.id.desc())
+
+
+@pytest.fixture
+async def tasks(db_session: AsyncSession) -> None:
+    user = UserFactory.build()
+    db_session.add_all(
+        TaskFactory.build(creator=user, completed=completed, priority=priority)
+        for completed, priority, _ in itertools.product(
+            [True, False], TaskPriority, range(3)
+        )
+    )
+    await db_session.commit()
+
+
+class TestStatementCache:
+    """Statements are built once per filter shape."""
+
+    def test_equal_shapes_share_statements(self):
+        first = TaskFilters(completed=True, search="login")
+        second = TaskFilters(completed=False, search="logout")
+        assert first.shape == second.shape
+        assert filtered_tasks(first.shape) is filtered_tasks(second.shape)
+        assert task_page(first.shape) is task_page(second.shape)
+        assert task_export(first.shape) is task_export(second.shape)
+        for after_cursor in (True, False):
+            assert task_keyset_page(first.shape, after_cursor) is task_keyset_page(
+                second.shape, after_cursor
+            )
+
+    def test_different_shapes_differ(self):
+        shapes = {filters.shape for filters in FILTERS}
+        assert len(shapes) == 4
+        assert len({id(task_page(shape)) for shape in shapes}) == 4
+
+    @pytest.mark.parametrize("filters", FILTERS)
+    async def test_results_match_ad_hoc_queries(
+        self, db_session: AsyncSession, tasks, filters: TaskFilters
+    ):
+        expected = (await db_session.execute(_ad_hoc_query(filters))).all()
+        assert expected
+
+        params = filters.params
+        exported = await db_session.execute(task_export(filters.shape), params)
+        assert exported.all() == expected
+
+        count = await db_session.scalar(
+            sa.select(sa.func.count()).select_from(
+                filtered_tasks(filters.shape).subquery()
+            ),
+            params,
+        )
+        assert count == len(expected)
+
+        page = await db_session.execute(
+            task_page(filters.shape), {**params, "offset": 1, "limit": 2}
+        )
+        assert page.all() == expected[1:3]
+
+        first_page = (
+            await db_session.execute(
+                task_keyset_page(filters.shape, False), {**params, "limit": 2}
+            )
+        ).all()
+        assert first_page == expected[:2]
+        next_page = await db_session.execute(
+            task_keyset_page(filters.shape, True),
+            {
+                **params,
+                "limit": 2,
+                "cursor_created_at": first_page[-1].created_at,
+                "cursor_id": first_page[-1].id,
+            },
+        )
+        assert next_page.all() == expected[2:4]
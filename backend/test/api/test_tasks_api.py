@@ -1,18 +1,44 @@
-from fastapi.testclient import TestClient
-from sqlalchemy.orm import Session
+import csv
+import datetime
+import io
+import json
+from collections.abc import AsyncGenerator
 
-from blanket.db.models import Task
+import pytest
+import sqlalchemy as sa
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from blanket.api.deps import _get_db, get_current_user
+from blanket.api.etags import VERSION_TTL_SECONDS
+from blanket.api.main import app
+from blanket.db.models import Task, User
 from test.factories import TaskFactory
+from test.fake_redis import FakeRedis
+
+
+@pytest.fixture
+async def rls_client(
+    client: AsyncClient, api_engine: AsyncEngine
+) -> AsyncGenerator[AsyncClient, None]:
+    """The client, with requests' sessions on `api_engine`, so RLS applies to them."""
+
+    async def get_rls_db():
+        async with AsyncSession(api_engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[_get_db] = get_rls_db
+    return client
 
 
 class TestTasksAPI:
     """Core API behavior tests for tasks endpoints."""
 
-    def test_create_task(self, client: TestClient, db_session: Session):
+    async def test_create_task(self, client: AsyncClient, db_session: AsyncSession):
         """Test creating a task."""
         task_data = {"title": "Test Task", "description": "Test description"}
 
-        response = client.post("/tasks", json=task_data)
+        response = await client.post("/tasks", json=task_data)
 
         assert response.status_code == 200
         data = response.json()
@@ -21,66 +47,340 @@ class TestTasksAPI:
         assert "id" in data
 
         # Verify persisted to database
-        task = db_session.get(Task, data["id"])
+        task = await db_session.get(Task, data["id"])
         assert task.title == task_data["title"]
 
-    def test_list_tasks_with_filtering(self, client: TestClient, db_session: Session):
+    async def test_list_tasks_with_filtering(
+        self, client: AsyncClient, db_session: AsyncSession
+    ):
         """Test listing and filtering tasks."""
         # Create mix of tasks
         completed_task = TaskFactory.build(completed=True, title="Done task")
         pending_task = TaskFactory.build(completed=False, title="Todo task")
 
         db_session.add_all([completed_task, pending_task])
-        db_session.commit()
+        await db_session.commit()
 
         # Test basic listing
-        response = client.get("/tasks")
+        response = await client.get("/tasks")
         assert response.status_code == 200
         data = response.json()
         assert len(data["items"]) == 2
         assert data["total"] == 2
 
         # Test filtering works
-        response = client.get("/tasks?completed=true")
+        response = await client.get("/tasks?completed=true")
         assert response.status_code == 200
         data = response.json()
         assert len(data["items"]) == 1
         assert data["items"][0]["completed"] is True
 
-    def test_task_crud_workflow(self, client: TestClient, db_session: Session):
+    async def test_search_tasks(self, client: AsyncClient, db_session: AsyncSession):
+        """Test full-text, substring and typo-tolerant search with ranking."""
+        db_session.add_all(
+            [
+                TaskFactory.build(title="Fix login redirect", description="Auth bug"),
+                TaskFactory.build(title="Write docs", description="Mention login flow"),
+                TaskFactory.build(title="Plan offsite", description="Book venue"),
+            ]
+        )
+        await db_session.commit()
+
+        async def search_titles(search: str) -> list[str]:
+            response = await client.get("/tasks", params={"search": search})
+            assert response.status_code == 200
+            return [item["title"] for item in response.json()["items"]]
+
+        # Title matches outrank description matches
+        assert await search_titles("login") == ["Fix login redirect", "Write docs"]
+        assert await search_titles("redir") == ["Fix login redirect"]
+        assert await search_titles("ofsite") == ["Plan offsite"]
+        assert await search_titles("100%") == []
+
+    async def test_list_tasks_count_strategies(
+        self, client: AsyncClient, db_session: AsyncSession
+    ):
+        """Test that skipping the count still reports whether more pages exist."""
+        db_session.add_all(TaskFactory.build_batch(3))
+        await db_session.commit()
+
+        response = await client.get("/tasks", params={"count": "none", "limit": 2})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] is None
+        assert data["num_pages"] is None
+        assert data["count_strategy"] == "none"
+        assert data["has_more"] is True
+        assert data["next_page"] == 2
+
+        response = await client.get(
+            "/tasks", params={"count": "exact", "page": 2, "limit": 2}
+        )
+        data = response.json()
+        assert data["total"] == 3
+        assert data["count_strategy"] == "exact"
+        assert data["has_more"] is False
+        assert data["next_page"] is None
+
+    async def test_cached_count(
+        self, client: AsyncClient, db_session: AsyncSession, redis: FakeRedis
+    ):
+        """Cached totals are reused until a write through the API."""
+        tasks = TaskFactory.build_batch(3)
+        db_session.add_all(tasks)
+        await db_session.commit()
+
+        response = await client.get("/tasks", params={"count": "cached"})
+        assert response.json()["total"] == 3
+
+        # Written behind the API's back, so the cached total is stale
+        db_session.add(TaskFactory.build())
+        await db_session.commit()
+        response = await client.get("/tasks", params={"count": "cached"})
+        assert response.json()["total"] == 3
+
+        await client.patch(f"/tasks/{tasks[0].id}", json={"completed": True})
+        response = await client.get("/tasks", params={"count": "cached"})
+        assert response.json()["total"] == 4
+
+    async def test_list_tasks_cursor_pagination(
+        self, client: AsyncClient, db_session: AsyncSession
+    ):
+        """Test walking the task list with keyset cursors."""
+        base_time = datetime.datetime(2025, 1, 1, tzinfo=datetime.UTC)
+        tasks = [
+            TaskFactory.build(
+                title=f"Task {i}",
+                created_at=base_time + datetime.timedelta(minutes=i),
+            )
+            for i in range(5)
+        ]
+        db_session.add_all(tasks)
+        await db_session.commit()
+
+        seen_titles = []
+        cursor = ""
+        while cursor is not None:
+            response = await client.get("/tasks", params={"cursor": cursor, "limit": 2})
+            assert response.status_code == 200
+            data = response.json()
+            assert "total" not in data
+            seen_titles.extend(item["title"] for item in data["items"])
+            assert data["has_more"] is (data["next_cursor"] is not None)
+            cursor = data["next_cursor"]
+
+        assert seen_titles == [f"Task {i}" for i in reversed(range(5))]
+
+        response = await client.get("/tasks", params={"cursor": "not-a-cursor"})
+        assert response.status_code == 400
+
+    async def test_task_crud_workflow(
+        self, client: AsyncClient, db_session: AsyncSession
+    ):
         """Test complete CRUD workflow for a task."""
         # Create
         task_data = {"title": "Workflow Task"}
-        response = client.post("/tasks", json=task_data)
+        response = await client.post("/tasks", json=task_data)
         assert response.status_code == 200
         task_id = response.json()["id"]
 
         # Read
-        response = client.get(f"/tasks/{task_id}")
+        response = await client.get(f"/tasks/{task_id}")
         assert response.status_code == 200
         assert response.json()["title"] == task_data["title"]
 
         # Update
         update_data = {"completed": True}
-        response = client.patch(f"/tasks/{task_id}", json=update_data)
+        response = await client.patch(f"/tasks/{task_id}", json=update_data)
         assert response.status_code == 200
         assert response.json()["completed"] is True
 
         # Delete
-        response = client.delete(f"/tasks/{task_id}")
+        response = await client.delete(f"/tasks/{task_id}")
         assert response.status_code == 204
 
         # Verify deleted
-        response = client.get(f"/tasks/{task_id}")
+        response = await client.get(f"/tasks/{task_id}")
+        assert response.status_code == 404
+
+    async def test_bulk_task_workflow(
+        self, client: AsyncClient, db_session: AsyncSession, current_user: User
+    ):
+        """Test bulk create, update and delete with per-row results."""
+        response = await client.post(
+            "/tasks/bulk",
+            json={"tasks": [{"title": f"Bulk {i}"} for i in range(3)]},
+        )
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [r["status"] for r in results] == ["created"] * 3
+        assert [r["task"]["title"] for r in results] == ["Bulk 0", "Bulk 1", "Bulk 2"]
+        ids = [r["id"] for r in results]
+        creator_ids = await db_session.scalars(
+            sa.select(Task.creator_id).where(Task.id.in_(ids))
+        )
+        assert set(creator_ids) == {current_user.id}
+
+        response = await client.patch(
+            "/tasks/bulk",
+            json={
+                "tasks": [
+                    {"id": ids[0], "completed": True},
+                    {"id": ids[1], "title": "Renamed", "priority": "HIGH"},
+                    {"id": 99999, "completed": True},
+                ]
+            },
+        )
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [r["status"] for r in results] == ["updated", "updated", "not_found"]
+        assert results[0]["task"]["completed"] is True
+        assert results[1]["task"]["title"] == "Renamed"
+        assert results[1]["task"]["priority"] == "HIGH"
+        assert results[1]["task"]["completed"] is False
+
+        response = await client.request(
+            "DELETE", "/tasks/bulk", json={"ids": [ids[2], 99999]}
+        )
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [r["status"] for r in results] == ["deleted", "not_found"]
+
+        response = await client.get(f"/tasks/{ids[2]}")
+        assert response.status_code == 404
+
+    async def test_export_tasks(self, client: AsyncClient, db_session: AsyncSession):
+        """Test streaming filtered exports as NDJSON and CSV."""
+        now = datetime.datetime.now(datetime.UTC)
+        db_session.add_all(
+            [
+                TaskFactory.build(
+                    title=f"Task {i}",
+                    completed=i % 2 == 0,
+                    created_at=now + datetime.timedelta(seconds=i),
+                )
+                for i in range(4)
+            ]
+        )
+        await db_session.commit()
+
+        response = await client.get("/tasks/export", params={"completed": "true"})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["title"] for line in lines] == ["Task 2", "Task 0"]
+
+        response = await client.get("/tasks/export", params={"format": "csv"})
+        assert response.status_code == 200
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert [row["title"] for row in rows] == [f"Task {i}" for i in (3, 2, 1, 0)]
+
+    async def test_task_etags(
+        self, client: AsyncClient, db_session: AsyncSession, redis: FakeRedis
+    ):
+        """Unchanged tasks and lists get 304s; writes change their ETags."""
+        task = TaskFactory.build(title="Cached Task")
+        db_session.add(task)
+        await db_session.commit()
+
+        response = await client.get(f"/tasks/{task.id}")
+        etag = response.headers["ETag"]
+        response = await client.get(
+            f"/tasks/{task.id}", headers={"If-None-Match": etag}
+        )
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+
+        response = await client.get("/tasks", params={"completed": "false"})
+        list_etag = response.headers["ETag"]
+        response = await client.get(
+            "/tasks",
+            params={"completed": "false"},
+            headers={"If-None-Match": list_etag},
+        )
+        assert response.status_code == 304
+        # Other filters are other representations
+        response = await client.get(
+            "/tasks", params={"completed": "true"}, headers={"If-None-Match": list_etag}
+        )
+        assert response.status_code == 200
+
+        response = await client.patch(f"/tasks/{task.id}", json={"completed": True})
+        assert response.status_code == 200
+
+        response = await client.get(
+            f"/tasks/{task.id}", headers={"If-None-Match": etag}
+        )
+        assert response.status_code == 200
+        assert response.json()["completed"] is True
+        assert response.headers["ETag"] != etag
+        response = await client.get(
+            "/tasks",
+            params={"completed": "false"},
+            headers={"If-None-Match": list_etag},
+        )
+        assert response.status_code == 200
+        assert response.headers["ETag"] != list_etag
+
+        # Counters for any ID can be created, so all of them expire
+        response = await client.get("/tasks/99999")
         assert response.status_code == 404
+        version_keys = [key for key in redis.data if key.startswith("version:")]
+        assert "version:task:99999" in version_keys
+        for key in version_keys:
+            assert 0 < redis.ttl(key) <= VERSION_TTL_SECONDS
 
-    def test_task_not_found_handling(self, client: TestClient):
+    async def test_task_not_found_handling(self, client: AsyncClient):
         """Test 404 handling for non-existent tasks."""
-        response = client.get("/tasks/99999")
+        response = await client.get("/tasks/99999")
         assert response.status_code == 404
 
-        response = client.patch("/tasks/99999", json={"title": "Updated"})
+        response = await client.patch("/tasks/99999", json={"title": "Updated"})
         assert response.status_code == 404
 
-        response = client.delete("/tasks/99999")
+        response = await client.delete("/tasks/99999")
         assert response.status_code == 404
+
+
+class TestBulkTaskAccess:
+    """Bulk writes only touch the current user's tasks."""
+
+    async def test_other_users_tasks_are_not_found(
+        self, rls_client: AsyncClient, test_engine: AsyncEngine
+    ):
+        async with AsyncSession(test_engine, expire_on_commit=False) as session:
+            own, other = TaskFactory.build_batch(2, completed=False)
+            session.add_all([own, other])
+            await session.commit()
+        app.dependency_overrides[get_current_user] = lambda: own.creator
+
+        response = await rls_client.patch(
+            "/tasks/bulk",
+            json={
+                "tasks": [
+                    {"id": own.id, "completed": True},
+                    {"id": other.id, "completed": True},
+                ]
+            },
+        )
+        assert response.status_code == 200
+        statuses = [r["status"] for r in response.json()["results"]]
+        assert statuses == ["updated", "not_found"]
+
+        response = await rls_client.request(
+            "DELETE", "/tasks/bulk", json={"ids": [other.id]}
+        )
+        assert response.status_code == 200
+        assert response.json()["results"][0]["status"] == "not_found"
+
+        async with AsyncSession(test_engine) as session:
+            rows = await session.execute(sa.select(Task.id, Task.completed))
+            assert dict(rows.all()) == {own.id: True, other.id: False}
+
+    async def test_authentication_is_required(self, client: AsyncClient):
+        response = await client.patch(
+            "/tasks/bulk", json={"tasks": [{"id": 1, "completed": True}]}
+        )
+        assert response.status_code in (401, 403)
+        response = await client.request("DELETE", "/tasks/bulk", json={"ids": [1]})
+        assert response.status_code in (401, 403)
@@ -0,0 +1,75 @@
+import httpx
+import pytest
+import sqlalchemy as sa
+import structlog
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from blanket.api.timing import N_PLUS_ONE_THRESHOLD, ServerTimingMiddleware
+from blanket.db.query_timing import instrument_queries
+from test.factories import TaskFactory
+
+
+def _server_timing(response: httpx.Response) -> dict[str, str]:
+    """Each metric in the response's Server-Timing header, with its parameters."""
+    metrics = {}
+    for metric in response.headers["server-timing"].split(", "):
+        name, _, params = metric.partition(";")
+        metrics[name] = params
+    return metrics
+
+
+class TestServerTiming:
+    """Per-request timing headers and N+1 query warnings."""
+
+    async def test_header(
+        self,
+        client: httpx.AsyncClient,
+        db_session: AsyncSession,
+        test_engine: AsyncEngine,
+    ):
+        instrument_queries(test_engine.sync_engine)
+        db_session.add_all(TaskFactory.build_batch(2))
+        await db_session.commit()
+
+        response = await client.get("/tasks")
+
+        assert response.status_code == 200
+        metrics = _server_timing(response)
+        assert list(metrics)[:2] == ["db", "pool"]
+        assert list(metrics)[-1] == "app"
+        assert not metrics["db"].endswith('desc="0 queries"')
+        assert metrics["serialize"].startswith("dur=")
+
+    @pytest.fixture
+    def query_app(self, test_engine: AsyncEngine) -> httpx.AsyncClient:
+        """A client for an app running a query a given number of times."""
+        instrument_queries(test_engine.sync_engine)
+        inner = FastAPI()
+
+        @inner.get("/queries/{times}")
+        async def run_queries(times: int) -> None:
+            async with test_engine.connect() as connection:
+                for i in range(times):
+                    await connection.execute(
+                        sa.text("SELECT CAST(:i AS integer)"), {"i": i}
+                    )
+
+        app = ServerTimingMiddleware(inner, detect_n_plus_one=True)
+        return httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        )
+
+    async def test_n_plus_one_warning(self, query_app: httpx.AsyncClient):
+        with structlog.testing.capture_logs() as logs:
+            await query_app.get(f"/queries/{N_PLUS_ONE_THRESHOLD - 1}")
+        assert not [log for log in logs if log["event"] == "Possible N+1 query"]
+
+        with structlog.testing.capture_logs() as logs:
+            response = await query_app.get(f"/queries/{N_PLUS_ONE_THRESHOLD}")
+        (warning,) = [log for log in logs if log["event"] == "Possible N+1 query"]
+        assert warning["statement"] == "SELECT CAST($1 AS integer)"
+        assert warning["count"] == N_PLUS_ONE_THRESHOLD
+        assert (
+            f'desc="{N_PLUS_ONE_THRESHOLD} queries"' in (_server_timing(response)["db"])
+        )
@@ -0,0 +1,289 @@
+import asyncio
+import json
+import threading
+import time
+from collections.abc import Generator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+import pytest
+import rsa
+from fastapi.security import HTTPAuthorizationCredentials, SecurityScopes
+from fastapi_auth0 import Auth0, Auth0User, auth0_rule_namespace
+from jose import jwk, jwt
+from pydantic import Field
+
+from blanket.api import tokens
+from blanket.api.tokens import JwksCache, TokenVerifier
+
+DOMAIN = "blanket.example.com"
+AUDIENCE = "https://api.blanket.example.com"
+
+
+class SigningKey:
+    def __init__(self, kid: str):
+        public_key, private_key = rsa.newkeys(1024)
+        self.kid = kid
+        self.private_pem = private_key.save_pkcs1()
+        self.jwk = {
+            **jwk.construct(public_key.save_pkcs1(), "RS256").to_dict(),
+            "kid": kid,
+            "use": "sig",
+        }
+
+    def sign(self, kid: str | None = None, **overrides: Any) -> str:
+        now = int(time.time())
+        claims = {
+            "sub": "auth0|alice",
+            "aud": AUDIENCE,
+            "iss": f"https://{DOMAIN}/",
+            "iat": now,
+            "exp": now + 3600,
+            "scope": "read:tasks",
+            **overrides,
+        }
+        return jwt.encode(
+            claims,
+            self.private_pem,
+            algorithm="RS256",
+            headers={"kid": kid or self.kid},
+        )
+
+
+class NamedUser(Auth0User):
+    name: str = Field(alias=f"{auth0_rule_namespace}/name")
+
+
+class StubJwksServer(ThreadingHTTPServer):
+    """A local stand-in for Auth0's JWKS endpoint."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _JwksHandler)
+        self.keys: list[dict[str, Any]] = []
+        self.request_count = 0
+
+    @property
+    def jwks_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}/.well-known/jwks.json"
+
+
+class _JwksHandler(BaseHTTPRequestHandler):
+    server: StubJwksServer
+
+    def do_GET(self):  # noqa: N802
+        self.server.request_count += 1
+        body = json.dumps({"keys": self.server.keys}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubAuth0(Auth0):
+    """A `fastapi_auth0.Auth0` that records what falls through to it."""
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(DOMAIN, AUDIENCE, lazy_init=True, **kwargs)
+        self.fallback_calls = 0
+
+    async def get_user(self, security_scopes, creds):
+        self.fallback_calls += 1
+        return None
+
+
+@pytest.fixture(scope="module")
+def signing_key() -> SigningKey:
+    return SigningKey("key-1")
+
+
+@pytest.fixture(scope="module")
+def rotated_key() -> SigningKey:
+    return SigningKey("key-2")
+
+
+@pytest.fixture
+def jwks_server(signing_key: SigningKey) -> Generator[StubJwksServer, None, None]:
+    server = StubJwksServer()
+    server.keys = [signing_key.jwk]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def auth() -> StubAuth0:
+    return StubAuth0()
+
+
+@pytest.fixture
+def verifier(auth: StubAuth0, jwks_server: StubJwksServer) -> TokenVerifier:
+    verifier = TokenVerifier(auth)
+    verifier.jwks = JwksCache(jwks_server.jwks_url)
+    return verifier
+
+
+@pytest.fixture
+def decode_count(monkeypatch) -> list[int]:
+    """How many times a token's signature and claims were verified."""
+    count = [0]
+    decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        count[0] += 1
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(tokens.jwt, "decode", counting_decode)
+    return count
+
+
+async def _get_user(verifier: TokenVerifier, token: str, *scopes: str):
+    return await verifier.get_user(
+        SecurityScopes(list(scopes)),
+        HTTPAuthorizationCredentials(scheme="Bearer", credentials=token),
+    )
+
+
+class TestTokenVerifier:
+    async def test_verified_claims_are_cached(
+        self,
+        verifier: TokenVerifier,
+        auth: StubAuth0,
+        signing_key: SigningKey,
+        decode_count: list[int],
+    ):
+        token = signing_key.sign()
+
+        for _ in range(3):
+            user = await _get_user(verifier, token, "read:tasks")
+            assert user.id == "auth0|alice"
+
+        assert decode_count[0] == 1
+        assert auth.fallback_calls == 0
+
+    @pytest.mark.parametrize(
+        "claims",
+        [
+            {"exp": int(time.time()) - 60},
+            {"aud": "https://someone-else.example.com"},
+            {"iss": "https://evil.example.com/"},
+        ],
+        ids=["expired", "wrong-audience", "wrong-issuer"],
+    )
+    async def test_invalid_tokens_fall_through(
+        self,
+        verifier: TokenVerifier,
+        auth: StubAuth0,
+        signing_key: SigningKey,
+        claims: dict[str, Any],
+    ):
+        token = signing_key.sign(**claims)
+
+        for _ in range(2):
+            assert await _get_user(verifier, token) is None
+        assert auth.fallback_calls == 2
+
+    async def test_claims_are_cached_only_until_expiry(
+        self, verifier: TokenVerifier, auth: StubAuth0, signing_key: SigningKey
+    ):
+        exp = int(time.time()) + 2
+        token = signing_key.sign(exp=exp)
+
+        assert await _get_user(verifier, token) is not None
+        # jose compares exp with the current time in whole seconds
+        await asyncio.sleep(exp + 1.1 - time.time())
+
+        assert await _get_user(verifier, token) is None
+        assert auth.fallback_calls == 1
+
+    async def test_unknown_key_ids_refetch_at_most_once_per_interval(
+        self,
+        verifier: TokenVerifier,
+        auth: StubAuth0,
+        jwks_server: StubJwksServer,
+        signing_key: SigningKey,
+        rotated_key: SigningKey,
+        monkeypatch,
+    ):
+        assert await _get_user(verifier, signing_key.sign()) is not None
+        assert jwks_server.request_count == 1
+
+        # Auth0 rotates its keys after the last fetch
+        jwks_server.keys.append(rotated_key.jwk)
+        for _ in range(2):
+            assert await _get_user(verifier, rotated_key.sign()) is None
+        assert jwks_server.request_count == 1
+        assert auth.fallback_calls == 2
+
+        monkeypatch.setattr(tokens, "JWKS_MIN_REFETCH_INTERVAL_SECONDS", 0)
+        assert await _get_user(verifier, rotated_key.sign(sub="auth0|bob")) is not None
+        assert jwks_server.request_count == 2
+
+        unknown_token = signing_key.sign(kid="key-3")
+        monkeypatch.setattr(tokens, "JWKS_MIN_REFETCH_INTERVAL_SECONDS", 60)
+        for _ in range(3):
+            assert await _get_user(verifier, unknown_token) is None
+        assert jwks_server.request_count == 2
+
+    async def test_missing_scopes_fall_through(
+        self, verifier: TokenVerifier, auth: StubAuth0, signing_key: SigningKey
+    ):
+        token = signing_key.sign(scope="read:tasks")
+
+        assert await _get_user(verifier, token, "write:tasks") is None
+        assert auth.fallback_calls == 1
+
+        assert await _get_user(verifier, token, "read:tasks") is not None
+        assert auth.fallback_calls == 1
+
+
+class TestAuth0Settings:
+    """The fast path applies the configured `Auth0`'s settings, as it would."""
+
+    async def test_user_model(
+        self, verifier: TokenVerifier, auth: StubAuth0, signing_key: SigningKey
+    ):
+        auth.auth0_user_model = NamedUser
+
+        user = await _get_user(
+            verifier, signing_key.sign(**{f"{auth0_rule_namespace}/name": "Alice"})
+        )
+        assert isinstance(user, NamedUser)
+        assert user.name == "Alice"
+
+        # Claims the model rejects fall through
+        assert await _get_user(verifier, signing_key.sign(sub="auth0|bob")) is None
+        assert auth.fallback_calls == 1
+
+    async def test_algorithms(
+        self, verifier: TokenVerifier, auth: StubAuth0, signing_key: SigningKey
+    ):
+        auth.algorithms = ["RS512"]
+
+        assert await _get_user(verifier, signing_key.sign()) is None
+        assert auth.fallback_calls == 1
+
+    async def test_email_auto_error(
+        self, verifier: TokenVerifier, auth: StubAuth0, signing_key: SigningKey
+    ):
+        auth.email_auto_error = True
+
+        assert await _get_user(verifier, signing_key.sign()) is None
+        assert auth.fallback_calls == 1
+
+        email_claim = {f"{auth0_rule_namespace}/email": "alice@example.com"}
+        user = await _get_user(verifier, signing_key.sign(**email_claim))
+        assert user.email == "alice@example.com"
+        assert auth.fallback_calls == 1
+
+    async def test_scope_auto_error(
+        self, verifier: TokenVerifier, auth: StubAuth0, signing_key: SigningKey
+    ):
+        auth.scope_auto_error = False
+
+        assert await _get_user(verifier, signing_key.sign(), "write:tasks") is not None
+        assert auth.fallback_calls == 0
@@ -0,0 +1,97 @@
+import asyncio
+import json
+import threading
+import time
+from collections.abc import Generator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from blanket.api.userinfo import clear_userinfo_cache, fetch_userinfo
+
+
+class StubAuth0Server(ThreadingHTTPServer):
+    """A local stand-in for Auth0's /userinfo endpoint."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _UserinfoHandler)
+        self.request_count = 0
+        self.response_delay = 0.0
+
+    @property
+    def userinfo_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}/userinfo"
+
+
+class _UserinfoHandler(BaseHTTPRequestHandler):
+    server: StubAuth0Server
+
+    def do_GET(self):  # noqa: N802
+        self.server.request_count += 1
+        time.sleep(self.server.response_delay)
+        token = self.headers["Authorization"].removeprefix("Bearer ")
+        if token == "bad-token":
+            self.send_response(401)
+            self.end_headers()
+            return
+        body = json.dumps({"email": f"{token}@example.com"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def auth0_server() -> Generator[StubAuth0Server, None, None]:
+    server = StubAuth0Server()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    clear_userinfo_cache()
+    yield server
+    server.shutdown()
+    clear_userinfo_cache()
+
+
+class TestUserinfo:
+    """Caching behavior of Auth0 userinfo lookups."""
+
+    async def test_lookups_are_cached_by_subject(self, auth0_server: StubAuth0Server):
+        url = auth0_server.userinfo_url
+
+        first = await fetch_userinfo(url, "alice", "auth0|alice")
+        second = await fetch_userinfo(url, "alice", "auth0|alice")
+
+        assert first == second == {"email": "alice@example.com"}
+        assert auth0_server.request_count == 1
+
+        await fetch_userinfo(url, "bob", "auth0|bob")
+        assert auth0_server.request_count == 2
+
+    async def test_concurrent_lookups_are_deduplicated(
+        self, auth0_server: StubAuth0Server
+    ):
+        auth0_server.response_delay = 0.2
+
+        results = await asyncio.gather(
+            *(
+                fetch_userinfo(auth0_server.userinfo_url, "alice", "auth0|alice")
+                for _ in range(10)
+            )
+        )
+
+        assert all(result["email"] == "alice@example.com" for result in results)
+        assert auth0_server.request_count == 1
+
+    async def test_failures_are_not_cached(self, auth0_server: StubAuth0Server):
+        url = auth0_server.userinfo_url
+
+        for _ in range(2):
+            with pytest.raises(httpx.HTTPStatusError):
+                await fetch_userinfo(url, "bad-token", "auth0|mallory")
+
+        assert auth0_server.request_count == 2
@@ -0,0 +1,28 @@
+from starlette.types import Receive, Scope, Send
+
+from blanket.bench.asgi import RequestSpec, run_asgi_load
+
+
+async def _app(scope: Scope, receive: Receive, send: Send) -> None:
+    if scope["path"] == "/fail":
+        raise RuntimeError("Route failed")
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+class TestRunAsgiLoad:
+    async def test_app_exceptions_are_errors(self):
+        mix = [RequestSpec.parse("GET /ok"), RequestSpec.parse("GET /fail")]
+
+        report = await run_asgi_load(
+            _app, mix, rate=500, duration=0.1, poisson=False, seed=0
+        )
+
+        assert report.scheduled == 50
+        assert report.completed == report.scheduled
+        assert set(report.statuses) == {"200", "500"}
+        assert sum(report.statuses.values()) == report.completed
+        assert report.errors == report.statuses["500"]
+        assert report.latency_by_request["GET /fail"].summary()["count"] == (
+            report.errors
+        )
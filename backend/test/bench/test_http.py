@@ -0,0 +1,91 @@
+import asyncio
+import socket
+from collections.abc import AsyncGenerator
+
+import pytest
+import uvicorn
+from starlette.types import Receive, Scope, Send
+
+from blanket.bench.http import LoadReport, run_http_load
+
+
+async def _app(scope: Scope, receive: Receive, send: Send) -> None:
+    if scope["type"] != "http":
+        return
+    status = 500 if scope["path"] == "/fail" else 200
+    await send({"type": "http.response.start", "status": status, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+@pytest.fixture
+async def base_url() -> AsyncGenerator[str, None]:
+    """The URL of `_app`, served on a free local port."""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(_app, log_level="warning"))
+    serving = asyncio.create_task(server.serve(sockets=[sock]))
+    while not server.started:
+        await asyncio.sleep(0.01)
+    yield f"http://127.0.0.1:{sock.getsockname()[1]}"
+    server.should_exit = True
+    await serving
+
+
+class TestLoadReport:
+    def test_percentiles_are_nearest_rank(self):
+        report = LoadReport(
+            requests=10,
+            errors=0,
+            duration_s=2.0,
+            latencies_ms=[float(ms) for ms in range(10, 0, -1)],
+        )
+        assert report.percentile(50) == 5.0
+        assert report.percentile(95) == 10.0
+        assert report.percentile(0) == 1.0
+        assert report.summary() == {
+            "requests": 10,
+            "errors": 0,
+            "duration_s": 2.0,
+            "requests_per_second": 5.0,
+            "p50_ms": 5.0,
+            "p95_ms": 10.0,
+            "p99_ms": 10.0,
+        }
+
+    def test_empty_runs_report_zeros(self):
+        report = LoadReport(requests=0, errors=0, duration_s=0.0, latencies_ms=[])
+        assert report.requests_per_second == 0.0
+        assert report.percentile(99) == 0.0
+
+
+class TestRunHttpLoad:
+    async def test_server_errors_count_as_errors(self, base_url: str):
+        report = await run_http_load(
+            base_url, ["/ok", "/fail"], concurrency=1, duration=0.2
+        )
+
+        assert report.duration_s >= 0.2
+        assert report.requests == len(report.latencies_ms) + report.errors
+        # One worker alternates between the paths
+        assert abs(len(report.latencies_ms) - report.errors) <= 1
+        assert report.errors > 0
+
+    async def test_reports_throughput(self, base_url: str):
+        report = await run_http_load(base_url, ["/ok"], concurrency=4, duration=0.2)
+
+        assert report.errors == 0
+        assert report.requests >= 4
+        assert report.requests_per_second > 0
+
+    async def test_connection_failures_count_as_errors(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+
+        report = await run_http_load(
+            f"http://127.0.0.1:{port}", ["/"], concurrency=1, duration=0.1
+        )
+
+        assert report.requests > 0
+        assert report.errors == report.requests
+        assert report.latencies_ms == []
@@ -0,0 +1,77 @@
+import random
+
+from blanket.bench.histogram import LatencyHistogram
+from blanket.bench.replay import (
+    ReplayOptions,
+    ReplayReport,
+    build_request,
+    diff_replay_reports,
+)
+
+OPTIONS = ReplayOptions(task_ids=[7], vocabulary=["alpha"])
+
+
+def _record(method: str, route: str, **fields) -> dict:
+    return {"ts": 0.0, "method": method, "route": route, **fields}
+
+
+class TestBuildRequest:
+    """Filling anonymized captures back in."""
+
+    def test_reads(self):
+        record = _record(
+            "GET",
+            "/tasks/{task_id}",
+            query={
+                "search": {"words": 3, "length": 17},
+                "cursor": {"words": 1, "length": 24},
+                "priority": "HIGH",
+            },
+        )
+
+        assert build_request(record, random.Random(0), OPTIONS) == (
+            "GET",
+            "/tasks/7",
+            {"search": "alpha alpha alpha", "cursor": "", "priority": "HIGH"},
+            None,
+        )
+
+    def test_writes_skipped_unless_included(self):
+        update = _record("PATCH", "/tasks/{task_id}", request_bytes=20)
+        bulk = _record("POST", "/tasks/bulk", request_bytes=2000)
+        rng = random.Random(0)
+
+        assert build_request(update, rng, OPTIONS) is None
+        assert build_request(bulk, rng, OPTIONS) is None
+
+        with_writes = ReplayOptions(**{**vars(OPTIONS), "include_writes": True})
+        method, path, _, body = build_request(update, rng, with_writes)
+        assert (method, path) == ("PATCH", "/tasks/7")
+        assert set(body) == {"completed"}
+        assert build_request(bulk, rng, with_writes) is None
+
+
+def _report(by_route: dict[str, list[float]]) -> dict:
+    report = ReplayReport(speed=1.0)
+    for route, latencies in by_route.items():
+        for latency in latencies:
+            report.latency.record(latency)
+            report.by_route.setdefault(route, LatencyHistogram()).record(latency)
+    return report.summary()
+
+
+class TestDiffReplayReports:
+    def test_pairs_routes(self):
+        before = _report({"GET /tasks": [10.0] * 4, "GET /tasks/{task_id}": [2.0]})
+        after = _report({"GET /tasks": [5.0] * 2, "POST /tasks": [3.0]})
+
+        diffs = {diff.route: diff for diff in diff_replay_reports(before, after)}
+
+        # Only routes replayed in both are compared
+        assert set(diffs) == {"all", "GET /tasks"}
+        assert diffs["all"].count == (5, 3)
+        tasks = diffs["GET /tasks"]
+        assert tasks.count == (4, 2)
+        p50_before, p50_after = tasks.percentiles["p50_ms"]
+        assert p50_after < p50_before
+        assert tasks.change("p50_ms") == p50_after / p50_before - 1
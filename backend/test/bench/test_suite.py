@@ -0,0 +1,90 @@
+import json
+from pathlib import Path
+
+import sqlalchemy as sa
+from click.testing import CliRunner
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from blanket.bench.commands import bench
+from blanket.bench.suite import compare_to_baseline, seed_suite_data
+from blanket.bench.text import VOCABULARY
+from blanket.db.models import Task, User
+
+BASELINE = {
+    "list": {"p50_ms": 10.0, "p95_ms": 20.0, "requests_per_second": 100.0},
+    "search": {"p50_ms": 30.0, "p95_ms": 60.0, "requests_per_second": 30.0},
+}
+
+
+def _write_results(path: Path, scenarios: dict) -> Path:
+    path.write_text(json.dumps({"scenarios": scenarios}))
+    return path
+
+
+class TestCompareToBaseline:
+    """The regression gate `bench run --baseline` and `bench compare` apply."""
+
+    def test_regressions_beyond_threshold(self):
+        results = {
+            # Slower, but within the threshold, and faster
+            "list": {"p50_ms": 10.9, "p95_ms": 15.0, "requests_per_second": 95.0},
+            # Slower and lower throughput
+            "search": {"p50_ms": 40.0, "p95_ms": 60.0, "requests_per_second": 20.0},
+            "create": {"p50_ms": 99.0, "p95_ms": 99.0, "requests_per_second": 1.0},
+        }
+
+        regressions = compare_to_baseline(results, BASELINE, threshold=0.1)
+
+        assert [(r.scenario, r.metric) for r in regressions] == [
+            ("search", "p50_ms"),
+            ("search", "requests_per_second"),
+        ]
+        assert round(regressions[0].change, 3) == 0.333
+        assert round(regressions[1].change, 3) == -0.333
+
+    def test_missing_and_zero_baselines_are_skipped(self):
+        baseline = {"list": {"p50_ms": 0.0, "p95_ms": 20.0}}
+        results = {"list": {"p50_ms": 5.0, "requests_per_second": 1.0}}
+
+        assert compare_to_baseline(results, baseline, threshold=0.1) == []
+
+    def test_compare_command_exit_code(self, tmp_path: Path):
+        baseline = _write_results(tmp_path / "baseline.json", BASELINE)
+        unchanged = _write_results(tmp_path / "unchanged.json", BASELINE)
+        slower = _write_results(
+            tmp_path / "slower.json",
+            {**BASELINE, "list": {**BASELINE["list"], "p95_ms": 30.0}},
+        )
+        runner = CliRunner()
+
+        result = runner.invoke(bench, ["compare", str(unchanged), str(baseline)])
+        assert result.exit_code == 0, result.output
+
+        result = runner.invoke(bench, ["compare", str(slower), str(baseline)])
+        assert result.exit_code != 0
+        assert "1 metric(s) regressed by more than 10%" in result.output
+
+        # Only the chosen metrics are compared
+        result = runner.invoke(
+            bench, ["compare", str(slower), str(baseline), "--metric", "p50_ms"]
+        )
+        assert result.exit_code == 0, result.output
+
+
+class TestSeedSuiteData:
+    async def test_seeds_users_and_tasks(self, monkeypatch, test_engine: AsyncEngine):
+        monkeypatch.setattr(
+            "blanket.bench.suite.get_admin_session",
+            lambda: AsyncSession(test_engine),
+        )
+
+        await seed_suite_data(users=2, tasks_per_user=3)
+
+        async with AsyncSession(test_engine) as session:
+            assert await session.scalar(sa.select(sa.func.count(User.id))) == 2
+            tasks = (await session.scalars(sa.select(Task))).all()
+        assert len(tasks) == 6
+        assert sum(task.completed for task in tasks) == 2
+        for task in tasks:
+            first_word = task.title.split()[0].lower().strip(".")
+            assert first_word in VOCABULARY
@@ -1,14 +1,24 @@
-from collections.abc import Generator
+import asyncio
+from collections.abc import AsyncGenerator
 
+import httpx
 import pytest
-from fastapi.testclient import TestClient
+import sqlalchemy as sa
 from pytest_postgresql import factories
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy import URL, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 
-from blanket.api.deps import _get_db
+import blanket.db.redis
+from blanket.api.deps import _get_db, get_current_user
 from blanket.api.main import app
-from blanket.db.models import Base
+from blanket.db.models import Base, User
+from blanket.db.pg_objects import get_current_user_function, tasks_user_policy
+from blanket.db.session import UserContextConnection
+from test.factories import UserFactory
+from test.fake_redis import FakeRedis
+
+API_ROLE = "rls_api"
+"""A role RLS applies to, like the API's; `api_engine` connects as it."""
 
 # Create a PostgreSQL test database factory
 postgresql_proc = factories.postgresql_proc(
@@ -16,50 +26,145 @@ postgresql_proc = factories.postgresql_proc(
     unixsocketdir="/tmp",
 )
 postgresql = factories.postgresql("postgresql_proc")
+# A second database on the same server stands in for a read replica
+replica_postgresql = factories.postgresql("postgresql_proc", dbname="replica")
 
 
-@pytest.fixture
-def test_engine(postgresql):
-    """Create a test database engine."""
-    connection_string = (
-        f"postgresql://{postgresql.info.user}:@{postgresql.info.host}:"
-        f"{postgresql.info.port}/{postgresql.info.dbname}"
+async def _create_test_engine(postgresql) -> AsyncEngine:
+    connection_url = URL.create(
+        "postgresql+asyncpg",
+        username=postgresql.info.user,
+        host=postgresql.info.host,
+        port=postgresql.info.port,
+        database=postgresql.info.dbname,
     )
-    engine = create_engine(connection_string)
+    engine = create_async_engine(connection_url)
+
+    async with engine.begin() as connection:
+        # Extensions are created by migrations in production; the search indexes
+        # need these
+        await connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
 
-    # Create all tables
-    Base.metadata.create_all(engine)
+        # Create all tables
+        await connection.run_sync(Base.metadata.create_all)
 
     return engine
 
 
 @pytest.fixture
-def db_session(test_engine) -> Generator[Session, None, None]:
+async def test_engine(postgresql) -> AsyncGenerator[AsyncEngine, None]:
+    """Create a test database engine."""
+    engine = await _create_test_engine(postgresql)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+async def replica_engine(replica_postgresql) -> AsyncGenerator[AsyncEngine, None]:
+    """Create an engine for a database standing in for a read replica."""
+    engine = await _create_test_engine(replica_postgresql)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+async def db_session(test_engine: AsyncEngine) -> AsyncGenerator[AsyncSession, None]:
     """Create a fresh database session for each test."""
-    connection = test_engine.connect()
-    transaction = connection.begin()
+    async with test_engine.connect() as connection:
+        transaction = await connection.begin()
+
+        # Commits inside the session release savepoints rather than the outer
+        # transaction, which is rolled back after the test
+        session = AsyncSession(
+            bind=connection,
+            expire_on_commit=False,
+            join_transaction_mode="create_savepoint",
+        )
+
+        yield session
 
-    # Create session bound to the connection
-    session = sessionmaker(bind=connection)()
+        await session.close()
+        await transaction.rollback()
 
-    yield session
 
-    session.close()
-    transaction.rollback()
-    connection.close()
+@pytest.fixture
+async def rls(test_engine: AsyncEngine) -> AsyncGenerator[None, None]:
+    """Subject tasks to RLS, as migrations do, and create `API_ROLE`."""
+    async with test_engine.begin() as connection:
+        for statement in (
+            get_current_user_function.to_sql_statement_create(),
+            tasks_user_policy.to_sql_statement_create(),
+            sa.text("ALTER TABLE tasks ENABLE ROW LEVEL SECURITY"),
+            sa.text(f"CREATE ROLE {API_ROLE} LOGIN"),
+            sa.text(f"GRANT SELECT, INSERT, UPDATE, DELETE ON tasks TO {API_ROLE}"),
+            sa.text(f"GRANT USAGE ON ALL SEQUENCES IN SCHEMA public TO {API_ROLE}"),
+        ):
+            await connection.execute(statement)
+    yield
+
+    async with test_engine.begin() as connection:
+        await connection.execute(sa.text(f"DROP OWNED BY {API_ROLE}"))
+        await connection.execute(sa.text(f"DROP ROLE {API_ROLE}"))
 
 
 @pytest.fixture
-def client(db_session: Session) -> Generator[TestClient, None, None]:
+async def api_engine(postgresql, rls) -> AsyncGenerator[AsyncEngine, None]:
+    """An engine connecting as `API_ROLE`, with the API's connection class."""
+    engine = create_async_engine(
+        URL.create(
+            "postgresql+asyncpg",
+            username=API_ROLE,
+            host=postgresql.info.host,
+            port=postgresql.info.port,
+            database=postgresql.info.dbname,
+        ),
+        connect_args={"connection_class": UserContextConnection},
+        # One connection, so each session checks out the one the last one used
+        pool_size=1,
+        max_overflow=0,
+    )
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+async def client(db_session: AsyncSession) -> AsyncGenerator[httpx.AsyncClient, None]:
     """Create a test client with database dependency override."""
 
-    def override_get_db():
+    async def override_get_db():
         yield db_session
 
     app.dependency_overrides[_get_db] = override_get_db
 
-    with TestClient(app) as test_client:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://test"
+    ) as test_client:
         yield test_client
 
     # Clean up
     app.dependency_overrides.clear()
+
+
+@pytest.fixture
+async def current_user(client: httpx.AsyncClient, db_session: AsyncSession) -> User:
+    """A user the client's requests are authenticated as."""
+    user = UserFactory.build()
+    db_session.add(user)
+    await db_session.commit()
+
+    app.dependency_overrides[get_current_user] = lambda: user
+    return user
+
+
+@pytest.fixture
+async def redis(monkeypatch) -> FakeRedis:
+    """Configure Redis, and serve the running event loop's client from memory."""
+    monkeypatch.setattr(blanket.db.redis, "BLANKET_REDIS_HOST", "localhost")
+    monkeypatch.setattr(blanket.db.redis, "BLANKET_REDIS_PORT", "6379")
+    monkeypatch.setattr(blanket.db.redis, "BLANKET_REDIS_DB", "0")
+    fake = FakeRedis()
+    monkeypatch.setitem(
+        blanket.db.redis._async_redis_clients, asyncio.get_running_loop(), fake
+    )
+    return fake
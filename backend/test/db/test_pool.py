@@ -0,0 +1,122 @@
+import asyncio
+import uuid
+from collections.abc import AsyncGenerator
+
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from blanket.db.pool import (
+    DecayingAverage,
+    InstrumentedAsyncPool,
+    PoolStats,
+    get_pool_stats,
+    get_recent_checkout_wait,
+    instrument_pool,
+)
+from blanket.io.timing import track_request_timings
+
+_WAIT_S = 0.2
+
+
+@pytest.fixture
+async def pool_engine(test_engine: AsyncEngine) -> AsyncGenerator[AsyncEngine, None]:
+    """An instrumented engine with one pooled connection and one overflow."""
+    engine = create_async_engine(
+        test_engine.url,
+        poolclass=InstrumentedAsyncPool,
+        pool_size=1,
+        max_overflow=1,
+    )
+    # Engines from earlier tests may not have been collected yet
+    instrument_pool(engine.sync_engine, f"test-{uuid.uuid4().hex}")
+    yield engine
+    await engine.dispose()
+
+
+def _stats(engine: AsyncEngine) -> PoolStats:
+    return engine.sync_engine.pool.stats
+
+
+class TestDecayingAverage:
+    def test_weights_new_samples(self):
+        average = DecayingAverage(weight=0.5)
+        average.record(1.0)
+        average.record(1.0)
+        assert average.value(now=average._updated_at) == pytest.approx(0.75)
+
+    def test_halves_every_half_life_without_samples(self):
+        average = DecayingAverage(half_life_s=5.0, weight=1.0)
+        average.record(2.0)
+        recorded_at = average._updated_at
+        assert average.value(now=recorded_at + 5.0) == pytest.approx(1.0)
+        assert average.value(now=recorded_at + 10.0) == pytest.approx(0.5)
+
+    def test_starts_at_zero(self):
+        assert DecayingAverage().value() == 0.0
+
+
+class TestInstrumentedPool:
+    async def test_records_checkouts_and_overflow(self, pool_engine: AsyncEngine):
+        async with pool_engine.connect(), pool_engine.connect():
+            stats = _stats(pool_engine)
+            assert stats.checkouts == 2
+            assert stats.overflow_checkouts == 1
+            assert stats.connections_opened == 2
+            assert stats.connection_age.count == 2
+
+        async with pool_engine.connect():
+            assert stats.checkouts == 3
+            # The pooled connection was reused, not opened again
+            assert stats.overflow_checkouts == 1
+            assert stats.connections_opened == 2
+
+    async def test_times_waits_for_a_connection(self, pool_engine: AsyncEngine):
+        stats = _stats(pool_engine)
+        waiting = asyncio.Event()
+
+        async def wait_for_connection() -> float:
+            with track_request_timings() as timings:
+                waiting.set()
+                async with pool_engine.connect():
+                    pass
+            return timings.pool_wait_s
+
+        async with pool_engine.connect(), pool_engine.connect():
+            waiter = asyncio.create_task(wait_for_connection())
+            await waiting.wait()
+            await asyncio.sleep(_WAIT_S)
+            assert stats.waiting == 1
+
+        # The request's timings carry the same wait
+        assert await waiter >= _WAIT_S
+        assert stats.waiting == 0
+        assert stats.peak_waiting == 1
+        assert stats.checkout_wait.max_s >= _WAIT_S
+        assert get_recent_checkout_wait(stats.role) > 0
+        assert get_recent_checkout_wait("unused") == 0.0
+
+
+class TestPoolStats:
+    async def test_reports_each_pool(self, pool_engine: AsyncEngine):
+        async with pool_engine.connect():
+            pools = [
+                pool
+                for pool in get_pool_stats()["pools"]
+                if pool["role"] == _stats(pool_engine).role
+            ]
+        assert len(pools) == 1
+        assert pools[0]["pool_size"] == 1
+        assert pools[0]["checked_out"] == 1
+        assert pools[0]["checked_in"] == 0
+        assert pools[0]["overflow"] == 0
+        assert pools[0]["checkouts"] == 1
+        assert pools[0]["checkout_wait"]["count"] == 1
+
+    async def test_served_with_metrics_not_health(self, client: httpx.AsyncClient):
+        response = await client.get("/metrics/pool")
+        assert response.status_code == 200
+        assert "pools" in response.json()
+
+        response = await client.get("/health/pool")
+        assert response.status_code == 404
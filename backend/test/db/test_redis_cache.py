@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from blanket.db.redis_cache import cached, invalidate_cache_tags
+from test.fake_redis import FakeRedis
+
+
+class Counter:
+    """A cached function's underlying calls, which can be held until released."""
+
+    def __init__(self):
+        self.calls: list[str] = []
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self, name: str) -> str:
+        self.calls.append(name)
+        await self.release.wait()
+        return f"{name}:{len(self.calls)}"
+
+
+@pytest.fixture
+def counter() -> Counter:
+    return Counter()
+
+
+class TestCached:
+    """Read-through caching with tags and single flight."""
+
+    async def test_hit(self, redis: FakeRedis, counter: Counter):
+        @cached(ttl=60, beta=0)
+        async def greet(name: str) -> str:
+            return await counter(name)
+
+        assert await greet("alice") == "alice:1"
+        assert await greet("alice") == "alice:1"
+        assert await greet("bob") == "bob:2"
+        assert counter.calls == ["alice", "bob"]
+
+    async def test_tag_invalidation(self, redis: FakeRedis, counter: Counter):
+        @cached(ttl=60, beta=0, tags=lambda name: ["people", f"person:{name}"])
+        async def greet(name: str) -> str:
+            return await counter(name)
+
+        await greet("alice")
+        await greet("bob")
+
+        await invalidate_cache_tags("person:alice")
+        assert await greet("alice") == "alice:3"
+        assert await greet("bob") == "bob:2"
+
+        await invalidate_cache_tags("people")
+        assert await greet("alice") == "alice:4"
+        assert await greet("bob") == "bob:5"
+
+    async def test_concurrent_misses_share_one_call(
+        self, redis: FakeRedis, counter: Counter
+    ):
+        @cached(ttl=60, beta=0)
+        async def greet(name: str) -> str:
+            return await counter(name)
+
+        counter.release.clear()
+        calls = [asyncio.create_task(greet("alice")) for _ in range(5)]
+        await asyncio.sleep(0.01)
+        counter.release.set()
+
+        assert await asyncio.gather(*calls) == ["alice:1"] * 5
+        assert counter.calls == ["alice"]
+
+    async def test_expired_value_served_while_another_worker_recomputes(
+        self, redis: FakeRedis, counter: Counter
+    ):
+        @cached(ttl=0.2, beta=0, namespace="greet")
+        async def greet(name: str) -> str:
+            return await counter(name)
+
+        await greet("alice")
+        await asyncio.sleep(0.25)
+        (key,) = redis.data
+        await redis.set(f"{key}:lock", "another worker", px=1000)
+
+        assert await greet("alice") == "alice:1"
+        assert counter.calls == ["alice"]
+
+    async def test_without_redis(self, counter: Counter):
+        @cached(ttl=60)
+        async def greet(name: str) -> str:
+            return await counter(name)
+
+        await greet("alice")
+        await greet("alice")
+        assert counter.calls == ["alice", "alice"]
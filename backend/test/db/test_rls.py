@@ -0,0 +1,69 @@
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from blanket.db.models import Task
+from blanket.db.session import set_session_user
+from test.factories import TaskFactory, UserFactory
+
+_SET_USER_SETTING = sa.text("SELECT set_config('app.current_user_id', :value, true)")
+
+
+@pytest.fixture
+async def user_ids(test_engine: AsyncEngine, rls) -> tuple[int, int]:
+    """Two users, owning two tasks and one task."""
+    async with AsyncSession(test_engine, expire_on_commit=False) as session:
+        alice, bob = UserFactory.build_batch(2)
+        session.add_all(
+            [
+                *TaskFactory.build_batch(2, creator=alice, completed=False),
+                TaskFactory.build(creator=bob, completed=False),
+            ]
+        )
+        await session.commit()
+    return alice.id, bob.id
+
+
+class TestTasksPolicy:
+    """The tasks RLS policy, applied through the API's connection class."""
+
+    async def test_users_only_see_and_change_their_own_tasks(
+        self, api_engine: AsyncEngine, user_ids: tuple[int, int]
+    ):
+        alice, bob = user_ids
+        for user_id, count in ((alice, 2), (bob, 1)):
+            async with AsyncSession(api_engine) as session:
+                await set_session_user(session, user_id)
+                creators = await session.scalars(sa.select(Task.creator_id))
+                assert list(creators) == [user_id] * count
+
+        async with AsyncSession(api_engine) as session:
+            await set_session_user(session, bob)
+            result = await session.execute(sa.update(Task).values(completed=True))
+            assert result.rowcount == 1
+            await session.commit()
+
+        async with AsyncSession(api_engine) as session:
+            await set_session_user(session, alice)
+            completed = await session.scalars(sa.select(Task.completed))
+            assert list(completed) == [False, False]
+
+    @pytest.mark.parametrize("value", ["", "alice", "1.5", " 1", "99999999999"])
+    async def test_invalid_settings_mean_no_user(
+        self, api_engine: AsyncEngine, user_ids: tuple[int, int], value: str
+    ):
+        async with AsyncSession(api_engine) as session:
+            await session.execute(_SET_USER_SETTING, {"value": value})
+            assert await session.scalar(sa.select(sa.func.count(Task.id))) == 0
+
+    async def test_current_user_is_inlined(
+        self, api_engine: AsyncEngine, user_ids: tuple[int, int]
+    ):
+        async with AsyncSession(api_engine) as session:
+            await set_session_user(session, user_ids[0])
+            plan = "\n".join(
+                await session.scalars(sa.text("EXPLAIN VERBOSE SELECT id FROM tasks"))
+            )
+        # Evaluated once, as the setting itself, rather than called per row
+        assert "InitPlan" in plan
+        assert "get_current_user" not in plan
@@ -0,0 +1,69 @@
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from blanket.db.session import set_session_user
+from test.factories import TaskFactory
+
+_CURRENT_USER_SETTING = sa.text("SELECT current_setting('app.current_user_id', true)")
+_VISIBLE_TASKS = sa.text("SELECT count(*) FROM tasks")
+
+
+@pytest.fixture
+async def user_id(test_engine: AsyncEngine, rls) -> int:
+    """A user owning one task, in a database where tasks are subject to RLS."""
+    async with AsyncSession(test_engine, expire_on_commit=False) as session:
+        task = TaskFactory.build()
+        session.add(task)
+        await session.commit()
+    return task.creator_id
+
+
+@pytest.fixture
+def statements(api_engine: AsyncEngine) -> list[str]:
+    executed: list[str] = []
+
+    @sa.event.listens_for(api_engine.sync_engine, "before_cursor_execute")
+    def record(_conn, _cursor, statement, *_args):
+        executed.append(statement)
+
+    return executed
+
+
+class TestSessionUserContext:
+    async def test_user_context_is_sent_with_begin(
+        self, api_engine: AsyncEngine, user_id: int, statements: list[str]
+    ):
+        async with AsyncSession(api_engine) as session:
+            await set_session_user(session, user_id)
+            assert await session.scalar(_CURRENT_USER_SETTING) == str(user_id)
+            assert await session.scalar(_VISIBLE_TASKS) == 1
+            await session.commit()
+
+            # Re-applied to the session's next transaction
+            assert await session.scalar(_VISIBLE_TASKS) == 1
+
+        assert not any("set_config" in statement for statement in statements)
+
+        async with AsyncSession(api_engine) as session:
+            assert not await session.scalar(_CURRENT_USER_SETTING)
+            assert await session.scalar(_VISIBLE_TASKS) == 0
+
+    async def test_unsent_user_context_is_discarded_on_checkin(
+        self, api_engine: AsyncEngine, user_id: int
+    ):
+        async with AsyncSession(api_engine) as session:
+            await set_session_user(session, user_id)
+            # Begins a transaction, but sends no statement (and so no BEGIN)
+            await session.connection()
+
+        async with AsyncSession(api_engine) as session:
+            assert await session.scalar(_VISIBLE_TASKS) == 0
+
+    async def test_setting_the_user_mid_transaction(
+        self, api_engine: AsyncEngine, user_id: int
+    ):
+        async with AsyncSession(api_engine) as session:
+            assert await session.scalar(_VISIBLE_TASKS) == 0
+            await set_session_user(session, user_id)
+            assert await session.scalar(_VISIBLE_TASKS) == 1
@@ -1,7 +1,15 @@
 import factory
 from factory import Faker
 
-from blanket.db.models import Task, TaskPriority
+from blanket.db.models import Task, TaskPriority, User
+
+
+class UserFactory(factory.Factory):
+    class Meta:
+        model = User
+
+    email = factory.Sequence(lambda n: f"user{n}@example.com")
+    display_name = Faker("name")
 
 
 class TaskFactory(factory.Factory):
@@ -12,3 +20,4 @@ class TaskFactory(factory.Factory):
     description = Faker("text", max_nb_chars=200)
     completed = False
     priority = TaskPriority.MEDIUM
+    creator = factory.SubFactory(UserFactory)
@@ -0,0 +1,108 @@
+import time
+from typing import Any
+
+
+def _encode(value: Any) -> bytes:
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode()
+
+
+class FakeRedis:
+    """An in-memory stand-in for the parts of `redis.asyncio.Redis` the app uses."""
+
+    def __init__(self):
+        self.data: dict[str, bytes] = {}
+        self.expires_at: dict[str, float] = {}
+
+    def _purge(self, key: str) -> None:
+        if key in self.expires_at and self.expires_at[key] <= time.monotonic():
+            del self.data[key], self.expires_at[key]
+
+    def ttl(self, key: str) -> float | None:
+        """Seconds until `key` expires, or None if it never does."""
+        self._purge(key)
+        if key not in self.expires_at:
+            return None
+        return self.expires_at[key] - time.monotonic()
+
+    async def get(self, key: str) -> bytes | None:
+        self._purge(key)
+        return self.data.get(key)
+
+    async def mget(self, keys: list[str]) -> list[bytes | None]:
+        return [await self.get(key) for key in keys]
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        ex: float | None = None,
+        px: float | None = None,
+        nx: bool = False,
+    ) -> bool | None:
+        self._purge(key)
+        if nx and key in self.data:
+            return None
+        self.data[key] = _encode(value)
+        self.expires_at.pop(key, None)
+        if ex is not None or px is not None:
+            seconds = ex if ex is not None else px / 1000
+            self.expires_at[key] = time.monotonic() + seconds
+        return True
+
+    async def incr(self, key: str) -> int:
+        self._purge(key)
+        # Like Redis, keeps the key's expiry
+        value = int(self.data.get(key, b"0")) + 1
+        self.data[key] = _encode(value)
+        return value
+
+    async def delete(self, *keys: str) -> int:
+        deleted = 0
+        for key in keys:
+            self._purge(key)
+            if key in self.data:
+                del self.data[key]
+                self.expires_at.pop(key, None)
+                deleted += 1
+        return deleted
+
+    async def eval(self, script: str, numkeys: int, *keys_and_args: Any) -> int:
+        # Only the compare-and-delete script locks are released with
+        (key,), (token,) = keys_and_args[:numkeys], keys_and_args[numkeys:]
+        if await self.get(key) == _encode(token):
+            return await self.delete(key)
+        return 0
+
+    def pipeline(self, transaction: bool = True) -> "FakePipeline":
+        return FakePipeline(self)
+
+    async def aclose(self) -> None:
+        pass
+
+
+class FakePipeline:
+    def __init__(self, redis: FakeRedis):
+        self._redis = redis
+        self._commands: list[tuple[str, tuple, dict]] = []
+
+    def __getattr__(self, name: str):
+        def queue(*args, **kwargs) -> "FakePipeline":
+            self._commands.append((name, args, kwargs))
+            return self
+
+        return queue
+
+    async def execute(self) -> list[Any]:
+        commands, self._commands = self._commands, []
+        return [
+            await getattr(self._redis, name)(*args, **kwargs)
+            for name, args, kwargs in commands
+        ]
+
+    async def __aenter__(self) -> "FakePipeline":
+        return self
+
+    async def __aexit__(self, *_exc) -> None:
+        self._commands = []
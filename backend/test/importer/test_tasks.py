@@ -0,0 +1,178 @@
+import json
+from collections.abc import AsyncGenerator
+from pathlib import Path
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from blanket.db.models import Task
+from blanket.importer.tasks import (
+    ImportFormat,
+    ImportReport,
+    _validated_batches,
+    import_tasks,
+)
+from test.factories import UserFactory
+
+
+def _write_ndjson(path: Path, lines: list[object]) -> Path:
+    path.write_text(
+        "\n".join(line if isinstance(line, str) else json.dumps(line) for line in lines)
+    )
+    return path
+
+
+class TestValidatedBatches:
+    """Reading, validating and batching records without a database."""
+
+    def test_batches_and_defaults(self, tmp_path: Path):
+        path = tmp_path / "tasks.csv"
+        path.write_text(
+            "id,creator_id,title,description\n"
+            ",,First,\n"
+            ",2,Second,Has a description\n"
+            "7,,Third,\n"
+        )
+        report = ImportReport()
+
+        batches = [
+            batch
+            for _, batch in _validated_batches(path, ImportFormat.CSV, 2, 1, report)
+        ]
+
+        assert [len(batch) for batch in batches] == [2, 1]
+        first, second, third = [record for batch in batches for record in batch]
+        # Empty cells are missing, so they take defaults
+        assert first[:4] == (None, 1, "First", None)
+        assert second[:4] == (None, 2, "Second", "Has a description")
+        assert third[:2] == (7, 1)
+        assert report == ImportReport()
+
+    def test_last_record_per_id_wins(self, tmp_path: Path):
+        path = _write_ndjson(
+            tmp_path / "tasks.ndjson",
+            [
+                {"id": 1, "creator_id": 1, "title": "Old"},
+                {"id": 1, "creator_id": 1, "title": "New"},
+            ],
+        )
+
+        batches = [
+            batch
+            for _, batch in _validated_batches(
+                path, ImportFormat.NDJSON, 10, None, ImportReport()
+            )
+        ]
+
+        assert [[record[2] for record in batch] for batch in batches] == [["New"]]
+
+    def test_ids_stay_in_their_partition(self, tmp_path: Path):
+        path = _write_ndjson(
+            tmp_path / "tasks.ndjson",
+            [{"id": i % 5, "title": f"Version {i // 5}"} for i in range(15)]
+            + [{"title": "New"}] * 4,
+        )
+
+        batches = list(
+            _validated_batches(path, ImportFormat.NDJSON, 2, 1, ImportReport(), 3)
+        )
+
+        seen: dict[int, str] = {}
+        unkeyed_partitions = []
+        for partition, batch in batches:
+            assert 0 < len(batch) <= 2
+            for record in batch:
+                if record[0] is None:
+                    unkeyed_partitions.append(partition)
+                else:
+                    assert partition == record[0] % 3
+                    seen[record[0]] = record[2]
+        # Within a partition, batches are in file order, so later versions come last
+        assert seen == dict.fromkeys(range(5), "Version 2")
+        assert sorted(unkeyed_partitions) == [0, 1, 1, 2]
+
+    def test_invalid_records_are_reported(self, tmp_path: Path):
+        path = _write_ndjson(
+            tmp_path / "tasks.ndjson",
+            [
+                {"title": "Valid"},
+                {"description": "No title"},
+                "{not json",
+                "",
+                [1, 2],
+                {"title": "Also valid"},
+            ],
+        )
+        report = ImportReport()
+
+        batches = [
+            batch
+            for _, batch in _validated_batches(path, ImportFormat.NDJSON, 10, 1, report)
+        ]
+
+        assert [record[2] for batch in batches for record in batch] == [
+            "Valid",
+            "Also valid",
+        ]
+        assert report.invalid == 3
+        assert [error.split(":")[0] for error in report.errors] == [
+            "Record 2",
+            "Record 3",
+            "Record 4",
+        ]
+        assert "Invalid JSON" in report.errors[1]
+
+
+class TestImportTasks:
+    """Loading files into the database."""
+
+    @pytest.fixture
+    async def creator_id(
+        self, monkeypatch, test_engine: AsyncEngine
+    ) -> AsyncGenerator[int, None]:
+        """A committed user, in a database the importer loads into."""
+        monkeypatch.setattr(
+            "blanket.importer.tasks.get_admin_engine", lambda: test_engine
+        )
+        async with AsyncSession(test_engine, expire_on_commit=False) as session:
+            user = UserFactory.build()
+            session.add(user)
+            await session.commit()
+            yield user.id
+
+    async def test_malformed_lines_are_skipped(
+        self, tmp_path: Path, test_engine: AsyncEngine, creator_id: int
+    ):
+        path = _write_ndjson(
+            tmp_path / "tasks.ndjson",
+            [{"title": "First"}, '{"title": "Truncated', {"title": "Second"}],
+        )
+
+        report = await import_tasks(
+            path, default_creator_id=creator_id, batch_size=1, workers=2
+        )
+
+        assert (report.inserted, report.updated, report.invalid) == (2, 0, 1)
+        assert report.errors[0].startswith("Record 2: Invalid JSON")
+        async with AsyncSession(test_engine) as session:
+            titles = await session.scalars(sa.select(Task.title).order_by(Task.id))
+            assert set(titles) == {"First", "Second"}
+
+    async def test_duplicate_ids_across_batches(
+        self, tmp_path: Path, test_engine: AsyncEngine, creator_id: int
+    ):
+        path = _write_ndjson(
+            tmp_path / "tasks.ndjson",
+            [{"id": i % 4 + 1, "title": f"Version {i // 4}"} for i in range(12)],
+        )
+
+        report = await import_tasks(
+            path, default_creator_id=creator_id, batch_size=1, workers=3
+        )
+
+        # Each ID is inserted by its first record, then updated by each later one
+        assert (report.inserted, report.updated, report.invalid) == (4, 8, 0)
+        async with AsyncSession(test_engine) as session:
+            rows = await session.execute(sa.select(Task.id, Task.title))
+            assert dict(rows.all()) == dict.fromkeys(range(1, 5), "Version 2")
@@ -0,0 +1,105 @@
+import asyncio
+import importlib
+import time
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy import URL
+
+import blanket.db.redis
+import blanket.db.session
+from blanket.db.session import get_admin_engine, get_admin_session
+from blanket.jobs.loop import close_worker_loop
+from test.fake_redis import FakeRedis
+
+_CONNECTIONS_QUERY = """
+SELECT count(*) FROM pg_stat_activity
+WHERE datname = current_database() AND pid <> pg_backend_pid()
+"""
+
+
+class _ClosableRedis(FakeRedis):
+    closed = False
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+@pytest.fixture
+def celery(monkeypatch, postgresql):
+    """blanket.jobs.celery, with its async tasks' admin engine on the test database."""
+    # The Celery app needs a broker URL when it's created, on import
+    monkeypatch.setattr(blanket.db.redis, "BLANKET_REDIS_HOST", "localhost")
+    monkeypatch.setattr(blanket.db.redis, "BLANKET_REDIS_PORT", "6379")
+    monkeypatch.setattr(blanket.db.redis, "BLANKET_REDIS_DB", "0")
+    monkeypatch.setattr(
+        blanket.db.session,
+        "_ADMIN_POSTGRES_URI",
+        URL.create(
+            "postgresql+asyncpg",
+            username=postgresql.info.user,
+            host=postgresql.info.host,
+            port=postgresql.info.port,
+            database=postgresql.info.dbname,
+        ),
+    )
+    yield importlib.import_module("blanket.jobs.celery")
+    close_worker_loop()
+    asyncio.set_event_loop(None)
+
+
+def _count_connections(postgresql) -> int:
+    with postgresql.cursor() as cursor:
+        cursor.execute(_CONNECTIONS_QUERY)
+        count = cursor.fetchone()[0]
+    # Statistics are a snapshot for the rest of the transaction
+    postgresql.rollback()
+    return count
+
+
+class TestAsyncTask:
+    """Coroutine tasks run on their worker process' long-lived event loop."""
+
+    def test_tasks_share_the_loop_and_engine(self, celery, postgresql):
+        @celery.async_task(name="test.jobs.query_admin_engine")
+        async def query_admin_engine():
+            async with get_admin_session() as db:
+                await db.execute(sa.text("SELECT 1"))
+            return asyncio.get_running_loop(), get_admin_engine()
+
+        first_loop, first_engine = query_admin_engine()
+        second_loop, second_engine = query_admin_engine()
+
+        assert second_loop is first_loop
+        assert not first_loop.is_closed()
+        assert second_engine is first_engine
+        # The second task reused the first one's pooled connection
+        assert _count_connections(postgresql) == 1
+
+    def test_shutdown_closes_the_loop_and_its_resources(self, celery, postgresql):
+        redis = _ClosableRedis()
+
+        @celery.async_task(name="test.jobs.open_resources")
+        async def open_resources():
+            loop = asyncio.get_running_loop()
+            blanket.db.redis._async_redis_clients[loop] = redis
+            async with get_admin_session() as db:
+                await db.execute(sa.text("SELECT 1"))
+            return loop
+
+        loop = open_resources()
+        assert _count_connections(postgresql) == 1
+
+        celery.shutdown_worker_loop()
+
+        assert loop.is_closed()
+        assert loop not in blanket.db.session._admin_resources
+        # Backends exit just after their clients disconnect
+        for _ in range(50):
+            if _count_connections(postgresql) == 0:
+                break
+            time.sleep(0.01)
+        assert _count_connections(postgresql) == 0
+        assert redis.closed
+        # A later task gets a new loop
+        assert open_resources() is not loop